@@ -0,0 +1,227 @@
+"""
+bench_report.py: Time the report steps on synthetic boards of increasing size.
+
+Each size is a total pad count, the board has size / --pads footprints. Every
+step is run --repeat times and the fastest run is kept. Results are written as
+JSON with the commit and environment so runs can be compared.
+
+    python -m benchmarks.bench_report --sizes 1000,10000,100000 --out bench.json
+    python -m benchmarks.bench_report --sizes 10000 --compare bench.json
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from kicad_testpoints import file_io
+from kicad_testpoints import ipc356
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints import panel
+from kicad_testpoints import probe_spacing
+from kicad_testpoints.board_index import BoardIndex
+
+from benchmarks import synthetic_board
+
+root = Path(__file__).resolve().parent.parent
+default_sizes = "1000,10000,100000"
+default_formats = "csv,xlsx,parquet,arrow"
+# Sampled probes for calc_probe_distances, it compares one probe to all others
+distance_probes = 100
+# xlsx is slow enough that the largest sizes would dominate the run time
+xlsx_max_pads = 20_000
+# Panel timed with every board's probes, one instance rotated
+panel_spec = panel.PanelSpec(
+    rows=4, columns=4, pitch=(60.0, 60.0), rotations={(2, 2): 90}
+)
+
+
+def commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S603, S607
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+def best(function, repeat: int) -> tuple[float, object]:
+    """
+    Fastest wall time of repeat calls and the last result.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def write_netlist(fname: Path, size: int) -> Path:
+    """
+    IPC-D-356 netlist with size surface mount features on size / 20 nets.
+    """
+    nets = max(1, size // 20)
+    lines = ["P  UNITS CUST 1"]
+    for i in range(size):
+        net = synthetic_board.net_name(i % nets + 1, nets)
+        ref_des, pin = f"TP{i % 10000}", i // 10000
+        lines.append(
+            f"327{net:<14}   {ref_des:<6}-{pin:<4} {'':<6}A01"
+            f"X{i % 300_000:+07d}Y{-(i % 200_000):+07d}X0100Y0100R000 S0"
+        )
+    lines.append("999")
+    fname.write_text("\n".join(lines) + "\n")
+    return fname
+
+
+def bench_size(directory: Path, size: int, args) -> list[dict]:
+    footprints = max(1, size // args.pads)
+    fname = synthetic_board.write(
+        directory / f"board-{size}.kicad_pcb",
+        footprints,
+        synthetic_board.Shape(
+            pads=args.pads, testpoint_fraction=args.testpoint_fraction, seed=args.seed
+        ),
+    )
+    results = []
+
+    def record(step, function, repeat=args.repeat, **extra):
+        seconds, value = best(function, repeat)
+        total = footprints * args.pads
+        results.append({"pads": total, "step": step, "seconds": seconds, **extra})
+        sys.stderr.write(f"{total:>8} {step:<32} {seconds * 1e3:10.1f} ms\n")
+        return value
+
+    settings = kicad_testpoints.Settings()
+    board = record(
+        "load_board native", lambda: kicad_testpoints.load_board(fname, "native")
+    )
+    index = record("BoardIndex", lambda: BoardIndex(board))
+    pads = record(
+        "get_pads_by_property", lambda: kicad_testpoints.get_pads_by_property(index)
+    )
+    pairs = [(p.GetParentFootprint().GetReference(), str(p.GetNumber())) for p in pads]
+    record(
+        "get_pads", lambda: kicad_testpoints.get_pads(pairs, index), selected=len(pairs)
+    )
+    record(
+        "build_test_point_table",
+        lambda: kicad_testpoints.build_test_point_table(board, settings, pads),
+    )
+    report = record(
+        "build_test_point_report",
+        lambda: kicad_testpoints.build_test_point_report(board, settings, pads),
+    )
+
+    report_df = pd.DataFrame(report)
+    probes_df = report_df.assign(
+        **{
+            "test point ref des": report_df["source ref des"]
+            + "-"
+            + report_df["source pad"]
+        }
+    )
+    names = probes_df["test point ref des"].iloc[:distance_probes].tolist()
+    record(
+        "calc_probe_distances",
+        lambda: [
+            kicad_testpoints.calc_probe_distances(name, probes_df) for name in names
+        ],
+        calls=len(names),
+    )
+    record("pitch_violations", lambda: probe_spacing.pitch_violations(report_df, 1.27))
+    netlist = write_netlist(directory / f"board-{size}.d356", size)
+    record("ipc356.read", lambda: ipc356.read(netlist), rows=size)
+    record(
+        "panelize 4x4",
+        lambda: panel.panelize(report_df, panel_spec),
+        rows=len(report_df) * len(panel_spec.instances()),
+    )
+
+    for fmt in args.formats.split(","):
+        if fmt == "xlsx" and len(report_df) > xlsx_max_pads:
+            continue
+        if fmt in ("parquet", "arrow") and importlib.util.find_spec("pyarrow") is None:
+            continue
+        out = (directory / f"report-{size}.{fmt}").as_posix()
+        record(
+            f"file_io.write {fmt}",
+            lambda out=out: file_io.write(report_df, out),
+            rows=len(report_df),
+        )
+        record(
+            f"file_io.read_file_to_df {fmt}",
+            lambda out=out: file_io.read_file_to_df(out),
+            rows=len(report_df),
+        )
+    return results
+
+
+def compare(results: list[dict], fname) -> None:
+    """
+    Print the ratio of each step's time to the same step in an earlier run.
+    """
+    before = json.loads(Path(fname).read_text(encoding="utf-8"))
+    previous = {(r["pads"], r["step"]): r["seconds"] for r in before["results"]}
+    sys.stderr.write(f"Compared to {before['commit'] or fname}:\n")
+    for result in results:
+        old = previous.get((result["pads"], result["step"]))
+        if old:
+            sys.stderr.write(
+                f"{result['pads']:>8} {result['step']:<32} {result['seconds'] / old:6.2f}x\n"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default=default_sizes, help="Comma separated pad counts"
+    )
+    parser.add_argument("--pads", type=int, default=4, help="Pads per footprint")
+    parser.add_argument("--testpoint-fraction", type=float, default=0.25)
+    parser.add_argument("--formats", default=default_formats)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(","):
+            results.extend(bench_size(Path(tmp), int(size), args))
+
+    if args.compare:
+        compare(results, args.compare)
+    text = json.dumps(
+        {
+            "commit": commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "testpoint fraction": args.testpoint_fraction,
+            "pads per footprint": args.pads,
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+bench_startup.py: Wall time of short CLI runs, where start up dominates.
+
+Each command is run in a fresh interpreter so module imports are counted. The
+modules that were imported are checked for pandas, numpy and pcbnew. Results
+are printed as JSON.
+
+    python -m benchmarks.bench_startup --repeat 5 --out startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+demo_board = root / "tests" / "data" / "demo_2_pads.kicad_pcb"
+heavy_modules = ("pandas", "numpy", "pcbnew")
+
+# Runs the CLI then reports which heavy modules ended up imported
+runner = """
+import json, sys
+from kicad_testpoints import cli
+try:
+    cli.gr1.main(sys.argv[1:], standalone_mode=False)
+finally:
+    heavy = {heavy!r}
+    sys.stderr.write(json.dumps([m for m in heavy if m in sys.modules]) + "\\n")
+"""
+
+
+def make_board(directory: Path) -> Path:
+    """
+    Demo board with both pads marked as test points.
+    """
+    text = demo_board.read_text(encoding="utf-8").replace(
+        '(layers "F.Cu" "F.Mask")',
+        '(layers "F.Cu" "F.Mask")\n\t\t\t(property pad_prop_testpoint)',
+    )
+    board = directory / "board.kicad_pcb"
+    board.write_text(text, encoding="utf-8")
+    return board
+
+
+def run(args: list, repeat: int) -> dict:
+    code = runner.format(heavy=heavy_modules)
+    env_path = str(root / "src")
+    times = []
+    imported = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code, *args],  # noqa: S603
+            capture_output=True,
+            text=True,
+            env={"PYTHONPATH": env_path, "PATH": ""},
+            check=False,
+        )
+        times.append(time.perf_counter() - start)
+        lines = result.stderr.strip().splitlines()
+        imported = json.loads(lines[-1]) if lines else None
+    return {
+        "args": args,
+        "median s": statistics.median(times),
+        "min s": min(times),
+        "imported": imported,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        board = make_board(directory)
+        common = ["--pcb", str(board), "--backend", "native", "--no-cache"]
+        cases = {
+            "help": ["--help"],
+            "by-fab-setting csv": [
+                "by-fab-setting",
+                *common,
+                "--out",
+                str(directory / "out.csv"),
+            ],
+            "by-fab-setting xlsx": [
+                "by-fab-setting",
+                *common,
+                "--out",
+                str(directory / "out.xlsx"),
+            ],
+        }
+        results = {name: run(case, args.repeat) for name, case in cases.items()}
+        for result in results.values():
+            result["args"] = [arg.replace(tmp, "<tmp>") for arg in result["args"]]
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+bench_xlsx.py: Compare the streaming xlsx writer with DataFrame.to_excel.
+
+Each writer and size runs in a fresh interpreter so the peak memory of one run
+does not hide the next. The memory reported is how far the peak resident size
+grew over the resident size after building the report. The peak is reset
+before writing on Linux, elsewhere it also includes building the report.
+
+    python -m benchmarks.bench_xlsx --sizes 10000,100000 --out bench-xlsx.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+default_sizes = "10000,100000"
+writers = ("to_excel", "file_io.write")
+nets = 5000
+
+
+def report(size: int):
+    """
+    Report DataFrame shaped like build_test_point_table with size probes.
+    """
+    import numpy as np
+    from kicad_testpoints.pad_table import PadTable
+
+    rng = np.random.default_rng(0)
+    table = {
+        "source ref des": [f"TP{i}" for i in range(size)],
+        "source pad": ["1"] * size,
+        "net": [f"/N{i}" for i in rng.integers(0, nets, size)],
+        "net class": ["Default"] * size,
+        "side": rng.choice(["TOP", "BOTTOM"], size).tolist(),
+        "x": np.round(rng.uniform(0, 300, size), 4).tolist(),
+        "y": np.round(rng.uniform(-200, 0, size), 4).tolist(),
+        "pad type": rng.choice(["SMT", "THRU"], size).tolist(),
+        "footprint side": rng.choice(["TOP", "BOTTOM"], size).tolist(),
+    }
+    return PadTable.from_columns(table).to_dataframe()
+
+
+def reset_peak() -> bool:
+    """
+    Reset the peak resident size on Linux so only the write is measured.
+    """
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_mb() -> float:
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024 / 1e6
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def current_mb() -> float:
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        return int(statm.read_text().split()[1]) * resource.getpagesize() / 1e6
+    return peak_mb()
+
+
+def child(writer: str, size: int, out: str) -> dict:
+    from kicad_testpoints import file_io
+
+    report_df = report(size)
+    gc.collect()
+    reset_peak()
+    before = current_mb()
+    start = time.perf_counter()
+    if writer == "to_excel":
+        report_df.to_excel(out)
+    else:
+        file_io.write(report_df, out)
+    seconds = time.perf_counter() - start
+    return {
+        "rows": size,
+        "writer": writer,
+        "seconds": seconds,
+        "peak growth MB": max(peak_mb() - before, 0.0),
+        "bytes": Path(out).stat().st_size,
+    }
+
+
+def run(writer: str, size: int, directory: Path) -> dict:
+    out = directory / f"{writer}-{size}.xlsx"
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", writer, str(size), out.as_posix()],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default=default_sizes, help="Comma separated row counts"
+    )
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        writer, size, out = args.child
+        sys.stdout.write(json.dumps(child(writer, int(size), out)) + "\n")
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(","):
+            for writer in writers:
+                result = run(writer, int(size), Path(tmp))
+                results.append(result)
+                sys.stderr.write(
+                    f"{result['rows']:>8} {writer:<16} {result['seconds'] * 1e3:10.1f} ms"
+                    f" {result['peak growth MB']:8.1f} MB\n"
+                )
+
+    text = json.dumps(
+        {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
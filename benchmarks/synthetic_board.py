@@ -0,0 +1,182 @@
+"""
+synthetic_board.py: Parametric .kicad_pcb files for benchmarks.
+
+Footprints are placed on a grid with a row of pads each, on both sides and at
+the four right angle rotations. A fraction of the pads has the test point
+fabrication property and some footprints are through hole. Every footprint has
+a courtyard and the board has an Edge.Cuts outline.
+
+    python -m benchmarks.synthetic_board --footprints 2500 --pads 4 --out big.kicad_pcb
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+pad_pitch = 1.27
+row_pitch = 4.0
+margin = 5.0
+
+header = """(kicad_pcb
+\t(version 20240108)
+\t(generator "synthetic_board")
+\t(general (thickness 1.6))
+\t(layers
+\t\t(0 "F.Cu" signal)
+\t\t(31 "B.Cu" signal)
+\t\t(36 "B.SilkS" user "B.Silkscreen")
+\t\t(37 "F.SilkS" user "F.Silkscreen")
+\t\t(38 "B.Mask" user)
+\t\t(39 "F.Mask" user)
+\t\t(44 "Edge.Cuts" user)
+\t\t(46 "B.CrtYd" user "B.Courtyard")
+\t\t(47 "F.CrtYd" user "F.Courtyard")
+\t)
+\t(setup
+\t\t(aux_axis_origin {aux_x} {aux_y})
+\t\t(grid_origin {aux_x} {aux_y})
+\t)
+"""
+
+
+@dataclass
+class Shape:
+    """
+    Pads per footprint, the fractions of test point pads, bottom side and
+    through hole footprints, the net count (a quarter of the pads by default)
+    and the random seed.
+    """
+
+    pads: int = 4
+    testpoint_fraction: float = 0.25
+    bottom_fraction: float = 0.5
+    thru_fraction: float = 0.1
+    nets: int | None = None
+    seed: int = 0
+
+
+def _num(value: float) -> str:
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def _at(x: float, y: float, angle: int) -> str:
+    return f"(at {_num(x)} {_num(y)}{' ' + str(angle) if angle else ''})"
+
+
+def net_name(net: int, nets: int) -> str:
+    # One in ten nets is a power net so net class patterns have something to match
+    return f"/PWR{net}" if net <= max(1, nets // 10) else f"/N{net}"
+
+
+def _pad_kind(at: str, side, thru) -> str:
+    if thru:
+        return (
+            f'thru_hole circle {at} (size 1.7 1.7) (drill 1) (layers "*.Cu" "*.Mask")'
+        )
+    layer = "B" if side else "F"
+    return f'smd rect {at} (size 1 1) (layers "{layer}.Cu" "{layer}.Mask")'
+
+
+def generate(footprints: int, shape: Shape | None = None) -> str:
+    """
+    Text of a board with footprints * shape.pads pads.
+    """
+    shape = shape if shape is not None else Shape()
+    pads = shape.pads
+    rng = random.Random(shape.seed)
+    nets = shape.nets or max(1, footprints * pads // 4)
+    columns = max(1, math.ceil(math.sqrt(footprints)))
+    col_pitch = pads * pad_pitch + 2.0
+    width = columns * col_pitch + 2 * margin
+    height = math.ceil(footprints / columns) * row_pitch + 2 * margin
+    aux = (margin, margin + height)
+
+    parts = [header.format(aux_x=_num(aux[0]), aux_y=_num(aux[1]))]
+    parts.append('\t(net 0 "")\n')
+    parts.extend(
+        f'\t(net {net} "{net_name(net, nets)}")\n' for net in range(1, nets + 1)
+    )
+    parts.append(
+        f"\t(gr_rect (start 0 0) (end {_num(width)} {_num(height)}) "
+        '(stroke (width 0.1) (type default)) (fill none) (layer "Edge.Cuts"))\n'
+    )
+    half = (pads - 1) * pad_pitch / 2
+    for i in range(footprints):
+        side = rng.random() < shape.bottom_fraction
+        thru = rng.random() < shape.thru_fraction
+        angle = rng.choice((0, 90, 180, 270))
+        x = margin + (i % columns + 0.5) * col_pitch
+        y = margin + (i // columns + 0.5) * row_pitch
+        layer = "B" if side else "F"
+        ref_des = f"TP{i + 1}" if i % 2 else f"U{i + 1}"
+        parts.append(
+            f'\t(footprint "Synthetic:Row_1x{pads}" (layer "{layer}.Cu") '
+            f"{_at(x, y, angle)}\n"
+            f'\t\t(property "Reference" "{ref_des}" (at 0 -1.5 0) (layer "{layer}.SilkS"))\n'
+            f"\t\t(fp_rect (start {_num(-half - 1)} -1) (end {_num(half + 1)} 1) "
+            f'(stroke (width 0.05) (type default)) (fill none) (layer "{layer}.CrtYd"))\n'
+        )
+        for pad in range(pads):
+            net = rng.randint(0, nets)
+            testpoint = rng.random() < shape.testpoint_fraction
+            kind = _pad_kind(_at(pad * pad_pitch - half, 0, angle), side, thru)
+            net_text = f' (net {net} "{net_name(net, nets)}")' if net else ""
+            prop = " (property pad_prop_testpoint)" if testpoint else ""
+            parts.append(f'\t\t(pad "{pad + 1}" {kind}{net_text}{prop})\n')
+        parts.append("\t)\n")
+    parts.append(")\n")
+    return "".join(parts)
+
+
+def project() -> dict:
+    """
+    .kicad_pro contents assigning the power nets to a Power net class.
+    """
+    return {
+        "net_settings": {
+            "classes": [{"name": "Default"}, {"name": "Power"}],
+            "netclass_patterns": [{"netclass": "Power", "pattern": "/PWR*"}],
+        }
+    }
+
+
+def write(fname, footprints: int, shape: Shape | None = None) -> Path:
+    """
+    Write the board and a matching .kicad_pro, returns the board path.
+    """
+    path = Path(fname)
+    path.write_text(generate(footprints, shape), encoding="utf-8")
+    path.with_suffix(".kicad_pro").write_text(json.dumps(project()), encoding="utf-8")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--footprints", type=int, required=True)
+    parser.add_argument("--pads", type=int, default=4, help="Pads per footprint")
+    parser.add_argument("--testpoint-fraction", type=float, default=0.25)
+    parser.add_argument("--bottom-fraction", type=float, default=0.5)
+    parser.add_argument("--thru-fraction", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    write(
+        args.out,
+        args.footprints,
+        Shape(
+            pads=args.pads,
+            testpoint_fraction=args.testpoint_fraction,
+            bottom_fraction=args.bottom_fraction,
+            thru_fraction=args.thru_fraction,
+            seed=args.seed,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
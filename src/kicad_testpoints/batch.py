@@ -0,0 +1,166 @@
+"""
+batch.py: Run the report pipelines for many boards from one manifest.
+
+The manifest is a TOML, JSON or CSV file with one entry per board:
+
+    pcb, mode (by-fab-setting or from-spreadsheet), points, out, drill-center,
+    backend, coverage
+
+Relative paths are taken from the manifest directory. Boards are processed in a
+process pool, a failure on one board is recorded and does not stop the others.
+"""
+
+import csv
+import json
+import logging
+import time
+import traceback
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from . import pipeline
+from .cache import ReportCache
+
+_log = logging.getLogger("kicad_testpoints")
+modes = ("by-fab-setting", "from-spreadsheet")
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def _read_entries(fname: Path) -> list[dict]:
+    ext = fname.suffix.strip(".").lower()
+    if ext == "json":
+        with fname.open() as f:
+            data = json.load(f)
+    elif ext == "toml":
+        try:
+            import tomllib
+        except ImportError as e:
+            msg = "TOML manifests need python 3.11 or newer"
+            raise UserWarning(msg) from e
+
+        with fname.open("rb") as f:
+            data = tomllib.load(f)
+    elif ext in ("csv", "txt"):
+        with fname.open(newline="") as f:
+            data = [
+                {key.strip(): value.strip() for key, value in line.items() if key}
+                for line in csv.DictReader(f, skipinitialspace=True)
+            ]
+    else:
+        msg = f"Manifest extension {ext} unsupported"
+        raise UserWarning(msg)
+    if isinstance(data, dict):
+        data = data.get("boards", [])
+    return data
+
+
+def read_manifest(fname: str) -> list[dict]:
+    """
+    Read and validate a manifest, returning one normalized entry per board.
+    """
+    path = Path(fname)
+    root = path.absolute().parent
+    entries = []
+    for i, line in enumerate(_read_entries(path)):
+        entry = {key.replace("_", "-"): value for key, value in line.items()}
+        mode = entry.get("mode") or "by-fab-setting"
+        if mode not in modes:
+            msg = f"Manifest entry {i}: mode {mode} not one of {modes}"
+            raise UserWarning(msg)
+        for key in ("pcb", "out") + (("points",) if mode == "from-spreadsheet" else ()):
+            if not entry.get(key):
+                msg = f"Manifest entry {i}: {key} is required for {mode}"
+                raise UserWarning(msg)
+        entries.append(
+            {
+                "pcb": (root / entry["pcb"]).as_posix(),
+                "mode": mode,
+                "points": (root / entry["points"]).as_posix()
+                if entry.get("points")
+                else None,
+                "out": (root / entry["out"]).as_posix(),
+                "drill-center": _as_bool(entry.get("drill-center", False)),
+                "backend": entry.get("backend") or "auto",
+                "coverage": (root / entry["coverage"]).as_posix()
+                if entry.get("coverage")
+                else None,
+            }
+        )
+    return entries
+
+
+def run_entry(entry: dict, *, use_cache: bool = True) -> dict:
+    """
+    Run one manifest entry, recording a pipeline.report_errors error instead of raising.
+    """
+    start = time.perf_counter()
+    cache = ReportCache() if use_cache else None
+    result = {"pcb": entry["pcb"], "mode": entry["mode"], "out": entry["out"]}
+    options = pipeline.RunOptions(
+        drill_center=entry["drill-center"],
+        backend=entry["backend"],
+        cache=cache,
+        coverage_out=entry.get("coverage"),
+    )
+    try:
+        if entry["mode"] == "from-spreadsheet":
+            summary = pipeline.from_spreadsheet(
+                entry["pcb"], entry["points"], entry["out"], options
+            )
+        else:
+            summary = pipeline.by_fab_setting(entry["pcb"], entry["out"], options)
+        result.update(summary)
+        result["ok"] = True
+        result["error"] = ""
+    except pipeline.report_errors as e:  # Keep the other boards running
+        _log.debug(traceback.format_exc())
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(
+    entries: list[dict], workers: int | None = None, *, use_cache: bool = True
+) -> list[dict]:
+    """
+    Run all entries in a process pool, results are returned in manifest order.
+    A single worker runs in this process.
+    """
+    if workers == 1 or len(entries) <= 1:
+        return [run_entry(entry, use_cache=use_cache) for entry in entries]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_entry, entry, use_cache=use_cache) for entry in entries
+        ]
+        results.extend(
+            _result(entry, future)
+            for entry, future in zip(entries, futures, strict=True)
+        )
+    return results
+
+
+def _result(entry: dict, future: Future) -> dict:
+    """
+    Result of a pooled entry, or an error result if its worker died.
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool as e:  # e.g. a crash in pcbnew
+        return {
+            "pcb": entry["pcb"],
+            "mode": entry["mode"],
+            "out": entry["out"],
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": 0.0,
+        }
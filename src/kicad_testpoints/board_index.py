@@ -0,0 +1,71 @@
+"""
+board_index.py: Lookup tables for the pads of a board built in one pass.
+
+Works with a board from pcbnew.LoadBoard or the native kicad_pcb_parser backend.
+"""
+
+from collections import defaultdict
+
+
+class BoardIndex:
+    """
+    Hash maps from ref des & pad number, net, net class and pad property to pads.
+    Where a footprint has several pads with the same number the first is used.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.pads = []
+        self.by_ref_pad = {}
+        self.pad_numbers = defaultdict(list)
+        self.by_net = defaultdict(list)
+        self.by_property = defaultdict(list)
+        self.net_names = set(board.GetNetsByName())
+
+        for fp in board.GetFootprints():
+            ref_des = fp.GetReferenceAsString()
+            numbers = self.pad_numbers[ref_des]
+            for pad in fp.Pads():
+                number = str(pad.GetNumber())
+                self.pads.append(pad)
+                numbers.append(number)
+                self.by_ref_pad.setdefault((ref_des, number), pad)
+                self.by_net[pad.GetNetname()].append(pad)
+                self.by_property[pad.GetProperty()].append(pad)
+
+        # Net class is a property of the net so only look it up once per net
+        self.net_class = {
+            net: pads[0].GetNetClassName() for net, pads in self.by_net.items()
+        }
+        self.by_net_class = defaultdict(list)
+        for net, pads in self.by_net.items():
+            self.by_net_class[self.net_class[net]].extend(pads)
+
+    def __len__(self):
+        return len(self.pads)
+
+    def find_pad(self, ref_des: str, pad_number):
+        """
+        Pad from the ref des and pad number, raises UserWarning if missing.
+        """
+        pad = self.by_ref_pad.get((ref_des, str(pad_number)))
+        if pad is not None:
+            return pad
+        if ref_des not in self.pad_numbers:
+            msg = f"Ref Des {ref_des} not found"
+            raise UserWarning(msg)
+        nums = self.pad_numbers[ref_des]
+        msg = f"Pad {pad_number} not found in module {ref_des} ({nums})"
+        raise UserWarning(msg)
+
+    def pads_with_property(self, prop: int) -> list:
+        """
+        All pads with the fabrication property set, in board order.
+        """
+        return list(self.by_property.get(prop, ()))
+
+    def pads_on_net(self, net: str) -> list:
+        return list(self.by_net.get(net, ()))
+
+    def pads_in_net_class(self, net_class: str) -> list:
+        return list(self.by_net_class.get(net_class, ()))
@@ -0,0 +1,160 @@
+"""
+cache.py: Content addressed on-disk cache of extracted report tables.
+
+Entries are keyed by the hash of the board and project file contents, the
+Settings values, the pad selection, the backend and the tool version. Tables are stored as
+compressed numpy archives without pickling, numpy is only imported on a hit or
+a store. The least recently used entries are removed when the cache grows past
+its size limit.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+from . import __version__
+from .kicad_testpoints import resolve_backend
+
+_log = logging.getLogger("kicad_testpoints")
+
+default_max_bytes = 256 * 1024 * 1024
+
+# Bump when the stored table or metadata changes
+cache_format = 2
+
+
+def default_directory() -> Path:
+    """
+    KICAD_TESTPOINTS_CACHE if set, otherwise the user cache directory.
+    """
+    directory = os.environ.get("KICAD_TESTPOINTS_CACHE")
+    if directory:
+        return Path(directory)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "kicad_testpoints"
+
+
+def hash_file(fname, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with Path(fname).open("rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """
+    Directory of cached report tables, see module docstring.
+    """
+
+    def __init__(self, directory=None, max_bytes: int = default_max_bytes):
+        self.directory = Path(directory) if directory else default_directory()
+        self.max_bytes = max_bytes
+
+    def key(self, pcb, settings, selection: str, backend: str = "auto") -> str:
+        """
+        Key from the board contents and everything else that changes the table.
+        The .kicad_pro next to the board holds the net class assignments.
+        """
+        digest = hashlib.sha256()
+        digest.update(hash_file(pcb).encode())
+        project = Path(pcb).with_suffix(".kicad_pro")
+        fields = {
+            "project": hash_file(project) if project.exists() else None,
+            "settings": dataclasses.asdict(settings),
+            "selection": selection,
+            "backend": resolve_backend(backend),
+            "version": __version__,
+            "format": cache_format,
+        }
+        digest.update(json.dumps(fields, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str):
+        """
+        Return (table, metadata) or None on a miss. Unreadable entries are
+        removed and count as a miss.
+        """
+        path = self.path(key)
+        if not path.exists():
+            return None
+        import numpy as np
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = data["__columns__"].tolist()
+                table = {
+                    column: data[f"column_{i}"].tolist()
+                    for i, column in enumerate(columns)
+                }
+                meta = json.loads(str(data["__meta__"]))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            _log.debug("Removing unreadable cache entry %s", key)
+            path.unlink(missing_ok=True)
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        _log.debug("Cache hit %s", key)
+        return table, meta
+
+    def put(self, key: str, table: dict, meta: dict) -> None:
+        """
+        Store a table atomically, then evict old entries if over the size limit.
+        """
+        import numpy as np
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        arrays = {"__columns__": np.array(list(table), dtype=str)}
+        for i, values in enumerate(table.values()):
+            arrays[f"column_{i}"] = np.asarray(values)
+        arrays["__meta__"] = np.array(json.dumps(meta))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            Path(tmp).replace(self.path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def entries(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*.npz"))
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.entries())
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until under the size limit.
+        Returns the number of removed entries.
+        """
+        entries = sorted(
+            ((path.stat(), path) for path in self.entries()),
+            key=lambda e: e[0].st_mtime,
+        )
+        total = sum(stat.st_size for stat, _ in entries)
+        removed = 0
+        for stat, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        entries = self.entries()
+        for path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
@@ -0,0 +1,504 @@
+"""
+clearance.py: Probe clearance to the board edge, courtyards and mounting holes.
+
+The obstacles are read from the .kicad_pcb file: Edge.Cuts lines, arcs, circles
+and polygons as segments, the courtyard bounding box of each footprint on each
+side, and non plated or mounting hole pads as circles. Each kind goes into a
+packed R-tree and all report pads are queried at once, distances are then
+computed for the candidate pairs with numpy.
+
+Surface pads are probed from their footprint's side, through hole pads from the
+report side. Courtyards only block probes on their own side and a pad's own
+footprint is ignored.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import kicad_pcb_parser
+from .kicad_pcb_parser import child
+from .kicad_pcb_parser import children
+from .packed_rtree import PackedRTree
+from .transform import require_default_frame
+
+_log = logging.getLogger("kicad_testpoints")
+
+_graphics = ("line", "rect", "circle", "arc", "poly")
+_kinds = ("edge", "courtyard", "hole")
+# Segments used for circles and arcs
+circle_segments = 32
+# Smaller arc determinants are treated as a straight line
+_collinear = 1e-12
+
+_keep = {
+    "kicad_pcb": {
+        "setup",
+        "footprint",
+        "module",
+        *(f"gr_{kind}" for kind in _graphics),
+    },
+    "setup": {"aux_axis_origin"},
+    "footprint": {
+        "layer",
+        "at",
+        "property",
+        "fp_text",
+        "pad",
+        *(f"fp_{kind}" for kind in _graphics),
+    },
+    "pad": {"at", "size", "drill", "layers"},
+    "pts": {"xy"},
+}
+_keep["module"] = _keep["footprint"]
+for _kind in _graphics:
+    _keep[f"gr_{_kind}"] = _keep[f"fp_{_kind}"] = {
+        "start",
+        "end",
+        "mid",
+        "center",
+        "pts",
+        "layer",
+    }
+_keep_all = {
+    "at",
+    "size",
+    "drill",
+    "layers",
+    "layer",
+    "start",
+    "end",
+    "mid",
+    "center",
+    "xy",
+}
+
+
+@dataclass
+class Rules:
+    """
+    Minimum distance in mm from a probe center to each kind of obstacle.
+    """
+
+    edge: float = 3.0
+    courtyard: float = 1.0
+    hole: float = 2.0
+
+
+@dataclass
+class Geometry:
+    """
+    Obstacles in board coordinates (mm, y down).
+    edges are x1, y1, x2, y2 segments, courtyards xmin, ymin, xmax, ymax boxes
+    and holes x, y, radius circles.
+    """
+
+    edges: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))
+    courtyards: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))
+    courtyard_ref_des: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=object)
+    )
+    courtyard_side: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=object)
+    )
+    holes: np.ndarray = field(default_factory=lambda: np.empty((0, 3)))
+    hole_ref_des: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    aux_origin: tuple[float, float] = (0.0, 0.0)
+
+
+def _xy(node) -> tuple[float, float]:
+    return float(node[1]), float(node[2])
+
+
+def _arc(start, mid, end) -> list[tuple[float, float]]:
+    """
+    Polyline through an arc given by three points.
+    """
+    (ax, ay), (bx, by), (cx, cy) = start, mid, end
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < _collinear:
+        return [start, end]
+    ux = (
+        (ax**2 + ay**2) * (by - cy)
+        + (bx**2 + by**2) * (cy - ay)
+        + (cx**2 + cy**2) * (ay - by)
+    ) / d
+    uy = (
+        (ax**2 + ay**2) * (cx - bx)
+        + (bx**2 + by**2) * (ax - cx)
+        + (cx**2 + cy**2) * (bx - ax)
+    ) / d
+    radius = math.hypot(ax - ux, ay - uy)
+    a0 = math.atan2(ay - uy, ax - ux)
+    am = math.atan2(by - uy, bx - ux)
+    a1 = math.atan2(cy - uy, cx - ux)
+    sweep = (a1 - a0) % (2 * math.pi)
+    # Go the way that passes the mid point
+    if (am - a0) % (2 * math.pi) > sweep:
+        sweep -= 2 * math.pi
+    steps = max(2, math.ceil(abs(sweep) / (2 * math.pi) * circle_segments))
+    return [
+        (
+            ux + radius * math.cos(a0 + sweep * i / steps),
+            uy + radius * math.sin(a0 + sweep * i / steps),
+        )
+        for i in range(steps + 1)
+    ]
+
+
+def _line(node) -> list[tuple[float, float]]:
+    start, end = child(node, "start"), child(node, "end")
+    return [_xy(start), _xy(end)] if start and end else []
+
+
+def _rect(node) -> list[tuple[float, float]]:
+    start, end = child(node, "start"), child(node, "end")
+    if not (start and end):
+        return []
+    (x0, y0), (x1, y1) = _xy(start), _xy(end)
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]
+
+
+def _circle(node) -> list[tuple[float, float]]:
+    center, end = child(node, "center"), child(node, "end")
+    if not (center and end):
+        return []
+    (cx, cy), (ex, ey) = _xy(center), _xy(end)
+    radius = math.hypot(ex - cx, ey - cy)
+    return [
+        (
+            cx + radius * math.cos(2 * math.pi * i / circle_segments),
+            cy + radius * math.sin(2 * math.pi * i / circle_segments),
+        )
+        for i in range(circle_segments + 1)
+    ]
+
+
+def _arc_node(node) -> list[tuple[float, float]]:
+    start, mid, end = child(node, "start"), child(node, "mid"), child(node, "end")
+    if not (start and end):
+        return []
+    if mid:
+        return _arc(_xy(start), _xy(mid), _xy(end))
+    return [_xy(start), _xy(end)]
+
+
+def _poly(node) -> list[tuple[float, float]]:
+    pts = child(node, "pts")
+    points = [_xy(xy) for xy in children(pts, "xy")] if pts else []
+    return [*points, points[0]] if points else []
+
+
+# Outline of each kind of graphic item, closed shapes end on their start
+_outlines = {
+    "line": _line,
+    "rect": _rect,
+    "circle": _circle,
+    "arc": _arc_node,
+    "poly": _poly,
+}
+
+
+def _polyline(node) -> list[tuple[float, float]]:
+    """
+    Outline of a graphic item as a list of points, closed shapes end on their start.
+    """
+    outline = _outlines.get(node[0].split("_", 1)[1])
+    return outline(node) if outline else []
+
+
+def _layer(node) -> str:
+    layer = child(node, "layer")
+    return layer[1] if layer else ""
+
+
+def _transform(points, x: float, y: float, angle: float) -> list[tuple[float, float]]:
+    """
+    Footprint local points to board coordinates, rotated like KiCad's RotatePoint.
+    """
+    rad = math.radians(angle)
+    cos, sin = math.cos(rad), math.sin(rad)
+    return [(x + px * cos + py * sin, y + py * cos - px * sin) for px, py in points]
+
+
+def _segments(points) -> list[tuple[float, float, float, float]]:
+    return [(*a, *b) for a, b in itertools.pairwise(points)]
+
+
+def _reference(node) -> str:
+    for item in node[1:]:
+        if isinstance(item, list) and item[0] in ("property", "fp_text"):
+            _, *fields = item
+            if fields[:1] in (["Reference"], ["reference"]) and fields[1:]:
+                return fields[1]
+    return ""
+
+
+@dataclass
+class _Footprint:
+    """
+    Obstacles of one footprint in board coordinates.
+    """
+
+    edges: list = field(default_factory=list)
+    # Courtyard points by layer
+    courtyards: dict = field(default_factory=dict)
+    holes: list = field(default_factory=list)
+
+
+def _footprint(entry) -> _Footprint:
+    _, x, y, *angle = child(entry, "at") or ("at", "0", "0")
+    x, y, angle = float(x), float(y), float(angle[0]) if angle else 0.0
+    fpid = entry[1] if isinstance(entry[1], str) else ""
+    result = _Footprint()
+    for item in entry[1:]:
+        if not isinstance(item, list) or not item[0].startswith("fp_"):
+            continue
+        layer = _layer(item)
+        if layer not in ("Edge.Cuts", "F.CrtYd", "B.CrtYd"):
+            continue
+        points = _transform(_polyline(item), x, y, angle)
+        if layer == "Edge.Cuts":
+            result.edges.extend(_segments(points))
+        elif points:
+            result.courtyards.setdefault(layer, []).extend(points)
+    for pad in children(entry, "pad"):
+        if pad[2] != "np_thru_hole" and "MountingHole" not in fpid:
+            continue
+        drill, size = child(pad, "drill"), child(pad, "size")
+        sizes = [
+            float(v) for node in (drill, size) if node for v in node[1:] if v != "oval"
+        ]
+        if sizes:
+            ((hx, hy),) = _transform([_xy(child(pad, "at"))], x, y, angle)
+            result.holes.append((hx, hy, max(sizes) / 2))
+    return result
+
+
+def read_geometry(fname) -> Geometry:
+    """
+    Stream the obstacles used by the clearance check from a kicad_pcb file.
+    """
+    edges = []
+    courtyards, courtyard_ref_des, courtyard_side = [], [], []
+    holes, hole_ref_des = [], []
+    aux_origin = (0.0, 0.0)
+    with Path(fname).open(encoding="utf-8") as f:
+        for entry in kicad_pcb_parser.iter_sexpr(f, keep=_keep, keep_all=_keep_all):
+            head = entry[0]
+            if head == "setup":
+                node = child(entry, "aux_axis_origin")
+                if node is not None:
+                    aux_origin = _xy(node)
+            elif head.startswith("gr_"):
+                if _layer(entry) == "Edge.Cuts":
+                    edges.extend(_segments(_polyline(entry)))
+            elif head in ("footprint", "module"):
+                ref_des = _reference(entry)
+                footprint = _footprint(entry)
+                edges.extend(footprint.edges)
+                for layer, points in footprint.courtyards.items():
+                    xs, ys = zip(*points, strict=True)
+                    courtyards.append((min(xs), min(ys), max(xs), max(ys)))
+                    courtyard_ref_des.append(ref_des)
+                    courtyard_side.append("TOP" if layer == "F.CrtYd" else "BOTTOM")
+                holes.extend(footprint.holes)
+                hole_ref_des.extend([ref_des] * len(footprint.holes))
+    return Geometry(
+        edges=np.array(edges, dtype=float).reshape(-1, 4),
+        courtyards=np.array(courtyards, dtype=float).reshape(-1, 4),
+        courtyard_ref_des=np.array(courtyard_ref_des, dtype=object),
+        courtyard_side=np.array(courtyard_side, dtype=object),
+        holes=np.array(holes, dtype=float).reshape(-1, 3),
+        hole_ref_des=np.array(hole_ref_des, dtype=object),
+        aux_origin=aux_origin,
+    )
+
+
+def parse_rule(value: str, default: float) -> dict[str, float]:
+    """
+    Per side clearance from "1.5" for both sides or "TOP=1,BOTTOM=2".
+    """
+    rule = {"TOP": default, "BOTTOM": default}
+    if value is None or value == "":
+        return rule
+    for part in str(value).split(","):
+        side, sep, number = part.partition("=")
+        if not sep:
+            rule = dict.fromkeys(rule, float(side))
+            continue
+        side = side.strip().upper()
+        if side not in rule:
+            msg = f"Unknown side {side} in clearance rule {value}"
+            raise UserWarning(msg)
+        rule[side] = float(number)
+    return rule
+
+
+def make_rules(edge=None, courtyard=None, hole=None) -> dict[str, Rules]:
+    """
+    Rules for each side from rule strings, see parse_rule.
+    """
+    defaults = Rules()
+    values = {
+        "edge": parse_rule(edge, defaults.edge),
+        "courtyard": parse_rule(courtyard, defaults.courtyard),
+        "hole": parse_rule(hole, defaults.hole),
+    }
+    return {
+        side: Rules(**{kind: values[kind][side] for kind in _kinds})
+        for side in ("TOP", "BOTTOM")
+    }
+
+
+def probe_sides(report_df: pd.DataFrame) -> np.ndarray:
+    """
+    Fixture side each probe reaches its pad from. Surface pads are on their
+    footprint's side, through hole pads use the report side.
+    """
+    thru = report_df["pad type"].astype(str).to_numpy() == "THRU"
+    return np.where(
+        thru,
+        report_df["side"].astype(str).to_numpy(),
+        report_df["footprint side"].astype(str).to_numpy(),
+    )
+
+
+def _segment_distance(px, py, segments) -> np.ndarray:
+    x1, y1, x2, y2 = segments.T
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = np.where(
+        length > 0,
+        ((px - x1) * dx + (py - y1) * dy) / np.where(length > 0, length, 1),
+        0,
+    )
+    t = np.clip(t, 0, 1)
+    return np.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def _box_distance(px, py, boxes) -> np.ndarray:
+    dx = np.maximum(np.maximum(boxes[:, 0] - px, px - boxes[:, 2]), 0)
+    dy = np.maximum(np.maximum(boxes[:, 1] - py, py - boxes[:, 3]), 0)
+    return np.hypot(dx, dy)
+
+
+def _nearest(
+    n: int, query: np.ndarray, distance: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Smallest distance per query (NaN if none) and the pair index it came from.
+    """
+    nearest = np.full(n, np.nan)
+    pair = np.full(n, -1, dtype=np.int64)
+    if len(query) == 0:
+        return nearest, pair
+    order = np.lexsort((distance, query))
+    first = order[np.unique(query[order], return_index=True)[1]]
+    nearest[query[first]] = distance[first]
+    pair[query[first]] = first
+    return nearest, pair
+
+
+def check(
+    report_df: pd.DataFrame,
+    geometry: Geometry,
+    rules: dict[str, Rules] | Rules | None = None,
+    *,
+    drill_center: bool = False,
+) -> pd.DataFrame:
+    """
+    Copy of the report with the distance to the nearest edge, courtyard and hole
+    within the clearance of each probe (NaN if there is none), the courtyard's
+    ref des and a clearance violation column listing the broken rules.
+    Set drill_center if the report positions are relative to the aux origin.
+    """
+    require_default_frame(report_df, "check-clearance")
+    if rules is None:
+        rules = Rules()
+    if isinstance(rules, Rules):
+        rules = {"TOP": rules, "BOTTOM": rules}
+    df = report_df.copy()
+    n = len(df)
+    ox, oy = geometry.aux_origin if drill_center else (0.0, 0.0)
+    px = df["x"].to_numpy(dtype=float) + ox
+    py = oy - df["y"].to_numpy(dtype=float)
+    side = probe_sides(df)
+    ref_des = df["source ref des"].astype(str).to_numpy()
+
+    limits = {}
+    for kind in _kinds:
+        limit = np.full(n, getattr(Rules(), kind))
+        for name, rule in rules.items():
+            limit[side == name] = getattr(rule, kind)
+        limits[kind] = limit
+
+    edges = geometry.edges
+    xs, ys = edges[:, [0, 2]], edges[:, [1, 3]]
+    tree = PackedRTree(np.column_stack((xs.min(1), ys.min(1), xs.max(1), ys.max(1))))
+    query, item = tree.query_radius(px, py, limits["edge"])
+    edge, _ = _nearest(n, query, _segment_distance(px[query], py[query], edges[item]))
+
+    tree = PackedRTree(geometry.courtyards)
+    query, item = tree.query_radius(px, py, limits["courtyard"])
+    keep = (geometry.courtyard_side[item] == side[query]) & (
+        geometry.courtyard_ref_des[item] != ref_des[query]
+    )
+    query, item = query[keep], item[keep]
+    courtyard, pair = _nearest(
+        n, query, _box_distance(px[query], py[query], geometry.courtyards[item])
+    )
+    courtyard_ref_des = np.full(n, "", dtype=object)
+    found = pair >= 0
+    courtyard_ref_des[found] = geometry.courtyard_ref_des[item[pair[found]]]
+
+    holes = geometry.holes
+    tree = PackedRTree(
+        np.column_stack((holes[:, :2] - holes[:, 2:], holes[:, :2] + holes[:, 2:]))
+    )
+    query, item = tree.query_radius(px, py, limits["hole"])
+    keep = geometry.hole_ref_des[item] != ref_des[query]
+    query, item = query[keep], item[keep]
+    distance = np.maximum(
+        np.hypot(px[query] - holes[item, 0], py[query] - holes[item, 1])
+        - holes[item, 2],
+        0,
+    )
+    hole, _ = _nearest(n, query, distance)
+
+    df["edge distance"] = np.round(edge, 4)
+    df["courtyard distance"] = np.round(courtyard, 4)
+    df["courtyard ref des"] = courtyard_ref_des
+    df["hole distance"] = np.round(hole, 4)
+    violation = pd.Series("", index=df.index)
+    for kind, distance in (("edge", edge), ("courtyard", courtyard), ("hole", hole)):
+        broken = pd.Series(distance < limits[kind], index=df.index)
+        violation = violation.where(~broken, violation + "," + kind)
+    df["clearance violation"] = violation.str.lstrip(",")
+    return df
+
+
+def log_violations(checked_df: pd.DataFrame) -> int:
+    """
+    Log each probe with a violation, returns the count.
+    """
+    bad = checked_df[checked_df["clearance violation"] != ""]
+    for ref_des, pad, violation in zip(
+        bad["source ref des"],
+        bad["source pad"],
+        bad["clearance violation"],
+        strict=True,
+    ):
+        _log.warning(
+            "%s:%s too close to %s", ref_des, pad, violation.replace(",", ", ")
+        )
+    _log.info("%d / %d probes break a clearance rule", len(bad), len(checked_df))
+    return len(bad)
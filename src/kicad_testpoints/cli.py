@@ -1,14 +1,16 @@
-"""Console script for kicad_testpoints."""
+"""Console script for kicad_testpoints.
 
+Only click and the pcbnew-free core are imported at start up, pandas, numpy and
+pcbnew are imported by the commands that use them so --help and --version stay fast.
+"""
+
+import contextlib
 import logging
 import sys
 from pathlib import Path
 
 import click
-import pandas as pd
-import pcbnew
 
-from . import file_io
 from . import kicad_testpoints
 
 _log = logging.getLogger("kicad_testpoints")
@@ -25,90 +27,981 @@ def gr1(debug):
     return 0
 
 
+def _check_watch_options(**given):
+    """
+    Raise click.UsageError for the given options, they do nothing with --watch.
+    """
+    names = [f"--{name.replace('_', '-')}" for name, value in given.items() if value]
+    if names:
+        msg = f"--watch can not be used with {', '.join(names)}"
+        raise click.UsageError(msg)
+
+
+def _watch(board_path, out, options, points=None):
+    if len(out) > 1:
+        _log.error("--watch writes a single --out")
+        return sys.exit(1)
+    out = out[0]
+    if options.backend == "pcbnew":
+        _log.error("--watch re-reads the changed footprints with the native backend")
+        return sys.exit(1)
+    from . import watch as watch_mode
+
+    report = watch_mode.IncrementalReport(
+        board_path,
+        drill_center=options.drill_center,
+        points=points,
+        settings=options.settings,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        watch_mode.watch_report(report, out)
+    return sys.exit(0)
+
+
+def _transform_options(command):
+    options = (
+        click.option(
+            "--origin",
+            type=click.Choice(("page", "aux", "grid", "custom")),
+            default="page",
+            show_default=True,
+            help="Coordinate origin, aux is the drill/place file origin (same as --drill-center)",
+        ),
+        click.option(
+            "--custom-origin",
+            type=str,
+            default=None,
+            help='Origin for --origin custom in mm, "x,y"',
+        ),
+        click.option(
+            "--units",
+            type=click.Choice(("mm", "inch", "mils")),
+            default="mm",
+            show_default=True,
+            help="Output units",
+        ),
+        click.option(
+            "--rotation",
+            type=float,
+            default=0.0,
+            show_default=True,
+            help="Rotate the board frame counter clockwise in degrees",
+        ),
+        click.option(
+            "--mirror-bottom",
+            is_flag=True,
+            help="Mirror bottom side probes as seen from below",
+        ),
+    )
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _settings(origin, custom_origin, units, rotation, mirror_bottom):
+    if origin == "custom" and custom_origin is None:
+        msg = "--origin custom needs --custom-origin"
+        raise UserWarning(msg)
+    if origin != "custom" and custom_origin is not None:
+        msg = f"--custom-origin needs --origin custom, got --origin {origin}"
+        raise UserWarning(msg)
+    try:
+        x, y = (float(value) for value in (custom_origin or "0,0").split(","))
+    except ValueError as e:
+        msg = f'--custom-origin should be "x,y", got {custom_origin}'
+        raise UserWarning(msg) from e
+    return kicad_testpoints.Settings(
+        origin=origin,
+        custom_origin=(x, y),
+        units=units,
+        rotation=rotation,
+        mirror_bottom=mirror_bottom,
+    )
+
+
+def _pad_filter_options(command):
+    options = (
+        click.option(
+            "--side",
+            type=click.Choice(("TOP", "BOTTOM")),
+            default=None,
+            help="Only pads on this side",
+        ),
+        click.option(
+            "--net-class",
+            type=str,
+            multiple=True,
+            help="Only pads in this net class, repeatable. Prefix with ! to exclude a class instead",
+        ),
+        click.option(
+            "--net-regex", type=str, default=None, help="Only nets matching this regex"
+        ),
+        click.option(
+            "--pad-type",
+            type=click.Choice(("SMT", "THRU")),
+            default=None,
+            help="Only this pad type",
+        ),
+        click.option(
+            "--ref-des-glob",
+            type=str,
+            multiple=True,
+            help="Only footprints matching this ref des pattern (e.g. TP*), repeatable",
+        ),
+    )
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _pad_filter(side, net_class, net_regex, pad_type, ref_des_glob):
+    from .pad_filter import PadFilter
+
+    return PadFilter(
+        side=side,
+        net_classes=tuple(net_class),
+        net_regex=net_regex,
+        pad_type=pad_type,
+        ref_des_globs=tuple(ref_des_glob),
+    )
+
+
+def _report_metrics(metrics, profile, metrics_json):
+    if profile:
+        metrics.log_summary()
+    if metrics_json:
+        metrics.write_json(metrics_json)
+        _log.info("Metrics saved to: %s", metrics_json)
+
+
+def _run(run, metrics, profile, metrics_json):
+    """
+    Run a pipeline, logging a UserWarning as the error and exiting with the status.
+    """
+    try:
+        run()
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    finally:
+        _report_metrics(metrics, profile, metrics_json)
+    return sys.exit(0)
+
+
 @gr1.command(
     help="Takes a PCB & configuration data in mm, sets rotation and location on a new pcb"
 )
-@click.option("--pcb", type=str, required=True, help="Source PCB file")
+@click.option(
+    "--pcb",
+    type=str,
+    required=False,
+    help="Source PCB file, leave out when the points have a board (or pcb) column",
+)
 @click.option(
     "--points", type=str, required=True, help="Spreadsheet configuration file"
 )
-@click.option("--out", type=str, required=False, help="Output spreadsheet")
+@click.option(
+    "--out",
+    type=str,
+    multiple=True,
+    required=False,
+    help="Output spreadsheet, repeat to write several formats",
+)
 @click.option(
     "--drill-center", is_flag=True, help="Use drill/file center as reference coordinate"
 )
 @click.option("--inplace", is_flag=True, help="Edit probe spreadsheet inplace")
-def from_spreadsheet(pcb, points, out, drill_center, inplace):
+@click.option(
+    "--backend",
+    type=click.Choice(kicad_testpoints.backends),
+    default="auto",
+    show_default=True,
+    help="Board reader, native streams the file without needing pcbnew",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always reload the board, do not read or write the cache",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and regenerate the report each time the inputs are saved",
+)
+@click.option(
+    "--coverage",
+    "coverage_out",
+    type=str,
+    required=False,
+    help="Write net coverage tables, one sheet each for nets, net classes and sides",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Log the time, peak memory and item count of each stage",
+)
+@click.option(
+    "--metrics-json",
+    type=str,
+    required=False,
+    help="Write the stage metrics to a JSON file",
+)
+@click.option(
+    "--cprofile",
+    "cprofile_out",
+    type=str,
+    required=False,
+    help="Save a cProfile of the board extraction to this file",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Worker processes for a multi board points spreadsheet, defaults to the CPU count",
+)
+@_pad_filter_options
+@_transform_options
+def from_spreadsheet(  # noqa: PLR0913
+    pcb,
+    points,
+    out,
+    drill_center,
+    inplace,
+    backend,
+    no_cache,
+    watch,
+    coverage_out,
+    profile,
+    metrics_json,
+    cprofile_out,
+    workers,
+    side,
+    net_class,
+    net_regex,
+    pad_type,
+    ref_des_glob,
+    origin,
+    custom_origin,
+    units,
+    rotation,
+    mirror_bottom,
+):
     if inplace:
-        out = points
-    elif out is None:
+        out = (points,)
+    elif not out:
         msg = "Either the inplace flag needs to be set or the --out option set"
         _log.error(msg)
         return sys.exit(1)
 
+    from . import pipeline
+    from .cache import ReportCache
+    from .metrics import Metrics
+
+    try:
+        options = pipeline.RunOptions(
+            drill_center=drill_center,
+            backend=backend,
+            cache=None if no_cache else ReportCache(),
+            coverage_out=coverage_out,
+            pad_filter=_pad_filter(side, net_class, net_regex, pad_type, ref_des_glob),
+            settings=_settings(origin, custom_origin, units, rotation, mirror_bottom),
+            workers=workers,
+        )
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    if watch:
+        _check_watch_options(
+            coverage=coverage_out,
+            profile=profile,
+            metrics_json=metrics_json,
+            cprofile=cprofile_out,
+        )
+    if watch and (pcb is None or inplace or options.pad_filter):
+        _log.error(
+            "--watch needs --pcb and can not be used with --inplace or the pad filters"
+        )
+        return sys.exit(1)
+    metrics = Metrics(profile_out=cprofile_out)
+    if pcb is None:
+        return _run(
+            lambda: pipeline.from_boards_spreadsheet(points, out, options, metrics),
+            metrics,
+            profile,
+            metrics_json,
+        )
+
     board_path = Path(pcb).absolute()
     assert board_path.exists()
     print(board_path)
-    board = pcbnew.LoadBoard(board_path.as_posix())
-    points_df = file_io.read_file_to_df(points)
-    pads = kicad_testpoints.get_pads(
-        (
-            (line["source ref des"], (line["source pad"]))
-            for _, line in points_df.iterrows()
-        ),
-        board,
+    if watch:
+        return _watch(board_path, out, options, points=points)
+    return _run(
+        lambda: pipeline.from_spreadsheet(board_path, points, out, options, metrics),
+        metrics,
+        profile,
+        metrics_json,
     )
 
-    settings = kicad_testpoints.Settings()
-    settings.use_aux_origin = drill_center
 
-    report = kicad_testpoints.build_test_point_report(board, settings, pads)
-    report_df = pd.DataFrame(report)
-    # kicad_testpoints.write_csv(report, Path(out))
+@gr1.command(
+    help="Pull out the position and net for all pads with a test point property set."
+)
+@click.option("--pcb", type=str, required=True, help="Source PCB file")
+@click.option(
+    "--out",
+    type=str,
+    multiple=True,
+    required=True,
+    help="Output spreadsheet, repeat to write several formats",
+)
+@click.option(
+    "--drill-center", is_flag=True, help="Use drill/file center as reference coordinate"
+)
+@click.option(
+    "--backend",
+    type=click.Choice(kicad_testpoints.backends),
+    default="auto",
+    show_default=True,
+    help="Board reader, native streams the file without needing pcbnew",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always reload the board, do not read or write the cache",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and regenerate the report each time the inputs are saved",
+)
+@click.option(
+    "--coverage",
+    "coverage_out",
+    type=str,
+    required=False,
+    help="Write net coverage tables, one sheet each for nets, net classes and sides",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Log the time, peak memory and item count of each stage",
+)
+@click.option(
+    "--metrics-json",
+    type=str,
+    required=False,
+    help="Write the stage metrics to a JSON file",
+)
+@click.option(
+    "--cprofile",
+    "cprofile_out",
+    type=str,
+    required=False,
+    help="Save a cProfile of the board extraction to this file",
+)
+@_pad_filter_options
+@_transform_options
+def by_fab_setting(  # noqa: PLR0913
+    pcb,
+    out,
+    drill_center,
+    backend,
+    no_cache,
+    watch,
+    coverage_out,
+    profile,
+    metrics_json,
+    cprofile_out,
+    side,
+    net_class,
+    net_regex,
+    pad_type,
+    ref_des_glob,
+    origin,
+    custom_origin,
+    units,
+    rotation,
+    mirror_bottom,
+):
+    board_path = Path(pcb).absolute()
+    assert board_path.exists()
+    print(board_path)
+    from . import pipeline
+    from .cache import ReportCache
+    from .metrics import Metrics
+
+    try:
+        options = pipeline.RunOptions(
+            drill_center=drill_center,
+            backend=backend,
+            cache=None if no_cache else ReportCache(),
+            coverage_out=coverage_out,
+            pad_filter=_pad_filter(side, net_class, net_regex, pad_type, ref_des_glob),
+            settings=_settings(origin, custom_origin, units, rotation, mirror_bottom),
+        )
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    if watch:
+        _check_watch_options(
+            coverage=coverage_out,
+            profile=profile,
+            metrics_json=metrics_json,
+            cprofile=cprofile_out,
+        )
+        if options.pad_filter:
+            _log.error("--watch can not be used with the pad filters")
+            return sys.exit(1)
+        return _watch(board_path, out, options)
+
+    metrics = Metrics(profile_out=cprofile_out)
+    try:
+        pipeline.by_fab_setting(board_path, out, options, metrics)
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    finally:
+        _report_metrics(metrics, profile, metrics_json)
+    return sys.exit(0)
 
-    nets = set(board.GetNetsByName())
-    tp_nets = report_df["net"].unique()
 
-    _log.info("Coverage: %d / %d nets. Saved to: %s", len(tp_nets), len(nets), out)
+@gr1.command(help="Test point report from an IPC-D-356 netlist, no board file needed.")
+@click.option("--netlist", type=str, required=True, help="IPC-D-356 netlist")
+@click.option(
+    "--out",
+    type=str,
+    multiple=True,
+    required=True,
+    help="Output spreadsheet, repeat to write several formats",
+)
+@click.option(
+    "--points",
+    type=str,
+    required=False,
+    help="Only the pads listed in this points spreadsheet",
+)
+@click.option("--include-vias", is_flag=True, help="Report vias as well as pads")
+@click.option(
+    "--origin",
+    type=str,
+    default="0,0",
+    show_default=True,
+    help='Report origin in the netlist coordinates in mm, "x,y"',
+)
+@click.option(
+    "--units",
+    type=click.Choice(("mm", "inch", "mils")),
+    default="mm",
+    show_default=True,
+    help="Output units",
+)
+@click.option(
+    "--rotation",
+    type=float,
+    default=0.0,
+    show_default=True,
+    help="Rotate the board frame counter clockwise in degrees",
+)
+@click.option(
+    "--mirror-bottom", is_flag=True, help="Mirror bottom side probes as seen from below"
+)
+@click.option(
+    "--coverage",
+    "coverage_out",
+    type=str,
+    required=False,
+    help="Write net coverage tables, one sheet each for nets, net classes and sides",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Log the time, peak memory and item count of each stage",
+)
+@click.option(
+    "--metrics-json",
+    type=str,
+    required=False,
+    help="Write the stage metrics to a JSON file",
+)
+def from_ipc356(  # noqa: PLR0913
+    netlist,
+    out,
+    points,
+    include_vias,
+    origin,
+    units,
+    rotation,
+    mirror_bottom,
+    coverage_out,
+    profile,
+    metrics_json,
+):
+    from . import ipc356
+    from . import pipeline
+    from .metrics import Metrics
 
-    file_io.write(report_df, out)
+    metrics = Metrics()
+    try:
+        x, y = (float(value) for value in origin.split(","))
+    except ValueError:
+        _log.error('--origin should be "x,y", got %s', origin)
+        return sys.exit(1)
+    transform = ipc356.make_transform(
+        (x, y), units, rotation, mirror_bottom=mirror_bottom
+    )
+    try:
+        pipeline.from_ipc356(
+            netlist,
+            out,
+            points=points,
+            include_vias=include_vias,
+            transform=transform,
+            coverage_out=coverage_out,
+            metrics=metrics,
+        )
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    finally:
+        _report_metrics(metrics, profile, metrics_json)
     return sys.exit(0)
 
 
 @gr1.command(
-    help="Pull out the position and net for all pads with a test point property set."
+    help="Pick one probe-able pad per net and write a points spreadsheet for from-spreadsheet."
 )
 @click.option("--pcb", type=str, required=True, help="Source PCB file")
-@click.option("--out", type=str, required=True, help="Output spreadsheet")
+@click.option("--out", type=str, required=True, help="Output points spreadsheet")
+@click.option(
+    "--pitch",
+    type=float,
+    default=2.54,
+    show_default=True,
+    help="Probe center spacing in mm to aim for",
+)
+@click.option(
+    "--side",
+    type=click.Choice(("auto", "TOP", "BOTTOM")),
+    default="auto",
+    show_default=True,
+    help="Fixture side to prefer, auto picks the side that reaches the most nets",
+)
 @click.option(
     "--drill-center", is_flag=True, help="Use drill/file center as reference coordinate"
 )
-def by_fab_setting(pcb, out, drill_center):
+@click.option(
+    "--backend",
+    type=click.Choice(kicad_testpoints.backends),
+    default="auto",
+    show_default=True,
+    help="Board reader, native streams the file without needing pcbnew",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always reload the board, do not read or write the cache",
+)
+def suggest(pcb, out, pitch, side, drill_center, backend, no_cache):  # noqa: PLR0913
+    from . import pipeline
+    from . import suggest as suggest_mode
+    from .cache import ReportCache
+
     board_path = Path(pcb).absolute()
     assert board_path.exists()
-    print(board_path)
-    board = pcbnew.LoadBoard(board_path.as_posix())
-    pads = kicad_testpoints.get_pads_by_property(board)
+    try:
+        suggest_mode.suggest_points(
+            board_path,
+            out,
+            pitch=pitch,
+            side=side,
+            options=pipeline.RunOptions(
+                drill_center=drill_center,
+                backend=backend,
+                cache=None if no_cache else ReportCache(),
+            ),
+        )
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    return sys.exit(0)
+
+
+@gr1.command(
+    help="Flag probes in a test point report that are closer than the fixture pitch."
+)
+@click.option("--report", type=str, required=True, help="Test point report")
+@click.option(
+    "--pitch", type=float, required=True, help="Minimum probe center spacing in mm"
+)
+@click.option(
+    "--out", type=str, required=False, help="Output spreadsheet of violations"
+)
+@click.option(
+    "--all-sides",
+    is_flag=True,
+    help="Compare probes on different sides, by default only probes on the same side are checked",
+)
+def check_spacing(report, pitch, out, all_sides):
+    from . import file_io
+    from . import probe_spacing
+
+    try:
+        report_df = file_io.read_file_to_df(report)
+        violations = probe_spacing.pitch_violations(
+            report_df, pitch, per_side=not all_sides
+        )
+    except (UserWarning, ValueError) as e:
+        _log.error(e)
+        return sys.exit(1)
+    for _, line in violations.iterrows():
+        _log.warning(
+            "%s:%s and %s:%s are %.3f mm apart",
+            line["source ref des a"],
+            line["source pad a"],
+            line["source ref des b"],
+            line["source pad b"],
+            line["distance"],
+        )
+    _log.info("%d probe pairs closer than %g mm", len(violations), pitch)
+    if out:
+        file_io.write(violations, out)
+    return sys.exit(1 if len(violations) else 0)
+
+
+@gr1.command(
+    help="Flag probes in a test point report too close to the board edge, another footprint's courtyard or a mounting hole."
+)
+@click.option("--report", type=str, required=True, help="Test point report")
+@click.option("--pcb", type=str, required=True, help="Source PCB file")
+@click.option(
+    "--out", type=str, required=False, help="Output report with the clearance columns"
+)
+@click.option(
+    "--drill-center",
+    is_flag=True,
+    help="Report positions are relative to the drill/place file origin",
+)
+@click.option(
+    "--edge",
+    type=str,
+    default=None,
+    help='Board edge clearance in mm, "3" or "TOP=3,BOTTOM=4"',
+)
+@click.option(
+    "--courtyard",
+    type=str,
+    default=None,
+    help='Courtyard clearance in mm, "1" or "TOP=1,BOTTOM=2"',
+)
+@click.option(
+    "--hole",
+    type=str,
+    default=None,
+    help='Mounting hole clearance in mm, "2" or "TOP=2,BOTTOM=3"',
+)
+def check_clearance(report, pcb, out, drill_center, edge, courtyard, hole):  # noqa: PLR0913
+    from . import clearance
+    from . import file_io
+
+    try:
+        rules = clearance.make_rules(edge, courtyard, hole)
+        report_df = file_io.read_file_to_df(report)
+        checked = clearance.check(
+            report_df, clearance.read_geometry(pcb), rules, drill_center=drill_center
+        )
+    except (UserWarning, ValueError) as e:
+        _log.error(e)
+        return sys.exit(1)
+    violations = clearance.log_violations(checked)
+    if out:
+        file_io.write(checked, out)
+    return sys.exit(1 if violations else 0)
+
+
+@gr1.command(
+    help="Compare the test points of two board revisions, reports or .kicad_pcb files."
+)
+@click.argument("old", type=str)
+@click.argument("new", type=str)
+@click.option("--out", type=str, required=False, help="Output spreadsheet of changes")
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.01,
+    show_default=True,
+    help="Movement in mm below which a probe has not moved",
+)
+@click.option(
+    "--all", "show_all", is_flag=True, help="Include the probes that did not change"
+)
+@click.option(
+    "--drill-center", is_flag=True, help="Use drill/file center as reference coordinate"
+)
+@click.option(
+    "--backend",
+    type=click.Choice(kicad_testpoints.backends),
+    default="auto",
+    show_default=True,
+    help="Board reader for .kicad_pcb inputs, native streams the file without needing pcbnew",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always reload the board, do not read or write the cache",
+)
+def diff(old, new, out, tolerance, show_all, drill_center, backend, no_cache):  # noqa: PLR0913
+    from . import file_io
+    from . import pipeline
+    from . import report_diff
+    from .cache import ReportCache
+
+    options = pipeline.RunOptions(
+        drill_center=drill_center,
+        backend=backend,
+        cache=None if no_cache else ReportCache(),
+    )
+    try:
+        old_df, new_df = (report_diff.load(fname, options) for fname in (old, new))
+        changes = report_diff.diff(
+            old_df, new_df, tolerance=tolerance, unchanged=show_all
+        )
+    except UserWarning as e:
+        _log.error(e)
+        return sys.exit(1)
+    for _, line in changes[changes["change"] != ""].iterrows():
+        _log.debug(
+            "%s:%s %s", line["source ref des"], line["source pad"], line["change"]
+        )
+    report_diff.log_summary(changes)
+    if out:
+        file_io.write(changes, out)
+        _log.info("Saved to: %s", out)
+    return sys.exit(0)
+
+
+@gr1.command(help="Step and repeat a single board test point report over a panel.")
+@click.option(
+    "--report", type=str, required=True, help="Single board test point report"
+)
+@click.option("--out", type=str, required=True, help="Output panel report")
+@click.option(
+    "--rows", type=int, required=True, help="Boards in the panel's y direction"
+)
+@click.option(
+    "--columns", type=int, required=True, help="Boards in the panel's x direction"
+)
+@click.option(
+    "--pitch",
+    type=str,
+    required=True,
+    help='Board step in mm, "x,y" or one value for both',
+)
+@click.option(
+    "--rails",
+    type=str,
+    default="0",
+    show_default=True,
+    help='Offset of the first board in mm, "x,y"',
+)
+@click.option(
+    "--center",
+    type=str,
+    default="0,0",
+    show_default=True,
+    help="Point in report coordinates the instances are rotated and mirrored about",
+)
+@click.option(
+    "--rotation",
+    type=str,
+    multiple=True,
+    help='Rotate an instance counter clockwise, "row,column=degrees", repeatable',
+)
+@click.option(
+    "--mirror",
+    type=str,
+    multiple=True,
+    help='Flip an instance, "row,column", repeatable',
+)
+def panelize(report, out, rows, columns, pitch, rails, center, rotation, mirror):  # noqa: PLR0913
+    from . import file_io
+    from . import panel
 
-    if len(pads) == 0:
-        _log.warning("No pads with fabrication setting found")
+    try:
+        spec = panel.PanelSpec(
+            rows=rows,
+            columns=columns,
+            pitch=panel.parse_pair(pitch),
+            rails=panel.parse_pair(rails),
+            center=panel.parse_pair(center),
+            rotations=dict(panel.parse_rotation(value) for value in rotation),
+            mirrored={panel.parse_instance(value) for value in mirror},
+        )
+        panel_df = panel.panelize(file_io.read_file_to_df(report), spec)
+    except (UserWarning, ValueError) as e:
+        _log.error(e)
         return sys.exit(1)
+    file_io.write(panel_df, out)
+    _log.info("Saved to: %s", out)
+    return sys.exit(0)
+
+
+@gr1.command(
+    help="Run by-fab-setting and from-spreadsheet for every board in a manifest."
+)
+@click.option(
+    "--manifest",
+    type=str,
+    required=True,
+    help="TOML, JSON or CSV file with pcb, mode, points, out and drill-center per board",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes, defaults to the number of CPUs",
+)
+@click.option("--summary", type=str, required=False, help="Write the per board results")
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always reload the board, do not read or write the cache",
+)
+def batch(manifest, workers, summary, no_cache):
+    from . import batch as batch_mode
+
+    entries = batch_mode.read_manifest(manifest)
+    results = batch_mode.run_batch(entries, workers=workers, use_cache=not no_cache)
+    for result in results:
+        if result["ok"]:
+            _log.info(
+                "OK %s -> %s (%.2f s)", result["pcb"], result["out"], result["seconds"]
+            )
+        else:
+            _log.error("FAILED %s: %s", result["pcb"], result["error"])
+    failed = sum(not result["ok"] for result in results)
+    _log.info("%d / %d boards succeeded", len(results) - failed, len(results))
+    if summary:
+        import pandas as pd
+
+        from . import file_io
+
+        file_io.write(pd.DataFrame(results), summary)
+    return sys.exit(1 if failed else 0)
+
+
+@gr1.command(help="Serve reports over HTTP, keeping recently used boards loaded.")
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    help="Address to listen on",
+)
+@click.option(
+    "--port", type=int, default=8765, show_default=True, help="Port to listen on"
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=str,
+    default=None,
+    help="Listen on a Unix socket instead",
+)
+@click.option(
+    "--max-boards", type=int, default=8, show_default=True, help="Boards to keep loaded"
+)
+@click.option(
+    "--backend",
+    type=click.Choice(kicad_testpoints.backends),
+    default="auto",
+    show_default=True,
+    help="Board reader, native streams the file without needing pcbnew",
+)
+def serve(host, port, socket_path, max_boards, backend):
+    from . import server
 
-    assert len(pads) > 0
-    settings = kicad_testpoints.Settings()
-    settings.use_aux_origin = drill_center
+    server.serve(host, port, socket_path, max_boards, backend)
+    return sys.exit(0)
 
-    report = kicad_testpoints.build_test_point_report(board, settings, pads)
-    report_df = pd.DataFrame(report)
 
-    nets = set(board.GetNetsByName())
-    tp_nets = report_df["net"].unique()
+@gr1.command(help="Request a report from a running serve command.")
+@click.argument("mode", type=click.Choice(("by-fab-setting", "from-spreadsheet")))
+@click.option("--pcb", type=str, required=True, help="Source PCB file")
+@click.option(
+    "--points", type=str, required=False, help="Probe spreadsheet for from-spreadsheet"
+)
+@click.option(
+    "--out", type=str, required=False, help="Output file, prints the summary if not set"
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(("json", "csv", "xlsx")),
+    default=None,
+    help="Response format, by default from the --out extension",
+)
+@click.option(
+    "--drill-center", is_flag=True, help="Use drill/file center as reference coordinate"
+)
+@click.option(
+    "--host", type=str, default="127.0.0.1", show_default=True, help="Server address"
+)
+@click.option("--port", type=int, default=8765, show_default=True, help="Server port")
+@click.option(
+    "--socket", "socket_path", type=str, default=None, help="Server Unix socket"
+)
+def request(mode, pcb, points, out, fmt, drill_center, host, port, socket_path):  # noqa: PLR0913
+    import json
 
-    _log.info("Coverage: %d / %d nets. Saved to: %s", len(tp_nets), len(nets), out)
+    from . import server
 
-    file_io.write(report_df, out)
+    if fmt is None:
+        suffix = Path(out).suffix.strip(".").lower() if out else ""
+        fmt = suffix if suffix in server.formats else "json"
+    client = server.Client(host, port, socket_path)
+    try:
+        body = client.request(mode, pcb, points, drill_center=drill_center, format=fmt)
+    except (UserWarning, OSError) as e:
+        _log.error(e)
+        return sys.exit(1)
+    if out:
+        Path(out).write_bytes(body)
+        _log.info("Saved to: %s", out)
+    elif fmt == "json":
+        click.echo(json.dumps(json.loads(body)["summary"], indent=2))
+    else:
+        click.echo(body.decode() if fmt == "csv" else f"{len(body)} bytes")
     return sys.exit(0)
 
 
+@gr1.group(help="Manage the cache of extracted pad data.")
+def cache():
+    return 0
+
+
+@cache.command(help="Remove all cached entries.")
+def clear():
+    from .cache import ReportCache
+
+    report_cache = ReportCache()
+    removed = report_cache.clear()
+    _log.info("Removed %d entries from %s", removed, report_cache.directory)
+
+
+@cache.command(help="Show the cache location and size.")
+def info():
+    from .cache import ReportCache
+
+    report_cache = ReportCache()
+    _log.info(
+        "%s: %d entries, %.1f MB",
+        report_cache.directory,
+        len(report_cache.entries()),
+        report_cache.size() / 1e6,
+    )
+
+
 def main():
     return gr1()
 
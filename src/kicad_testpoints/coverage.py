@@ -0,0 +1,191 @@
+"""
+coverage.py: Net coverage of a test point report.
+
+Nets without a name, KiCad's unconnected-(...) no-connect nets and nets with a
+single pad have nothing to test and are excluded from the coverage numbers.
+All counting is done with pandas group operations over the report and the
+per-net pad counts of the board.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_log = logging.getLogger("kicad_testpoints")
+
+no_connect_prefix = "unconnected-"
+# Nets with fewer pads have nothing to test
+min_pads = 2
+
+
+def board_nets(index) -> tuple[dict[str, int], dict[str, str]]:
+    """
+    Pad count and net class of each net on the board from a BoardIndex.
+    """
+    net_pads = {net: len(pads) for net, pads in index.by_net.items()}
+    return net_pads, dict(index.net_class)
+
+
+@dataclass
+class Coverage:
+    """
+    Coverage tables. nets has one line per board net with pads, the others
+    summarize the testable nets.
+    """
+
+    nets: pd.DataFrame
+    by_net_class: pd.DataFrame
+    by_side: pd.DataFrame
+
+    @property
+    def testable(self) -> int:
+        return int((self.nets["excluded"] == "").sum())
+
+    @property
+    def covered(self) -> int:
+        return int((self.nets["covered"] & (self.nets["excluded"] == "")).sum())
+
+    @property
+    def uncovered(self) -> list[str]:
+        nets = self.nets
+        return nets.loc[~nets["covered"] & (nets["excluded"] == ""), "net"].tolist()
+
+    def sheets(self) -> dict[str, pd.DataFrame]:
+        return {
+            "nets": self.nets,
+            "net classes": self.by_net_class,
+            "sides": self.by_side,
+        }
+
+
+def exclusion(net: str, pads: int) -> str:
+    """
+    Reason a net is not counted for coverage, empty if it is testable.
+    """
+    if net == "":
+        return "no net"
+    if net.startswith(no_connect_prefix):
+        return "no connect"
+    if pads < min_pads:
+        return "single pad"
+    return ""
+
+
+def count(report_nets, net_pads: dict[str, int]) -> tuple[int, int, int]:
+    """
+    Covered, testable and excluded net counts using only sets, for runs that do
+    not need the full tables.
+    """
+    testable = {net for net, pads in net_pads.items() if not exclusion(net, pads)}
+    covered = testable.intersection(report_nets)
+    return len(covered), len(testable), len(net_pads) - len(testable)
+
+
+def summary(table: dict, net_pads: dict[str, int]) -> pd.DataFrame:
+    """
+    One line per count for the summary sheet of a spreadsheet report.
+    """
+    import pandas as pd
+
+    covered, testable, excluded = count(table["net"], net_pads)
+    side = table["side"]
+    pad_type = table["pad type"]
+    lines = {
+        "probes": len(side),
+        "top probes": sum(1 for value in side if value == "TOP"),
+        "bottom probes": sum(1 for value in side if value == "BOTTOM"),
+        "thru probes": sum(1 for value in pad_type if value == "THRU"),
+        "testable nets": testable,
+        "covered nets": covered,
+        "excluded nets": excluded,
+        "coverage": covered / testable if testable else 0.0,
+    }
+    return pd.DataFrame({"item": list(lines), "value": list(lines.values())})
+
+
+def _exclusion(nets: pd.DataFrame) -> pd.Series:
+    import pandas as pd
+
+    reason = pd.Series("", index=nets.index)
+    reason[nets["pads"] < min_pads] = "single pad"
+    reason[nets["net"].str.startswith(no_connect_prefix)] = "no connect"
+    reason[nets["net"] == ""] = "no net"
+    return reason
+
+
+def analyze(
+    report_df: pd.DataFrame, net_pads: dict[str, int], net_classes: dict[str, str]
+) -> Coverage:
+    """
+    Coverage of the board nets by the probes in the report.
+    """
+    import pandas as pd
+
+    nets = pd.DataFrame(
+        {
+            "net": pd.Series(list(net_pads), dtype=str),
+            "pads": pd.Series(list(net_pads.values()), dtype="int64"),
+        }
+    )
+    nets["net class"] = nets["net"].map(net_classes).fillna("Default")
+    nets["excluded"] = _exclusion(nets)
+
+    probes = report_df[["net", "side", "pad type"]].astype(str)
+    per_net = pd.DataFrame(
+        {
+            "probes": probes.groupby("net").size(),
+            "top probes": (probes["side"] == "TOP").groupby(probes["net"]).sum(),
+            "bottom probes": (probes["side"] == "BOTTOM").groupby(probes["net"]).sum(),
+            "thru probes": (probes["pad type"] == "THRU").groupby(probes["net"]).sum(),
+        }
+    )
+    nets = nets.join(per_net, on="net")
+    count_columns = ["probes", "top probes", "bottom probes", "thru probes"]
+    nets[count_columns] = nets[count_columns].fillna(0).astype("int64")
+    nets["covered"] = nets["probes"] > 0
+    nets["only thru"] = nets["covered"] & (nets["thru probes"] == nets["probes"])
+    nets["only bottom"] = nets["covered"] & (nets["top probes"] == 0)
+    nets = nets.sort_values(["covered", "net class", "net"], ignore_index=True)
+
+    testable = nets[nets["excluded"] == ""]
+    by_net_class = testable.groupby("net class").agg(
+        nets=("net", "size"), covered=("covered", "sum")
+    )
+    by_net_class["coverage"] = by_net_class["covered"] / by_net_class["nets"]
+    by_net_class = by_net_class.reset_index()
+
+    total = len(testable)
+    by_side = pd.DataFrame(
+        {
+            "side": ["TOP", "BOTTOM", "ANY"],
+            "covered": [
+                int((testable["top probes"] > 0).sum()),
+                int((testable["bottom probes"] > 0).sum()),
+                int(testable["covered"].sum()),
+            ],
+        }
+    )
+    by_side["nets"] = total
+    by_side["coverage"] = by_side["covered"] / total if total else 0.0
+    return Coverage(nets=nets, by_net_class=by_net_class, by_side=by_side)
+
+
+def log_counts(covered: int, testable: int, excluded: int) -> None:
+    _log.info(
+        "Coverage: %d / %d testable nets (%d excluded)", covered, testable, excluded
+    )
+
+
+def log_summary(coverage: Coverage) -> None:
+    nets = coverage.nets
+    log_counts(coverage.covered, coverage.testable, int((nets["excluded"] != "").sum()))
+    for _, line in coverage.by_net_class.iterrows():
+        _log.debug("  %s: %d / %d", line["net class"], line["covered"], line["nets"])
+    uncovered = coverage.uncovered
+    if uncovered:
+        _log.debug("Uncovered nets: %s", ", ".join(uncovered))
@@ -5,46 +5,272 @@ file_io.py: All the file read and write functions
 import csv
 from pathlib import Path
 
-import numpy as np
 import pandas as pd
 
+points_columns = ("source ref des", "source pad")
+board_columns = ("board", "pcb")
+default_chunksize = 100_000
+sniff_bytes = 64 * 1024
+delimiters = ",;\t|"
+excel_extensions = ("xls", "xlsx", "xlsm", "xlsb")
+ods_extensions = ("ods", "odt", "odf")
+parquet_extensions = ("parquet", "pq")
+arrow_extensions = ("feather", "arrow", "ipc")
+categorical_columns = ("net", "net class", "side", "footprint side", "pad type")
+streaming_excel_extensions = ("xlsx", "xlsm")
+xlsx_chunksize = 10_000
+# Rows sampled for the column widths and the widest column allowed
+width_sample = 1000
+max_width = 60
+
+
+def sniff_delimiter(fname: str, default: str = ",") -> str:
+    """
+    Delimiter detected from the start of the file ignoring comment and blank lines.
+    Falls back on the most common candidate in the header, then on default.
+    """
+    with Path(fname).open(encoding="utf-8", errors="replace", newline="") as f:
+        sample = f.read(sniff_bytes)
+    lines = [
+        line
+        for line in sample.splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+    if len(sample) == sniff_bytes and len(lines) > 1:
+        lines = lines[:-1]  # Last line is likely cut off
+    if not lines:
+        return default
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=delimiters).delimiter
+    except csv.Error:
+        counts = {delimiter: lines[0].count(delimiter) for delimiter in delimiters}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else default
+
 
 def read_csv_to_df(fname: str, **kwargs) -> pd.DataFrame:
     """
-    Expects sep or delimiter in kwargs. If not included then we
-    fallback on the pandas interpretation
-    Use automatic dialect detection by setting sep to None and engine to python
+    Expects sep or delimiter in kwargs. If not included then the delimiter
+    is sniffed from the start of the file and the C parser is used.
     """
     if "delimiter" in kwargs and "sep" not in kwargs:
         kwargs["sep"] = kwargs["delimiter"]
 
     kwargs["delimiter"] = None
-    if "sep" in kwargs:
-        return pd.read_csv(fname, **kwargs)
+    if "sep" not in kwargs:
+        kwargs["sep"] = sniff_delimiter(fname)
+    return pd.read_csv(fname, **kwargs)
 
-    # Use automatic dialect detection by setting sep to None and engine to python
-    kwargs["sep"] = None
-    return pd.read_csv(fname, engine="python", **kwargs)
+
+def _ods_rows(fname: str, **kwargs) -> list[list]:
+    import pyexcel_ods3
+
+    data = pyexcel_ods3.get_data(fname, **kwargs)
+    return next(iter(data.values())) if isinstance(data, dict) else data
+
+
+def _ods_to_df(rows: list[list], header_index: int) -> pd.DataFrame:
+    header = rows[header_index]
+    width = len(header)
+    lines = [line[:width] for line in rows[header_index + 1 :] if line]
+    return pd.DataFrame(lines, columns=header)
 
 
 def read_ods_format_to_df(fname: str, **kwargs) -> pd.DataFrame:
     """
-    Read ODS format to dataframe
+    Read ODS format to dataframe. The header is the first line at least as long
+    as the average line, shorter lines before it are taken as notes.
+    """
+    rows = _ods_rows(fname, **kwargs)
+    ave_line_length = sum(len(line) for line in rows) / len(rows)
+    header_index = next(
+        i for i, line in enumerate(rows) if len(line) >= ave_line_length
+    )
+    return _ods_to_df(rows, header_index)
+
+
+def _ods_sheet(df: pd.DataFrame, *, index: bool = True) -> list[list]:
+    """
+    Header and rows of python scalars, missing values as empty cells.
+    """
+    df = df.astype(object).where(df.notna(), "")
+    columns = [df[column].tolist() for column in df.columns]
+    header = [str(column) for column in df.columns]
+    if index:
+        columns.insert(0, df.index.tolist())
+        header.insert(0, "")
+    return [header, *(list(line) for line in zip(*columns, strict=True))]
+
+
+def write_ods(
+    df: pd.DataFrame, fname: str, sheet_name: str = "Sheet1", *, index: bool = True
+) -> None:
+    """
+    Write ODS with pyexcel-ods3, laid out like DataFrame.to_excel.
     """
     import pyexcel_ods3
 
-    data = pyexcel_ods3.get_data(fname, **kwargs)
-    ave_line_length = np.mean([len(line) for line in data])
-    data_lines = [
-        line for line in data if len(line) >= ave_line_length
-    ]  # assume this is the data
-    header = data_lines[0]
-    data_lines = data_lines[1:]
-    df_dict = {column: [] for column in header}
-    for line in data_lines:
-        for column, pt in zip(df_dict.keys(), line, strict=False):
-            df_dict[column].append(pt)
-    return pd.DataFrame(df_dict)
+    pyexcel_ods3.save_data(fname, {sheet_name: _ods_sheet(df, index=index)})
+
+
+def _column_width(header: str, values: list) -> float:
+    widest = max((len(str(value)) for value in values if value is not None), default=0)
+    return min(max(len(header), widest) + 2, max_width)
+
+
+def _xlsx_sheet(workbook, name: str, df: pd.DataFrame, *, index: bool) -> None:
+    """
+    Stream one DataFrame into a write only sheet in chunks of rows, with a bold
+    frozen header and column widths taken from the header and the first rows.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    sheet = workbook.create_sheet(title=name)
+    header = [str(column) for column in df.columns]
+    if index:
+        header.insert(0, "")
+    sample = _xlsx_columns(df.iloc[:width_sample], index=index)
+    # Sheet layout has to be set before the first row is written
+    for i, (title, values) in enumerate(zip(header, sample, strict=True), start=1):
+        sheet.column_dimensions[get_column_letter(i)].width = _column_width(
+            title, values
+        )
+    sheet.freeze_panes = "B2" if index else "A2"
+
+    bold = Font(bold=True)
+    cells = []
+    for title in header:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = bold
+        cells.append(cell)
+    sheet.append(cells)
+    for start in range(0, len(df), xlsx_chunksize):
+        columns = _xlsx_columns(df.iloc[start : start + xlsx_chunksize], index=index)
+        for line in zip(*columns, strict=True):
+            sheet.append(line)
+
+
+def _xlsx_columns(df: pd.DataFrame, *, index: bool) -> list[list]:
+    """
+    Python scalars for each column, missing values as None.
+    """
+    columns = [
+        df[column].astype(object).where(df[column].notna(), None).tolist()
+        for column in df.columns
+    ]
+    if index:
+        columns.insert(0, df.index.tolist())
+    return columns
+
+
+def write_xlsx_sheets(
+    sheets: dict[str, pd.DataFrame], fname: str, *, index: bool = False
+) -> None:
+    """
+    Write each DataFrame to its own sheet with openpyxl in write only mode so
+    memory does not grow with the row count.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for name, df in sheets.items():
+        _xlsx_sheet(workbook, name, df, index=index)
+    workbook.save(fname)
+
+
+def write_excel(
+    df: pd.DataFrame,
+    fname: str,
+    sheet_name: str = "Sheet1",
+    *,
+    index: bool = True,
+    summary: pd.DataFrame | None = None,
+    **kwargs,
+) -> None:
+    """
+    Write the report laid out like DataFrame.to_excel. xlsx and xlsm are streamed
+    by write_xlsx_sheets with summary as a second sheet, other excel formats go
+    through to_excel.
+    """
+    ext = Path(fname).suffix.strip(".").lower()
+    if ext not in streaming_excel_extensions or kwargs:
+        with pd.ExcelWriter(fname) as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=index, **kwargs)
+            if summary is not None:
+                summary.to_excel(writer, sheet_name="summary", index=False)
+        return
+    write_xlsx(df, fname, sheet_name, index=index, summary=summary)
+
+
+def write_xlsx(
+    df: pd.DataFrame,
+    target,
+    sheet_name: str = "Sheet1",
+    *,
+    index: bool = True,
+    summary: pd.DataFrame | None = None,
+) -> None:
+    """
+    Stream the report and the optional summary sheet to an xlsx path or binary
+    file object.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    _xlsx_sheet(workbook, sheet_name, df, index=index)
+    if summary is not None:
+        _xlsx_sheet(workbook, "summary", summary, index=False)
+    workbook.save(target)
+
+
+def categorize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy with the repeated report columns as categoricals for the columnar formats.
+    """
+    df = df.copy()
+    for column in categorical_columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def write_parquet(df: pd.DataFrame, fname: str, **kwargs) -> None:
+    categorize(df).to_parquet(fname, index=False, **kwargs)
+
+
+def write_arrow(df: pd.DataFrame, fname: str, **kwargs) -> None:
+    """
+    Arrow IPC (Feather v2) file, uncompressed by default so it can be memory mapped.
+    """
+    kwargs.setdefault("compression", "uncompressed")
+    categorize(df).reset_index(drop=True).to_feather(fname, **kwargs)
+
+
+def read_arrow_table(fname: str, *, memory_map: bool = True, columns=None):
+    """
+    pyarrow Table of an Arrow IPC or Parquet report. Uncompressed Arrow files are
+    memory mapped and the table references the mapped buffers without a copy.
+    """
+    ext = Path(fname).suffix.strip(".").lower()
+    if ext in parquet_extensions:
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_table(fname, columns=columns, memory_map=memory_map)
+    import pyarrow.feather
+
+    return pyarrow.feather.read_table(fname, columns=columns, memory_map=memory_map)
+
+
+def read_columnar_to_df(
+    fname: str, *, memory_map: bool = True, columns=None
+) -> pd.DataFrame:
+    """
+    Read a Parquet or Arrow IPC report, dictionary columns become categoricals.
+    """
+    table = read_arrow_table(fname, memory_map=memory_map, columns=columns)
+    return table.to_pandas(split_blocks=True)
 
 
 def get_supported_file_types_df():
@@ -71,17 +297,31 @@ def get_supported_file_types_df():
         {
             "title": "excel",
             "kwargs": {"sheet_name": 0, "header": 0, "skiprows": 0},
-            "extensions": ("xls", "xlsx", "xlsm", "xlsb"),
-            "writedf": pd.DataFrame.to_excel,
+            "extensions": excel_extensions,
+            "writedf": write_excel,
             "readf": pd.read_excel,
         },
         {
             "title": "ods",
             "kwargs": {"sheet_name": 0, "header": 0, "skiprows": 0},
-            "extensions": ("ods", "odt", "odf"),
-            "writedf": None,
+            "extensions": ods_extensions,
+            "writedf": write_ods,
             "readf": read_ods_format_to_df,
         },
+        {
+            "title": "parquet",
+            "kwargs": {},
+            "extensions": parquet_extensions,
+            "writedf": write_parquet,
+            "readf": read_columnar_to_df,
+        },
+        {
+            "title": "arrow",
+            "kwargs": {},
+            "extensions": arrow_extensions,
+            "writedf": write_arrow,
+            "readf": read_columnar_to_df,
+        },
     ]
 
 
@@ -115,6 +355,104 @@ def read_file_to_df(fname: str, **kwargs) -> pd.DataFrame:
     return pd.DataFrame(df)
 
 
+def _points_column(column) -> bool:
+    return str(column).strip() in points_columns
+
+
+def _board_points_column(column) -> bool:
+    return str(column).strip() in points_columns + board_columns
+
+
+def _read_points_chunks(fname: str, chunksize: int, wanted=_points_column):
+    ext = Path(fname).suffix.strip(".").lower()
+    if ext in ("csv", "txt"):
+        yield from pd.read_csv(
+            fname,
+            sep=sniff_delimiter(fname),
+            usecols=wanted,
+            dtype=str,
+            keep_default_na=False,
+            skipinitialspace=True,
+            comment="#",
+            chunksize=chunksize,
+        )
+    elif ext in excel_extensions:
+        yield pd.read_excel(fname, usecols=wanted, dtype=str, keep_default_na=False)
+    elif ext in ods_extensions:
+        rows = _ods_rows(fname)
+        header_index = next(
+            (i for i, line in enumerate(rows) if any(_points_column(c) for c in line)),
+            0,
+        )
+        df = _ods_to_df(rows, header_index)
+        yield df.loc[:, [wanted(c) for c in df.columns]]
+    else:
+        df = read_file_to_df(fname)
+        yield df.loc[:, [wanted(c) for c in df.columns]]
+
+
+def _row_list(rows: list[int], limit: int = 20) -> str:
+    text = ", ".join(str(row) for row in rows[:limit])
+    if len(rows) > limit:
+        text += f" and {len(rows) - limit} more"
+    return text
+
+
+def read_points(
+    fname: str, chunksize: int = default_chunksize, *, board: bool = False
+) -> pd.DataFrame:
+    """
+    Read only the source ref des and source pad columns of a points spreadsheet
+    as stripped strings, CSV files are streamed in chunks. Rows missing either
+    value are collected over the whole file and reported in one UserWarning
+    using 1-based data row numbers. With board the board (or pcb) column is
+    read too and returned as board.
+    """
+    columns = list(points_columns) + (["board"] if board else [])
+    wanted = _board_points_column if board else _points_column
+    chunks = []
+    malformed = []
+    start = 1
+    for raw in _read_points_chunks(fname, chunksize, wanted):
+        raw.columns = [str(column).strip() for column in raw.columns]
+        if board and "board" not in raw.columns and "pcb" in raw.columns:
+            raw.columns = [
+                "board" if column == "pcb" else column for column in raw.columns
+            ]
+        missing = [column for column in columns if column not in raw.columns]
+        if missing:
+            msg = f"Missing columns in {fname}: {', '.join(missing)}"
+            raise UserWarning(msg)
+        chunk = raw[columns].fillna("").astype(str)
+        for column in columns:
+            chunk[column] = chunk[column].str.strip()
+        empty = (chunk[columns] == "").any(axis=1).to_numpy()
+        malformed.extend((empty.nonzero()[0] + start).tolist())
+        start += len(chunk)
+        chunks.append(chunk)
+
+    if malformed:
+        names = " or ".join(columns)
+        msg = f"Missing {names} in {len(malformed)} rows of {fname}: {_row_list(malformed)}"
+        raise UserWarning(msg)
+    if not chunks:
+        return pd.DataFrame({column: pd.Series(dtype=str) for column in columns})
+    return pd.concat(chunks, ignore_index=True)
+
+
+def points_pairs(points_df: pd.DataFrame) -> list[tuple[str, str]]:
+    """
+    (ref des, pad) pairs from a dataframe returned by read_points.
+    """
+    return list(
+        zip(
+            points_df["source ref des"].tolist(),
+            points_df["source pad"].tolist(),
+            strict=True,
+        )
+    )
+
+
 def write(df: pd.DataFrame, fname: str, **kwargs) -> None:
     """
     Search for the correct exporter and write the dataframe
@@ -130,3 +468,33 @@ def write(df: pd.DataFrame, fname: str, **kwargs) -> None:
 
     assert writer
     writer(df, fname, **kwargs)
+
+
+def write_sheets(sheets: dict[str, pd.DataFrame], fname: str, **kwargs) -> None:
+    """
+    Write several dataframes to one workbook for excel and ODS outputs, other formats
+    get one file per sheet named <stem>-<sheet>.<ext>.
+    """
+    path = Path(fname)
+    ext = path.suffix.strip(".").lower()
+    if ext in streaming_excel_extensions and not kwargs:
+        write_xlsx_sheets(sheets, fname)
+        return
+    if ext in excel_extensions:
+        with pd.ExcelWriter(fname) as writer:
+            for name, df in sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False, **kwargs)
+        return
+    if ext in ods_extensions:
+        import pyexcel_ods3
+
+        pyexcel_ods3.save_data(
+            fname, {name: _ods_sheet(df, index=False) for name, df in sheets.items()}
+        )
+        return
+
+    for name, df in sheets.items():
+        sheet = name.replace(" ", "-")
+        write(
+            df, path.with_name(f"{path.stem}-{sheet}{path.suffix}").as_posix(), **kwargs
+        )
@@ -0,0 +1,177 @@
+"""
+ipc356.py: Test point report from an IPC-D-356 netlist.
+
+The netlist is read one line at a time. Parameter records set the units and the
+aliases of long net names, feature records (317 through hole, 327 surface
+mount) give the net, ref des, pin, access side and position of each pad in
+fixed columns. Positions are y up from the netlist origin, the same frame the
+report uses, and are converted to mm before the report transform. Tooling
+holes (367) have no net and are skipped.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+
+from .transform import Transform
+from .transform import frame_column
+
+_log = logging.getLogger("kicad_testpoints")
+
+through_hole = "317"
+surface_mount = "327"
+feature_codes = (through_hole, surface_mount)
+no_net = "N/C"
+via_ref_des = "VIA"
+# mm per coordinate count for each UNITS setting, IPC-D-356 defaults to inches
+unit_scales = {"CUST 0": 0.00254, "CUST 1": 0.001, "CUST 2": 0.00254, "SI": 0.001}
+default_unit_scale = unit_scales["CUST 0"]
+
+_position = re.compile(r"X\s*([+-]?)\s*(\d+)\s*Y\s*([+-]?)\s*(\d+)")
+_access = re.compile(r"A(\d\d)")
+_alias = re.compile(r"^P\s+(NNAME\d+)\s+(.+?)\s*$")
+_units = re.compile(r"^P\s+UNITS\s+(\S+(?:\s+\d)?)")
+
+
+def _record(line: str, number: int, scale: float, aliases: dict[str, str]) -> tuple:
+    """
+    (net, ref des, pin, pad type, side, x mm, y mm) from a fixed column feature record.
+    """
+    line = line.ljust(80)
+    net = line[3:17].strip()
+    net = aliases.get(net, net)
+    ref_des = line[20:26].strip()
+    pin = line[27:31].strip()
+    position = _position.search(line, 41)
+    if position is None:
+        msg = f"Line {number} has no X/Y position"
+        raise UserWarning(msg)
+    x_sign, x, y_sign, y = position.groups()
+    x = int(x) * scale * (-1 if x_sign == "-" else 1)
+    y = int(y) * scale * (-1 if y_sign == "-" else 1)
+    access = _access.match(line, 38)
+    layer = int(access.group(1)) if access else 0
+    # A00 is both sides, A01 the primary (top) side and higher numbers count down to the bottom
+    side = "BOTTOM" if layer > 1 else "TOP"
+    pad_type = "THRU" if line[:3] == through_hole else "SMT"
+    return "" if net == no_net else net, ref_des, pin, pad_type, side, x, y
+
+
+def iter_records(fname):
+    """
+    Yield each feature record of the netlist, reading it line by line.
+    """
+    scale = default_unit_scale
+    aliases = {}
+    with Path(fname).open(encoding="utf-8", errors="replace") as f:
+        for number, raw in enumerate(f, start=1):
+            line = raw.rstrip("\r\n")
+            if line.startswith("P"):
+                units = _units.match(line)
+                if units is not None:
+                    value = " ".join(units.group(1).split())
+                    if value not in unit_scales:
+                        msg = f"Line {number}: unknown UNITS {value}"
+                        raise UserWarning(msg)
+                    scale = unit_scales[value]
+                alias = _alias.match(line)
+                if alias is not None:
+                    aliases[alias.group(1)] = alias.group(2)
+            elif line[:3] in feature_codes:
+                yield _record(line, number, scale, aliases)
+            elif line.startswith("999"):
+                break
+
+
+def make_transform(
+    origin: tuple[float, float] = (0.0, 0.0),
+    unit: str = "mm",
+    rotation: float = 0.0,
+    *,
+    mirror_bottom: bool = False,
+) -> Transform:
+    """
+    Report transform with origin given in the netlist frame in mm.
+    """
+    # Transform origins are y down like KiCad positions
+    return Transform(
+        origin=(origin[0], -origin[1]),
+        unit=unit,
+        rotation=rotation,
+        mirror_bottom=mirror_bottom,
+    )
+
+
+def read(
+    fname,
+    transform: Transform | None = None,
+    *,
+    include_vias: bool = False,
+    points=None,
+) -> tuple[dict[str, list], dict]:
+    """
+    Report table with the build_test_point_table columns and the board meta
+    used for coverage, transform is from make_transform. Vias are only reported
+    with include_vias and are not counted as net pads. points is a list of
+    (ref des, pad) pairs to report in that order instead of every pad. The
+    netlist has no net classes, that column is left empty. A frame column
+    names a shifted origin, units, rotation and mirroring if there are any.
+    """
+    transform = transform if transform is not None else Transform()
+    rows = []
+    net_pads = {}
+    for record in iter_records(fname):
+        if record[1] == via_ref_des:
+            if include_vias:
+                rows.append(record)
+            continue
+        net = record[0]
+        net_pads[net] = net_pads.get(net, 0) + 1
+        rows.append(record)
+    _log.debug("Read %d records from %s", len(rows), fname)
+
+    if points is not None:
+        lookup = {(record[1], record[2]): record for record in rows}
+        selected = []
+        for ref_des, pad in points:
+            record = lookup.get((ref_des, str(pad)))
+            if record is None:
+                msg = f"Pad {ref_des}-{pad} not found in {fname}"
+                raise UserWarning(msg)
+            selected.append(record)
+        rows = selected
+
+    columns = (
+        [list(column) for column in zip(*rows, strict=True)]
+        if rows
+        else [[] for _ in range(7)]
+    )
+    nets, ref_des, pins, pad_types, sides, xs, ys = columns
+    bottom = [side == "BOTTOM" for side in sides]
+    # The transform takes KiCad's y down positions
+    x, y = transform.apply(xs, [-value for value in ys], bottom)
+    table = {
+        "source ref des": ref_des,
+        "source pad": pins,
+        "net": nets,
+        "net class": [""] * len(rows),
+        "side": sides,
+        "x": x,
+        "y": y,
+        "pad type": pad_types,
+        "footprint side": list(sides),
+    }
+    frame = transform.frame()
+    if any(transform.origin):
+        origin = f"origin {transform.origin[0]:g},{-transform.origin[1]:g}"
+        frame = ", ".join(filter(None, (origin, frame)))
+    if frame:
+        table[frame_column] = [frame] * len(rows)
+    meta = {
+        "nets": sorted(net_pads),
+        "net pads": net_pads,
+        "net classes": {},
+    }
+    return table, meta
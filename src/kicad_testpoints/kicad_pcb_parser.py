@@ -0,0 +1,546 @@
+"""
+kicad_pcb_parser.py: Streaming .kicad_pcb reader that does not need pcbnew.
+
+Only the footprint, pad, net and origin data used by the report is kept. The
+returned objects mimic the subset of the pcbnew API used by kicad_testpoints so
+they can be passed to the same functions as a board loaded with pcbnew.LoadBoard.
+"""
+
+import fnmatch
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import NamedTuple
+
+_log = logging.getLogger("kicad_testpoints")
+
+IU_PER_MM = 1e6
+
+# pcbnew PAD_PROP values
+PAD_PROP_NONE = 0
+PAD_PROP_BGA = 1
+PAD_PROP_FIDUCIAL_GLBL = 2
+PAD_PROP_FIDUCIAL_LOCAL = 3
+PAD_PROP_TESTPOINT = 4
+PAD_PROP_HEATSINK = 5
+PAD_PROP_CASTELLATED = 6
+PAD_PROP_MECHANICAL = 7
+
+_pad_properties = {
+    "pad_prop_bga": PAD_PROP_BGA,
+    "pad_prop_fiducial_glob": PAD_PROP_FIDUCIAL_GLBL,
+    "pad_prop_fiducial_loc": PAD_PROP_FIDUCIAL_LOCAL,
+    "pad_prop_testpoint": PAD_PROP_TESTPOINT,
+    "pad_prop_heatsink": PAD_PROP_HEATSINK,
+    "pad_prop_castellated": PAD_PROP_CASTELLATED,
+    "pad_prop_mechanical": PAD_PROP_MECHANICAL,
+}
+
+# Layer ids used when the file does not carry a layer table
+_default_layer_ids = {"F.Cu": 0, "B.Cu": 31}
+
+_token_re = re.compile(r'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+
+# Children that are kept for each parent, everything else is skipped unparsed
+_keep_children = {
+    "kicad_pcb": {"layers", "setup", "net", "net_class", "footprint", "module"},
+    "setup": {"aux_axis_origin", "grid_origin"},
+    "footprint": {"layer", "at", "property", "fp_text", "pad", "uuid", "tstamp"},
+    "pad": {"at", "drill", "layers", "net", "property", "pinfunction", "pintype"},
+    "net_class": {"add_net"},
+}
+_keep_children["module"] = _keep_children["footprint"]
+
+# Nesting depth of the entries directly inside (kicad_pcb ...)
+_entry_depth = 2
+
+# Lists that are kept whole
+_keep_all = {
+    "layers",
+    "at",
+    "drill",
+    "net",
+    "aux_axis_origin",
+    "grid_origin",
+    "add_net",
+}
+
+
+class Vector(NamedTuple):
+    x: int
+    y: int
+
+
+_zero = Vector(0, 0)
+
+
+def to_iu(value: str) -> int:
+    """
+    Convert a mm string from the file to integer internal units (nm) like pcbnew.
+    """
+    return round(float(value) * IU_PER_MM)
+
+
+def rotate_point(x: int, y: int, angle: float) -> tuple[int, int]:
+    """
+    Rotate a point the same way as KiCad's RotatePoint, angle in degrees.
+    Right angles are handled exactly, other angles are rounded to internal units.
+    """
+    quarter_turns, rest = divmod(angle % 360, 90)
+    if rest == 0:
+        for _ in range(int(quarter_turns)):
+            x, y = y, -x
+        return x, y
+    rad = math.radians(angle)
+    cos, sin = math.cos(rad), math.sin(rad)
+    return round(x * cos + y * sin), round(y * cos - x * sin)
+
+
+def _unquote(token: str) -> str:
+    if token.startswith('"'):
+        return token[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return token
+
+
+def tokenize(lines):
+    """
+    Generate tokens from an iterable of lines. Quoted strings are kept quoted.
+    """
+    for line in lines:
+        yield from _token_re.findall(line)
+
+
+def _skip(tokens) -> None:
+    depth = 1
+    for tok in tokens:
+        if tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _read_list(tokens, parent, keep=None, keep_all=None):
+    """
+    Read a list after its opening bracket. Lists that are not needed by the parent
+    are skipped without building them and None is returned. A parent of None keeps
+    everything. keep and keep_all replace the report's kept children and whole
+    lists, for readers that need other parts of the file.
+    """
+    keep = _keep_children if keep is None else keep
+    keep_all = _keep_all if keep_all is None else keep_all
+    head = _unquote(next(tokens))
+    if parent is not None and head not in keep.get(parent, ()):
+        _skip(tokens)
+        return None
+    child_parent = None if parent is None or head in keep_all else head
+    items = [head]
+    for tok in tokens:
+        if tok == "(":
+            node = _read_list(tokens, child_parent, keep, keep_all)
+            if node is not None:
+                items.append(node)
+        elif tok == ")":
+            return items
+        else:
+            items.append(_unquote(tok))
+    return items
+
+
+def iter_sexpr(lines, keep=None, keep_all=None):
+    """
+    Stream the top level entries of a kicad_pcb file, returning only the
+    entries needed for the report, or those in keep and keep_all if given.
+    """
+    tokens = tokenize(lines)
+    for tok in tokens:
+        if tok != "(":
+            continue
+        head = _unquote(next(tokens))
+        if head != "kicad_pcb":
+            msg = f"Not a kicad_pcb file, found {head}"
+            raise UserWarning(msg)
+        for item in tokens:
+            if item == "(":
+                entry = _read_list(tokens, "kicad_pcb", keep, keep_all)
+                if entry is not None:
+                    yield entry
+            elif item == ")":
+                return
+
+
+def children(node: list, name: str):
+    """
+    Child lists of a parsed node with the given head.
+    """
+    return (c for c in node[1:] if isinstance(c, list) and c[0] == name)
+
+
+def child(node: list, name: str):
+    """
+    First child list of a parsed node with the given head, None if there is none.
+    """
+    return next(children(node, name), None)
+
+
+class DesignSettings:
+    """
+    Board origins, mirrors pcbnew.BOARD_DESIGN_SETTINGS
+    """
+
+    __slots__ = ("_aux_origin", "_grid_origin")
+
+    def __init__(self, aux_origin=_zero, grid_origin=_zero):
+        self._aux_origin = aux_origin
+        self._grid_origin = grid_origin
+
+    def GetAuxOrigin(self):
+        return self._aux_origin
+
+    def SetAuxOrigin(self, origin):
+        self._aux_origin = Vector(origin.x, origin.y)
+
+    def GetGridOrigin(self):
+        return self._grid_origin
+
+    def SetGridOrigin(self, origin):
+        self._grid_origin = Vector(origin.x, origin.y)
+
+
+@dataclass(slots=True, eq=False)
+class Pad:
+    """
+    Pad data, mirrors the parts of pcbnew.PAD used for the report
+    """
+
+    parent: "Footprint" = field(repr=False)
+    number: str
+    attribute: str
+    position: Vector
+    layer: int
+    layers: tuple[str, ...]
+    netname: str
+    prop: int
+    drill: float
+
+    def GetParentFootprint(self):
+        return self.parent
+
+    def GetBoard(self):
+        return self.parent.GetBoard()
+
+    def GetNumber(self):
+        return self.number
+
+    def GetNetname(self):
+        return self.netname
+
+    def GetNetClassName(self):
+        return self.GetBoard().net_class_name(self.netname)
+
+    def GetLayer(self):
+        return self.layer
+
+    def GetPosition(self):
+        return self.position
+
+    def GetCenter(self):
+        return self.position
+
+    def GetAttributeName(self):
+        return self.attribute
+
+    def HasHole(self):
+        return self.drill > 0
+
+    def GetProperty(self):
+        return self.prop
+
+
+@dataclass(slots=True, eq=False)
+class Footprint:
+    """
+    Footprint data, mirrors the parts of pcbnew.FOOTPRINT used for the report
+    """
+
+    board: "Board" = field(repr=False)
+    fpid: str
+    reference: str
+    layer: int
+    position: Vector
+    orientation: float
+    uuid: str
+    pads: list[Pad] = field(default_factory=list, repr=False)
+
+    def GetBoard(self):
+        return self.board
+
+    def GetFPIDAsString(self):
+        return self.fpid
+
+    def GetReferenceAsString(self):
+        return self.reference
+
+    def GetReference(self):
+        return self.reference
+
+    def GetLayer(self):
+        return self.layer
+
+    def GetSide(self):
+        # pcbnew returns 0 for the front and 1 for the back, not the layer id
+        return int(self.IsFlipped())
+
+    def IsFlipped(self):
+        return self.layer != self.board.layer_id("F.Cu")
+
+    def GetPosition(self):
+        return self.position
+
+    def GetOrientationDegrees(self):
+        return self.orientation
+
+    def Pads(self):
+        return self.pads
+
+
+class Board:
+    """
+    Board data, mirrors the parts of pcbnew.BOARD used for the report
+    """
+
+    def __init__(self, filename: str = ""):
+        self._filename = filename
+        self._footprints = []
+        self._nets = {}
+        self._layer_ids = dict(_default_layer_ids)
+        self._design_settings = DesignSettings()
+        self._net_classes = {}
+        self._net_class_patterns = []
+
+    def GetFileName(self):
+        return self._filename
+
+    def GetDesignSettings(self):
+        return self._design_settings
+
+    def GetFootprints(self):
+        return self._footprints
+
+    def Footprints(self):
+        return self._footprints
+
+    def GetPads(self):
+        return [pad for fp in self._footprints for pad in fp.Pads()]
+
+    def GetNetsByName(self):
+        return self._nets
+
+    def FindFootprintByReference(self, ref_des: str):
+        for fp in self._footprints:
+            if fp.GetReferenceAsString() == ref_des:
+                return fp
+        return None
+
+    def layer_id(self, name: str) -> int:
+        """
+        Layer number from the file layer table
+        """
+        return self._layer_ids.get(name, -1)
+
+    def net_class_name(self, netname: str) -> str:
+        """
+        Net class from the board or project file assignments, Default otherwise.
+        """
+        name = self._net_classes.get(netname)
+        if name is not None:
+            return name
+        for pattern, net_class in self._net_class_patterns:
+            if fnmatch.fnmatchcase(netname, pattern):
+                return net_class
+        return "Default"
+
+    def load_project(self, fname: Path) -> None:
+        """
+        Read the net class assignments from the .kicad_pro file.
+        """
+        with fname.open() as f:
+            project = json.load(f)
+        net_settings = project.get("net_settings", {})
+        for netname, assigned in (
+            net_settings.get("netclass_assignments") or {}
+        ).items():
+            net_class = assigned
+            if isinstance(assigned, list):
+                net_class = assigned[0] if assigned else "Default"
+            self._net_classes[netname] = net_class
+        for entry in net_settings.get("netclass_patterns") or []:
+            self._net_class_patterns.append((entry["pattern"], entry["netclass"]))
+
+    def replace_footprints(self, footprints: list[Footprint]) -> None:
+        self._footprints = list(footprints)
+
+    def add(self, entry: list) -> None:
+        """
+        Add a top level s-expression entry to the board
+        """
+        head = entry[0]
+        if head in ("footprint", "module"):
+            self._footprints.append(self.build_footprint(entry))
+        elif head == "net":
+            code, *name = entry[1:]
+            self._nets[name[0] if name else ""] = int(code)
+        elif head == "layers":
+            self._layer_ids = {layer[1]: int(layer[0]) for layer in entry[1:]}
+        elif head == "setup":
+            for name, setter in (
+                ("aux_axis_origin", self._design_settings.SetAuxOrigin),
+                ("grid_origin", self._design_settings.SetGridOrigin),
+            ):
+                node = child(entry, name)
+                if node is not None:
+                    setter(Vector(to_iu(node[1]), to_iu(node[2])))
+        elif head == "net_class":
+            for node in children(entry, "add_net"):
+                self._net_classes[node[1]] = entry[1]
+
+    def build_footprint(self, node: list) -> Footprint:
+        """
+        Footprint of this board from its parsed (footprint ...) list.
+        """
+        _, x, y, *angle = child(node, "at") or ("at", "0", "0")
+        position = Vector(to_iu(x), to_iu(y))
+        orientation = float(angle[0]) if angle else 0.0
+        layer = child(node, "layer")
+        reference = ""
+        for item in node[1:]:
+            if not isinstance(item, list):
+                continue
+            if item[0] == "property" and item[1] == "Reference":
+                reference = item[2]
+                break
+            if item[0] == "fp_text" and item[1] == "reference":
+                reference = item[2]
+                break
+        uuid = child(node, "uuid") or child(node, "tstamp")
+        fp = Footprint(
+            board=self,
+            fpid=node[1] if isinstance(node[1], str) else "",
+            reference=reference,
+            layer=self.layer_id(layer[1] if layer else "F.Cu"),
+            position=position,
+            orientation=orientation,
+            uuid=uuid[1] if uuid else "",
+        )
+        fp.Pads().extend(self._build_pad(fp, pad) for pad in children(node, "pad"))
+        return fp
+
+    def _build_pad(self, fp: Footprint, node: list) -> Pad:
+        at = child(node, "at")
+        x, y = rotate_point(to_iu(at[1]), to_iu(at[2]), fp.GetOrientationDegrees())
+        fp_position = fp.GetPosition()
+        layers_node = child(node, "layers")
+        layers = tuple(layers_node[1:]) if layers_node else ()
+        net = child(node, "net")
+        netname = ""
+        if net is not None:
+            # KiCad <= 8 writes (net code name), newer files only the name
+            netname = net[-1]
+        prop = child(node, "property")
+        drill = child(node, "drill")
+        drill_size = 0.0
+        if drill is not None:
+            sizes = [float(v) for v in drill[1:] if isinstance(v, str) and v != "oval"]
+            drill_size = sizes[0] if sizes else 0.0
+        return Pad(
+            parent=fp,
+            number=node[1],
+            attribute=node[2],
+            position=Vector(fp_position.x + x, fp_position.y + y),
+            layer=self._principal_layer(node[2], layers),
+            layers=layers,
+            netname=netname,
+            prop=_pad_properties.get(prop[1], PAD_PROP_NONE) if prop else PAD_PROP_NONE,
+            drill=drill_size,
+        )
+
+    def _principal_layer(self, attribute: str, layers: tuple[str]) -> int:
+        """
+        Through hole pads report the front copper if they are on it, surface pads
+        report the first copper layer they are on.
+        """
+        copper = [layer for layer in layers if layer.endswith(".Cu")]
+        if attribute in ("thru_hole", "np_thru_hole") and (
+            "*.Cu" in copper or "F&B.Cu" in copper or "F.Cu" in copper
+        ):
+            return self.layer_id("F.Cu")
+        for layer in copper:
+            if layer in ("*.Cu", "F&B.Cu"):
+                return self.layer_id("F.Cu")
+            layer_id = self.layer_id(layer)
+            if layer_id >= 0:
+                return layer_id
+        return self.layer_id("F.Cu")
+
+
+def split_footprints(text: str) -> tuple[str, list[str]]:
+    """
+    Split the file text into a header holding only the kept board level entries
+    (layers, setup, nets) and the raw text of each footprint block. Used to find
+    which footprints changed between two saves without parsing them.
+    """
+    kept = []
+    blocks = []
+    depth = 0
+    start = 0
+    head_pending = False
+    head = ""
+    for match in _token_re.finditer(text):
+        tok = match.group()
+        if tok == "(":
+            depth += 1
+            if depth == _entry_depth:
+                start = match.start()
+                head_pending = True
+        elif tok == ")":
+            if depth == _entry_depth:
+                if head in ("footprint", "module"):
+                    blocks.append(text[start : match.end()])
+                elif head in _keep_children["kicad_pcb"]:
+                    kept.append(text[start : match.end()])
+            depth -= 1
+        elif head_pending:
+            head = _unquote(tok)
+            head_pending = False
+    return "(kicad_pcb\n" + "\n".join(kept) + "\n)\n", blocks
+
+
+def parse_footprint(board: Board, text: str) -> Footprint:
+    """
+    Build a footprint of the board from the raw text of its block.
+    """
+    tokens = tokenize([text])
+    next(tokens)
+    return board.build_footprint(_read_list(tokens, "kicad_pcb"))
+
+
+def load_board(fname: str) -> Board:
+    """
+    Stream a kicad_pcb file keeping only the data used for the test point report.
+    Net classes are read from the .kicad_pro file next to the board if it exists.
+    """
+    path = Path(fname)
+    board = Board(path.absolute().as_posix())
+    with path.open(encoding="utf-8") as f:
+        for entry in iter_sexpr(f):
+            board.add(entry)
+    project = path.with_suffix(".kicad_pro")
+    if project.exists():
+        board.load_project(project)
+    _log.debug("Read %d footprints from %s", len(board.GetFootprints()), fname)
+    return board
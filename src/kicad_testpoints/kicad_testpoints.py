@@ -2,34 +2,113 @@
 kicad_testpoints
 Command line tool which exports the position of pads from a PCB to create a test point document
 """
-import math
+from __future__ import annotations
+
 import csv
+import importlib.util
 import logging
+import os
 from dataclasses import dataclass
 from pathlib import Path
-import pcbnew
+from typing import TYPE_CHECKING
+
+from . import kicad_pcb_parser
+from .board_index import BoardIndex
+from .transform import Transform
+from .transform import frame_column
+from .transform import origins as transform_origins
+
+if TYPE_CHECKING:
+    import pcbnew
+
+    from .pad_filter import PadFilter
+    from .pad_table import PadRows
+    from .pad_table import PadTable
 
 _log = logging.getLogger("kicad_testpoints")
 
+IU_PER_MM = 1e6
+backends = ("auto", "pcbnew", "native")
+
 
 def calc_probe_distances(name, probes_df):
     """
     Calculate distance to all probes to this one. Return dict of distances.
+    For bulk spacing checks use probe_spacing.pitch_violations.
     """
-    distances = {}
     probe = probes_df[probes_df["test point ref des"] == name].iloc[0]
-    for _, line in probes_df.iterrows():
-        distance = math.dist((probe["x"], probe["y"]), (line["x"], line["y"]))
-        distances[line["test point ref des"]] = distance
-    return distances
+    distances = (
+        (probes_df["x"] - probe["x"]) ** 2 + (probes_df["y"] - probe["y"]) ** 2
+    ) ** 0.5
+    return dict(zip(probes_df["test point ref des"], distances.tolist(), strict=False))
+
+
+def to_mm(value):
+    """
+    Convert internal units to mm. Accepts a scalar or a vector with x and y
+    members so both pcbnew.VECTOR2I and the native backend vectors work.
+    """
+    if hasattr(value, "x"):
+        return (value.x / IU_PER_MM, value.y / IU_PER_MM)
+    return value / IU_PER_MM
+
+
+def import_pcbnew():
+    """
+    Import pcbnew on first use as it is slow to load, None if it is not installed.
+    """
+    try:
+        import pcbnew
+    except ImportError:
+        return None
+    return pcbnew
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    The backend load_board uses for backend, auto is pcbnew if it is installed
+    and native otherwise. pcbnew is found without importing it.
+    """
+    if backend == "auto":
+        return "pcbnew" if importlib.util.find_spec("pcbnew") is not None else "native"
+    return backend
+
+
+def load_board(fname: str, backend: str = "auto"):
+    """
+    Load a board with the selected extraction backend. The native backend streams
+    the s-expression file and keeps only the footprint and pad data.
+    Auto uses pcbnew if it is installed and the native backend otherwise.
+    """
+    pcbnew_module = import_pcbnew() if backend in ("auto", "pcbnew") else None
+    if backend == "auto":
+        backend = "pcbnew" if pcbnew_module is not None else "native"
+    if backend == "pcbnew":
+        if pcbnew_module is None:
+            msg = "pcbnew is not installed, use the native backend"
+            raise UserWarning(msg)
+        return pcbnew_module.LoadBoard(Path(fname).as_posix())
+    if backend == "native":
+        return kicad_pcb_parser.load_board(fname)
+    msg = f"Unknown backend {backend}, choose from {backends}"
+    raise UserWarning(msg)
 
 
 @dataclass
 class Settings:
     """
     All the options that can be passed
+    origin is page, aux, grid or custom (custom_origin in KiCad mm), use_aux_origin
+    is kept as the switch for the aux (drill/place file) origin. units, rotation
+    and mirror_bottom are applied as in transform.Transform.
     """
+
     use_aux_origin: bool = False
+    origin: str = "page"
+    custom_origin: tuple[float, float] = (0.0, 0.0)
+    units: str = "mm"
+    rotation: float = 0.0
+    mirror_bottom: bool = False
 
 
 def get_pad_side(p: pcbnew.PAD, **kwargs):
@@ -61,14 +140,9 @@ def get_pad_position(p: pcbnew.PAD, settings: Settings) -> tuple[float, float]:
     Take the origin location and calculate the distance. Then multiple the axis so it is
     increasing in the desired direction. To match the gerbers this should be increasing right and up.
     """
-    board = p.GetBoard()
-    ds = board.GetDesignSettings()
-    origin = (0, 0)
-    if settings.use_aux_origin:
-        origin = pcbnew.ToMM(ds.GetAuxOrigin())
-    center = [round(pt, 4) for pt in pcbnew.ToMM(p.GetCenter())]
-    position = calc_pad_position(origin=origin, center=center)
-    return [round(pt, 4) for pt in position]
+    transform = get_transform(p.GetBoard(), settings)
+    bottom = get_pad_side(p) == "BOTTOM"
+    return list(transform.apply_point(*to_mm(p.GetCenter()), bottom=bottom))
 
 
 def get_net_name(p: pcbnew.PAD, **kwargs):
@@ -97,6 +171,20 @@ _fields = {
 }
 
 
+# Fields filled directly by build_test_point_table
+_table_fields = (
+    "source ref des",
+    "source pad",
+    "net",
+    "net class",
+    "side",
+    "x",
+    "y",
+    "pad type",
+    "footprint side",
+)
+
+
 def write_csv(data: list[dict], filename: Path):
     fieldnames = data[0].keys()
     with filename.open("w", newline="") as csvfile:
@@ -106,60 +194,206 @@ def write_csv(data: list[dict], filename: Path):
         writer.writerows(data)
 
 
+def check_drill_center(origin: str) -> None:
+    """
+    Raise UserWarning if origin conflicts with the drill center, the aux origin.
+    """
+    if origin not in ("page", "aux"):
+        msg = f"The drill center is the aux origin, it conflicts with origin {origin}"
+        raise UserWarning(msg)
+
+
+def get_origin(board: pcbnew.BOARD, settings: Settings) -> tuple[float, float]:
+    """
+    Resolve the report origin in mm once for the board.
+    Falls back to 0,0 if the aux or grid origin is requested but not set.
+    """
+    return _origin(board, settings)[1]
+
+
+def _origin(board: pcbnew.BOARD, settings: Settings) -> tuple[str, tuple[float, float]]:
+    """
+    Name of the origin used, page if a missing aux or grid origin fell back to
+    0,0, and its position in mm.
+    """
+    if settings.use_aux_origin:
+        check_drill_center(settings.origin)
+    origin = "aux" if settings.use_aux_origin else settings.origin
+    if origin == "page":
+        return origin, (0, 0)
+    if origin == "custom":
+        return origin, tuple(float(value) for value in settings.custom_origin)
+    if origin not in ("aux", "grid"):
+        msg = f"Unknown origin {origin}, choose from {transform_origins}"
+        raise UserWarning(msg)
+    if isinstance(board, BoardIndex):
+        board = board.board
+    ds = board.GetDesignSettings()
+    value = ds.GetAuxOrigin() if origin == "aux" else ds.GetGridOrigin()
+    if value is None:
+        # Keep origin as 0,0
+        _log.info("No %s origin returned. Using 0,0 as origin", origin)
+        return "page", (0, 0)
+    return origin, to_mm(value)
+
+
+def get_transform(board: pcbnew.BOARD, settings: Settings) -> Transform:
+    """
+    Board to report coordinate transform for the settings.
+    """
+    return _transform(get_origin(board, settings), settings)
+
+
+def _transform(origin: tuple[float, float], settings: Settings) -> Transform:
+    return Transform(
+        origin=origin,
+        unit=settings.units,
+        rotation=settings.rotation,
+        mirror_bottom=settings.mirror_bottom,
+    )
+
+
+def write_csv_table(table: dict[str, list], filename: Path) -> None:
+    """
+    Write a report table as CSV with only the standard library. The layout
+    matches pandas.DataFrame.to_csv so both output paths give the same file.
+    """
+    with Path(filename).open("w", newline="") as csvfile:
+        write_csv_rows(table, csvfile)
+
+
+def write_csv_rows(table: dict[str, list], csvfile) -> None:
+    """
+    Write a report table as CSV to an open text file, see write_csv_table.
+    """
+    writer = csv.writer(csvfile, lineterminator=os.linesep)
+    writer.writerow(["", *table])
+    for i, line in enumerate(zip(*table.values(), strict=True)):
+        writer.writerow([i, *line])
+
+
+def build_test_point_table(
+    board: pcbnew.BOARD, settings: Settings, pads: tuple[pcbnew.PAD]
+) -> dict[str, list]:
+    """
+    Build the report as columns in a single pass over the pads. Each pad and its
+    footprint are read once, the coordinate transform is resolved once per board
+    and applied to the position columns at the end.
+    Fields added to _fields that are not known here are read with their getter.
+    A frame column names the origin, units, rotation and mirroring when they
+    are not mm from the page or aux origin.
+    """
+    origin, position = _origin(board, settings)
+    transform = _transform(position, settings)
+    frame = transform.frame()
+    if origin in ("grid", "custom"):
+        frame = ", ".join(filter(None, (f"{origin} origin", frame)))
+    columns = {key: [] for key in _fields}
+    extra = {key: getter for key, getter in _fields.items() if key not in _table_fields}
+    ref_des = columns["source ref des"]
+    pad_number = columns["source pad"]
+    net = columns["net"]
+    net_class = columns["net class"]
+    side = columns["side"]
+    x = columns["x"]
+    y = columns["y"]
+    pad_type = columns["pad type"]
+    fp_side = columns["footprint side"]
+    center_x = []
+    center_y = []
+
+    if pads:
+        assert hasattr(pads[0], "GetParentFootprint")
+    for p in pads:
+        fp = p.GetParentFootprint()
+        fp_layer = fp.GetSide()
+        ref_des.append(fp.GetReferenceAsString())
+        pad_number.append(p.GetNumber())
+        net.append(p.GetNetname())
+        net_class.append(p.GetNetClassName())
+        side.append("BOTTOM" if fp_layer != p.GetLayer() else "TOP")
+        cx, cy = to_mm(p.GetCenter())
+        center_x.append(cx)
+        center_y.append(cy)
+        pad_type.append("THRU" if p.HasHole() else "SMT")
+        fp_side.append("BOTTOM" if fp_layer else "TOP")
+        for key, getter in extra.items():
+            columns[key].append(getter(p, settings=settings))
+    # Positions are transformed as whole columns and rounded once
+    x[:], y[:] = transform.apply(
+        center_x, center_y, [value == "BOTTOM" for value in side]
+    )
+    if frame:
+        columns[frame_column] = [frame] * len(pads)
+    return columns
+
+
+def build_pad_table(
+    board: pcbnew.BOARD, settings: Settings, pads: tuple[pcbnew.PAD]
+) -> PadTable:
+    """
+    Report as typed columns, see pad_table.PadTable.
+    """
+    from .pad_table import PadTable
+
+    return PadTable.from_columns(build_test_point_table(board, settings, pads))
+
+
+def build_test_point_rows(
+    board: pcbnew.BOARD, settings: Settings, pads: tuple[pcbnew.PAD]
+) -> PadRows:
+    """
+    Report as a read only view over build_pad_table that builds the dict of
+    each pad as it is read, see pad_table.PadRows.
+    """
+    return build_pad_table(board, settings, pads).rows()
+
+
 def build_test_point_report(
     board: pcbnew.BOARD, settings: Settings, pads: tuple[pcbnew.PAD]
 ) -> list[dict]:
-    if settings.use_aux_origin:
-        ds = board.GetDesignSettings()
-        aux_origin = ds.GetAuxOrigin()
-        if aux_origin is None:
-            # Keep origin as 0,0
-            _log.info("No aux origin returned. Using 0,0 as origin")
-            settings.use_aux_origin = False
+    """
+    Report as one dict per pad. Use build_test_point_rows, build_pad_table or
+    build_test_point_table for large boards.
+    """
+    return list(build_test_point_rows(board, settings, pads))
 
-    if pads:
-        assert isinstance(pads[0], pcbnew.PAD)
-    return [
-        {key: value(p, settings=settings) for key, value in _fields.items()}
-        for p in pads
-    ]
+
+def get_index(board) -> BoardIndex:
+    """
+    Return the board index, building it if a board is passed.
+    """
+    if isinstance(board, BoardIndex):
+        return board
+    return BoardIndex(board)
 
 
 def get_pads(
-    pad_pair: tuple[tuple[str, int]], board: pcbnew.BOARD
+    pad_pair: tuple[tuple[str, int]],
+    board: pcbnew.BOARD | BoardIndex,
+    pad_filter: PadFilter | None = None,
 ) -> tuple[pcbnew.PAD]:
     """
     Get list of matching pads from a list of (ref_des, pad_num)
+    Pass a BoardIndex to reuse the lookup tables between queries.
+    Pads rejected by pad_filter are dropped before any report field is read.
     """
-    pads = []
-    for ref_des, pad_number in pad_pair:
-        module = board.FindFootprintByReference(ref_des)
-        if not module:
-            msg = "Ref Des %s not found"
-            raise UserWarning(msg, ref_des)
-
-        found = False
-        for pad in module.Pads():
-            if str(pad.GetNumber()) == str(pad_number):
-                pads.append(pad)
-                found = True
-                break
-        if found is False:
-            nums = [str(pad.GetNumber()) for pad in module.Pads()]
-            msg = f"Pad {pad_number} not found in module {ref_des} ({nums})"
-            raise UserWarning(msg)
-
+    index = get_index(board)
+    pads = [index.find_pad(ref_des, pad_number) for ref_des, pad_number in pad_pair]
+    if pad_filter:
+        pads = pad_filter.apply(pads, index)
     return pads
 
 
-def get_pads_by_property(board: pcbnew.BOARD) -> tuple[pcbnew.PAD]:
+def get_pads_by_property(
+    board: pcbnew.BOARD | BoardIndex, pad_filter: PadFilter | None = None
+) -> tuple[pcbnew.PAD]:
     """
-    Get list of matching pads from a list of (ref_des, pad_num)
+    Get list of pads with the test point fabrication property set, optionally
+    narrowed by pad_filter.
     """
-    test_point_property = 4
-    pads = []
-    for p in board.GetPads():
-        if p.GetProperty() != test_point_property:
-            continue
-        pads.append(p)
+    index = get_index(board)
+    pads = index.pads_with_property(kicad_pcb_parser.PAD_PROP_TESTPOINT)
+    if pad_filter:
+        pads = pad_filter.apply(pads, index)
     return pads
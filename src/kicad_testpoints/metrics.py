@@ -0,0 +1,127 @@
+"""
+metrics.py: Wall time, peak RSS and item counts for each stage of a report run.
+
+Pass a Metrics to the pipeline functions to collect them. on_stage is called
+with each finished Stage so library users can forward the numbers to their own
+monitoring. A stage run inside another names it as its parent, only top level
+stages are added up in the total. With profile_out set the extraction is run under cProfile and the
+stats are saved there for pstats or snakeviz.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+
+_log = logging.getLogger("kicad_testpoints")
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Peak resident set size of this process in MB, None where it is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kB, macOS bytes
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+@dataclass
+class Stage:
+    name: str
+    seconds: float
+    peak_rss_mb: float | None
+    count: int | None = None
+    parent: str | None = None
+
+
+class Metrics:
+    """
+    Stages in the order they finished, see module docstring.
+    """
+
+    def __init__(self, profile_out=None, on_stage=None):
+        self.stages: list[Stage] = []
+        self.profile_out = profile_out
+        self.on_stage = on_stage
+        self._profiler = cProfile.Profile() if profile_out else None
+
+    @contextmanager
+    def stage(self, name: str, parent: str | None = None):
+        """
+        Time the block. Set "count" in the yielded dict to record how many items
+        the stage handled. parent is the name of the stage this one runs inside.
+        """
+        record = {"count": None}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            stage = Stage(
+                name=name,
+                seconds=time.perf_counter() - start,
+                peak_rss_mb=peak_rss_mb(),
+                count=record["count"],
+                parent=parent,
+            )
+            self.stages.append(stage)
+            if self.on_stage is not None:
+                self.on_stage(stage)
+
+    @contextmanager
+    def profile(self):
+        """
+        Run the block under cProfile if profile_out is set, the stats are saved
+        when the block exits.
+        """
+        if self._profiler is None:
+            yield
+            return
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_out)
+            _log.info("Profile saved to: %s", self.profile_out)
+
+    @property
+    def seconds(self) -> float:
+        """
+        Total of the top level stages, nested stages are part of their parent.
+        """
+        return sum(stage.seconds for stage in self.stages if stage.parent is None)
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "peak rss mb": peak_rss_mb(),
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+    def log_summary(self) -> None:
+        for stage in self.stages:
+            count = "" if stage.count is None else f", {stage.count} items"
+            rss = (
+                ""
+                if stage.peak_rss_mb is None
+                else f", peak RSS {stage.peak_rss_mb:.0f} MB"
+            )
+            name = stage.name if stage.parent is None else "  " + stage.name
+            _log.info("%-14s %8.1f ms%s%s", name, stage.seconds * 1e3, rss, count)
+        _log.info("%-14s %8.1f ms", "total", self.seconds * 1e3)
+
+    def write_json(self, fname) -> None:
+        Path(fname).write_text(
+            json.dumps(self.as_dict(), indent=2) + "\n", encoding="utf-8"
+        )
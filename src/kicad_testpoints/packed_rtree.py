@@ -0,0 +1,116 @@
+"""
+packed_rtree.py: Static R-tree over axis aligned boxes, queried in bulk.
+
+The tree is packed once with Sort-Tile-Recursive and never updated. A query
+takes an array of boxes and walks the tree one level at a time for all of them,
+keeping (query, node) candidate pairs as index arrays, so there is no Python
+loop over queries or items.
+"""
+
+import math
+
+import numpy as np
+
+default_node_size = 16
+
+
+def _str_order(boxes: np.ndarray, node_size: int) -> np.ndarray:
+    """
+    Sort-Tile-Recursive order: vertical slices by x center, then y within each slice.
+    """
+    n = len(boxes)
+    cx = boxes[:, 0] + boxes[:, 2]
+    cy = boxes[:, 1] + boxes[:, 3]
+    slices = math.ceil(math.sqrt(math.ceil(n / node_size)))
+    per_slice = slices * node_size
+    slice_id = np.empty(n, dtype=np.int64)
+    slice_id[np.argsort(cx, kind="stable")] = np.arange(n) // per_slice
+    return np.lexsort((cy, slice_id))
+
+
+def _intersects(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (
+        (a[:, 0] <= b[:, 2])
+        & (a[:, 2] >= b[:, 0])
+        & (a[:, 1] <= b[:, 3])
+        & (a[:, 3] >= b[:, 1])
+    )
+
+
+def _expand(parents: np.ndarray, starts: np.ndarray, counts: np.ndarray):
+    """
+    Index of every child of each parent, and which entry of parents it came from.
+    """
+    count = counts[parents]
+    source = np.repeat(np.arange(len(parents)), count)
+    offset = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    return source, starts[parents][source] + offset
+
+
+class PackedRTree:
+    """
+    boxes is an (n, 4) array of xmin, ymin, xmax, ymax.
+    """
+
+    def __init__(self, boxes, node_size: int = default_node_size):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.boxes = boxes
+        self.levels = []
+        if len(boxes) == 0:
+            self.ids = np.empty(0, dtype=np.int64)
+            return
+
+        order = _str_order(boxes, node_size)
+        self.ids = order
+        level = boxes[order]
+        levels = [(level, None, None)]
+        while len(level) > 1:
+            starts = np.arange(0, len(level), node_size)
+            counts = np.diff(np.append(starts, len(level)))
+            parents = np.column_stack(
+                (
+                    np.minimum.reduceat(level[:, 0], starts),
+                    np.minimum.reduceat(level[:, 1], starts),
+                    np.maximum.reduceat(level[:, 2], starts),
+                    np.maximum.reduceat(level[:, 3], starts),
+                )
+            )
+            # Children stay in place, only the parents are reordered for the next level
+            order = _str_order(parents, node_size)
+            level = parents[order]
+            levels.append((level, starts[order], counts[order]))
+        self.levels = levels[::-1]
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def query(self, boxes) -> tuple[np.ndarray, np.ndarray]:
+        """
+        All (query index, item index) pairs whose boxes intersect.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        if len(self.boxes) == 0 or len(boxes) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        root = self.levels[0][0]
+        query = np.repeat(np.arange(len(boxes)), len(root))
+        node = np.tile(np.arange(len(root)), len(boxes))
+        for level, starts, counts in self.levels:
+            keep = _intersects(boxes[query], level[node])
+            query, node = query[keep], node[keep]
+            if starts is None:
+                break
+            source, node = _expand(node, starts, counts)
+            query = query[source]
+        return query, self.ids[node]
+
+    def query_radius(self, x, y, radius) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs for the boxes within radius of each point, radius may be per point.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+        return self.query(
+            np.column_stack((x - radius, y - radius, x + radius, y + radius))
+        )
@@ -0,0 +1,116 @@
+"""
+pad_filter.py: Declarative pad filters applied while selecting pads.
+
+Filters run before the report fields are read so rejected pads are never
+extracted. Net name and net class tests are resolved once per net from the
+BoardIndex, ref des globs once per footprint, and each pad is then checked
+cheapest first: net, ref des, pad type and finally side, which needs both the
+pad and footprint layers.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import logging
+import re
+from dataclasses import asdict
+from dataclasses import dataclass
+
+_log = logging.getLogger("kicad_testpoints")
+
+sides = ("TOP", "BOTTOM")
+pad_types = ("SMT", "THRU")
+
+
+@dataclass(frozen=True)
+class PadFilter:
+    """
+    Keep pads matching all the set fields.
+    net_classes lists the net classes to keep, a name starting with ! is excluded instead.
+    ref_des_globs are fnmatch patterns, a pad is kept if any matches.
+    side is the report side.
+    """
+
+    side: str | None = None
+    net_classes: tuple[str, ...] = ()
+    net_regex: str | None = None
+    pad_type: str | None = None
+    ref_des_globs: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        if self.side is not None and self.side not in sides:
+            msg = f"Unknown side {self.side}, choose from {sides}"
+            raise UserWarning(msg)
+        if self.pad_type is not None and self.pad_type not in pad_types:
+            msg = f"Unknown pad type {self.pad_type}, choose from {pad_types}"
+            raise UserWarning(msg)
+        if self.net_regex is not None:
+            try:
+                re.compile(self.net_regex)
+            except re.error as e:
+                msg = f"Invalid net regex {self.net_regex}: {e}"
+                raise UserWarning(msg) from e
+
+    def __bool__(self):
+        return any(asdict(self).values())
+
+    def key(self) -> str:
+        """
+        Stable text of the filter for cache keys.
+        """
+        return json.dumps(asdict(self), sort_keys=True)
+
+    def _nets(self, index) -> set | None:
+        """
+        Net names passing the net class and net regex filters, None if neither is set.
+        """
+        if not self.net_classes and self.net_regex is None:
+            return None
+        include = {name for name in self.net_classes if not name.startswith("!")}
+        exclude = {name[1:] for name in self.net_classes if name.startswith("!")}
+        pattern = re.compile(self.net_regex) if self.net_regex is not None else None
+        nets = set()
+        for net, net_class in index.net_class.items():
+            if include and net_class not in include:
+                continue
+            if net_class in exclude:
+                continue
+            if pattern is not None and pattern.search(net) is None:
+                continue
+            nets.add(net)
+        return nets
+
+    def apply(self, pads, index) -> list:
+        """
+        The pads passing the filter, in their original order.
+        """
+        if not self:
+            return list(pads)
+        nets = self._nets(index)
+        ref_des_match = {}
+        thru = None if self.pad_type is None else self.pad_type == "THRU"
+        bottom = None if self.side is None else self.side == "BOTTOM"
+        kept = []
+        for p in pads:
+            if nets is not None and p.GetNetname() not in nets:
+                continue
+            fp = p.GetParentFootprint()
+            if self.ref_des_globs:
+                ref_des = fp.GetReferenceAsString()
+                match = ref_des_match.get(ref_des)
+                if match is None:
+                    match = any(
+                        fnmatch.fnmatchcase(ref_des, glob)
+                        for glob in self.ref_des_globs
+                    )
+                    ref_des_match[ref_des] = match
+                if not match:
+                    continue
+            if thru is not None and bool(p.HasHole()) != thru:
+                continue
+            if bottom is not None and (fp.GetSide() != p.GetLayer()) != bottom:
+                continue
+            kept.append(p)
+        _log.debug("Pad filter kept %d / %d pads", len(kept), len(pads))
+        return kept
@@ -0,0 +1,176 @@
+"""
+pad_table.py: Typed columns for the report table.
+
+The repeated string columns (net, net class, side, pad type, footprint side) are
+stored as int32 codes into an array of categories, the positions as float64 and
+the remaining columns as object arrays. It converts straight to a DataFrame
+with categoricals or a pyarrow Table with dictionary columns, and back to the
+dict of lists used by the rest of the package. rows gives the old one dict per
+pad report as a view that builds each dict when it is read.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+categorical_columns = (
+    "net",
+    "net class",
+    "side",
+    "pad type",
+    "footprint side",
+    "frame",
+)
+float_columns = ("x", "y")
+
+
+def _factorize(values) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Codes and categories in order of first appearance.
+    """
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    categories = np.empty(len(lookup), dtype=object)
+    categories[:] = list(lookup)
+    return codes, categories
+
+
+def _objects(values) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class PadTable:
+    """
+    Report columns in the order of build_test_point_table. Categorical columns
+    hold codes into categories[key].
+    """
+
+    __slots__ = ("columns", "categories")
+
+    def __init__(
+        self, columns: dict[str, np.ndarray], categories: dict[str, np.ndarray]
+    ):
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def from_columns(cls, table: dict[str, list]) -> PadTable:
+        columns, categories = {}, {}
+        for key, values in table.items():
+            if key in categorical_columns:
+                columns[key], categories[key] = _factorize(values)
+            elif key in float_columns:
+                columns[key] = np.asarray(values, dtype=np.float64)
+            else:
+                columns[key] = _objects(values)
+        return cls(columns, categories)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def keys(self):
+        return self.columns.keys()
+
+    def column(self, key: str) -> np.ndarray:
+        """
+        Column values, categorical columns are decoded.
+        """
+        if key in self.categories:
+            return self.categories[key][self.columns[key]]
+        return self.columns[key]
+
+    def to_columns(self) -> dict[str, list]:
+        """
+        The dict of lists returned by build_test_point_table.
+        """
+        return {key: self.column(key).tolist() for key in self.columns}
+
+    def to_dataframe(self):
+        """
+        DataFrame with categorical columns built from the codes.
+        """
+        import pandas as pd
+
+        data = {}
+        for key, values in self.columns.items():
+            if key in self.categories:
+                data[key] = pd.Categorical.from_codes(values, self.categories[key])
+            else:
+                data[key] = values
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """
+        pyarrow Table with dictionary encoded categorical columns.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for key, values in self.columns.items():
+            if key in self.categories:
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(values),
+                        pa.array(self.categories[key], type=pa.string()),
+                    )
+                )
+            else:
+                arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+    def row(self, i: int) -> dict:
+        return {key: self.column_value(key, i) for key in self.columns}
+
+    def column_value(self, key: str, i: int):
+        value = self.columns[key][i]
+        if key in self.categories:
+            return self.categories[key][value]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def rows(self) -> PadRows:
+        return PadRows(self)
+
+
+class PadRows(Sequence):
+    """
+    One dict per pad, each built when it is read.
+    Compares equal to a list of the same dicts.
+    """
+
+    __slots__ = ("table",)
+
+    def __init__(self, table: PadTable):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.table.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.table.row(i)
+
+    def __eq__(self, other):
+        if isinstance(other, PadRows | list):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other, strict=True)
+            )
+        return NotImplemented
+
+    # Equal to a list, which is not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PadRows({len(self)} pads)"
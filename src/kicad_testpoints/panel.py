@@ -0,0 +1,184 @@
+"""
+panel.py: Step and repeat a single board probe report over a panel.
+
+Each board instance gets a 2x3 affine transform: mirror and rotate about the
+board center, then move to its place in the grid past the rails. All instances
+are applied to the report coordinates in one numpy operation. Mirrored
+instances are flipped boards so their probe sides swap. Rows and columns are
+numbered from 1 starting at the bottom left and instances are numbered row by
+row.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from dataclasses import field
+
+import numpy as np
+import pandas as pd
+
+from .pad_table import PadRows
+from .transform import require_default_frame
+
+_log = logging.getLogger("kicad_testpoints")
+
+_side_columns = ("side", "footprint side")
+
+
+@dataclass
+class PanelSpec:
+    """
+    rows x columns boards at pitch (x, y) mm, the first board is placed at the
+    rails offset. rotations maps (row, column) to degrees counter clockwise and
+    mirrored lists the flipped instances, both are applied about center in the
+    board's report coordinates.
+    """
+
+    rows: int = 1
+    columns: int = 1
+    pitch: tuple[float, float] = (0.0, 0.0)
+    rails: tuple[float, float] = (0.0, 0.0)
+    center: tuple[float, float] = (0.0, 0.0)
+    rotations: dict[tuple[int, int], float] = field(default_factory=dict)
+    mirrored: set[tuple[int, int]] = field(default_factory=set)
+
+    def __post_init__(self):
+        if self.rows < 1 or self.columns < 1:
+            msg = f"Panel needs at least one row and column, got {self.rows} x {self.columns}"
+            raise UserWarning(msg)
+        for instance in (*self.rotations, *self.mirrored):
+            row, column = instance
+            if not (1 <= row <= self.rows and 1 <= column <= self.columns):
+                msg = f"Instance {row},{column} is outside the {self.rows} x {self.columns} panel"
+                raise UserWarning(msg)
+
+    def instances(self) -> list[tuple[int, int]]:
+        return [
+            (row, column)
+            for row in range(1, self.rows + 1)
+            for column in range(1, self.columns + 1)
+        ]
+
+    def transforms(self) -> np.ndarray:
+        """
+        (instances, 2, 3) affine matrices from board to panel coordinates.
+        """
+        matrices = []
+        cx, cy = self.center
+        for row, column in self.instances():
+            angle = math.radians(self.rotations.get((row, column), 0.0))
+            cos, sin = math.cos(angle), math.sin(angle)
+            # Keep right angles exact
+            cos, sin = round(cos, 12), round(sin, 12)
+            mirror = -1.0 if (row, column) in self.mirrored else 1.0
+            linear = np.array([[cos, -sin], [sin, cos]]) @ np.diag([mirror, 1.0])
+            offset = np.array(
+                [
+                    self.rails[0] + (column - 1) * self.pitch[0],
+                    self.rails[1] + (row - 1) * self.pitch[1],
+                ]
+            )
+            center = np.array([cx, cy])
+            translation = center + offset - linear @ center
+            matrices.append(np.column_stack((linear, translation)))
+        return np.array(matrices)
+
+
+def parse_pair(value: str) -> tuple[float, float]:
+    """
+    "x,y" or a single number used for both.
+    """
+    parts = [float(part) for part in str(value).split(",")]
+    if len(parts) == 1:
+        return parts[0], parts[0]
+    try:
+        x, y = parts
+    except ValueError as e:
+        msg = f"Expected x,y got {value}"
+        raise UserWarning(msg) from e
+    return x, y
+
+
+def parse_instance(value: str) -> tuple[int, int]:
+    """
+    Instance from "row,column".
+    """
+    try:
+        row, column = (int(part) for part in str(value).split(","))
+    except ValueError as e:
+        msg = f"Expected row,column got {value}"
+        raise UserWarning(msg) from e
+    return row, column
+
+
+def parse_rotation(value: str) -> tuple[tuple[int, int], float]:
+    """
+    Instance rotation from "row,column=degrees".
+    """
+    instance, sep, degrees = str(value).partition("=")
+    if not sep:
+        msg = f"Expected row,column=degrees got {value}"
+        raise UserWarning(msg)
+    return parse_instance(instance), float(degrees)
+
+
+def panelize(report, spec: PanelSpec) -> pd.DataFrame:
+    """
+    Panel report with every probe of every instance, its panel row, column and
+    instance number and a probe id unique over the panel. report is a report
+    DataFrame, a report table or the rows from build_test_point_report.
+    """
+    if isinstance(report, PadRows):
+        report_df = report.table.to_dataframe()
+    elif isinstance(report, pd.DataFrame):
+        report_df = report
+    else:
+        report_df = pd.DataFrame(report)
+    require_default_frame(report_df, "panelize")
+    n = len(report_df)
+    instances = spec.instances()
+    count = len(instances)
+    matrices = spec.transforms()
+    xy = np.column_stack(
+        (
+            report_df["x"].to_numpy(dtype=float),
+            report_df["y"].to_numpy(dtype=float),
+            np.ones(n),
+        )
+    )
+    # (instances, probes, 2) in one batched product
+    panel_xy = np.einsum("kij,nj->kni", matrices, xy).reshape(-1, 2)
+
+    df = report_df.take(np.tile(np.arange(n), count)).reset_index(drop=True)
+    rows = np.repeat(np.array([row for row, _ in instances]), n)
+    columns = np.repeat(np.array([column for _, column in instances]), n)
+    numbers = np.repeat(np.arange(1, count + 1), n)
+    df["x"] = np.round(panel_xy[:, 0], 4)
+    df["y"] = np.round(panel_xy[:, 1], 4)
+
+    mirrored = [instance in spec.mirrored for instance in instances]
+    for column in _side_columns:
+        if column in df.columns and any(mirrored):
+            sides = report_df[column].astype(str).to_numpy(dtype=object)
+            flipped = np.where(
+                sides == "TOP", "BOTTOM", np.where(sides == "BOTTOM", "TOP", sides)
+            )
+            df[column] = np.concatenate(
+                [flipped if flip else sides for flip in mirrored]
+            )
+
+    # Build the board's ids once and prefix them per instance
+    base = (
+        report_df["source ref des"].astype(str)
+        + ":"
+        + report_df["source pad"].astype(str)
+    ).to_numpy(dtype=object)
+    probe_id = np.concatenate([f"P{number}:" + base for number in range(1, count + 1)])
+    df.insert(0, "probe id", probe_id)
+    df.insert(1, "panel instance", numbers)
+    df.insert(2, "panel row", rows)
+    df.insert(3, "panel column", columns)
+    _log.info("Panel of %d x %d boards, %d probes", spec.rows, spec.columns, len(df))
+    return df
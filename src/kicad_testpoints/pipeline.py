@@ -0,0 +1,505 @@
+"""
+pipeline.py: The report pipelines shared by the CLI commands and batch mode.
+
+pandas is only imported when a step needs it so a by-fab-setting run with CSV
+output stays on the standard library.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from . import coverage
+from . import kicad_testpoints
+from .board_index import BoardIndex
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    from .cache import ReportCache
+    from .pad_filter import PadFilter
+
+_log = logging.getLogger("kicad_testpoints")
+
+# What a bad board, points spreadsheet or output path raises. Runs that report
+# and carry on (batch, watch) catch these, anything else is a bug and is raised
+report_errors = (UserWarning, OSError, ValueError, KeyError, IndexError)
+
+
+@dataclasses.dataclass
+class RunOptions:
+    """
+    How a pipeline reads the board and what it writes besides the report.
+    drill_center selects the aux origin, pad_filter drops pads before their
+    fields are read, settings sets the coordinate origin, units and orientation
+    and coverage_out gets the full coverage tables. workers is the number of
+    processes for a multi board points spreadsheet.
+    """
+
+    drill_center: bool = False
+    backend: str = "auto"
+    cache: ReportCache | None = None
+    coverage_out: str | None = None
+    pad_filter: PadFilter | None = None
+    settings: kicad_testpoints.Settings | None = None
+    workers: int | None = None
+
+    def __post_init__(self):
+        if self.drill_center and self.settings is not None:
+            kicad_testpoints.check_drill_center(self.settings.origin)
+
+    def report_settings(self) -> kicad_testpoints.Settings:
+        """
+        Copy of settings with drill_center applied.
+        """
+        settings = (
+            dataclasses.replace(self.settings)
+            if self.settings is not None
+            else kicad_testpoints.Settings()
+        )
+        settings.use_aux_origin = settings.use_aux_origin or self.drill_center
+        return settings
+
+
+def select_by_fab_setting(
+    index: BoardIndex, pad_filter: PadFilter | None = None
+) -> list:
+    """
+    Pads with the test point fabrication property, raises UserWarning if there are none.
+    """
+    pads = kicad_testpoints.get_pads_by_property(index, pad_filter)
+    if len(pads) == 0:
+        msg = "No pads with fabrication setting found"
+        if pad_filter:
+            msg += " that pass the pad filter"
+        raise UserWarning(msg)
+    return pads
+
+
+def _selection(name: str, pad_filter: PadFilter | None) -> str:
+    return f"{name}:{pad_filter.key()}" if pad_filter else name
+
+
+def extract(
+    pcb,
+    select,
+    selection: str,
+    options: RunOptions | None = None,
+    metrics: Metrics | None = None,
+) -> tuple[dict, dict]:
+    """
+    Return the report table and board metadata, loading the board only on a cache miss.
+    select is called with the BoardIndex and returns the pads to report.
+    selection identifies the pads chosen so it can be part of the cache key.
+    """
+    options = options if options is not None else RunOptions()
+    metrics = metrics if metrics is not None else Metrics()
+    settings = options.report_settings()
+    cache = options.cache
+    key = None
+    if cache is not None:
+        with metrics.stage("cache lookup") as stage:
+            key = cache.key(pcb, settings, selection, options.backend)
+            hit = cache.get(key)
+            stage["count"] = 0 if hit is None else len(hit[0]["net"])
+        if hit is not None:
+            return hit
+
+    with metrics.profile():
+        with metrics.stage("load board"):
+            board = kicad_testpoints.load_board(Path(pcb).as_posix(), options.backend)
+        with metrics.stage("index") as stage:
+            index = BoardIndex(board)
+            stage["count"] = len(index)
+        table, meta = build(index, select, settings, metrics)
+    if cache is not None:
+        with metrics.stage("cache store"):
+            cache.put(key, table, meta)
+    return table, meta
+
+
+def build(
+    index: BoardIndex, select, settings, metrics: Metrics | None = None
+) -> tuple[dict, dict]:
+    """
+    Report table and board metadata from an already indexed board.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    with metrics.stage("select pads") as stage:
+        pads = select(index)
+        stage["count"] = len(pads)
+    with metrics.stage("build table") as stage:
+        table = kicad_testpoints.build_test_point_table(index.board, settings, pads)
+        stage["count"] = len(table["net"])
+    net_pads, net_classes = coverage.board_nets(index)
+    meta = {
+        "nets": sorted(index.net_names),
+        "net pads": net_pads,
+        "net classes": net_classes,
+    }
+    return table, meta
+
+
+def outputs(out) -> list:
+    """
+    List of output paths from one path or a sequence of them.
+    """
+    if isinstance(out, str | Path):
+        return [out]
+    return list(out)
+
+
+def _temporary(out) -> Path:
+    """
+    Empty file next to out with the same extension so the writer is chosen the same.
+    """
+    path = Path(out)
+    fd, name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=path.suffix
+    )
+    os.close(fd)
+    return Path(name)
+
+
+def _excel(fname) -> bool:
+    # file_io.excel_extensions, checked here without importing pandas
+    return Path(fname).suffix.lower() in (".xls", ".xlsx", ".xlsm", ".xlsb")
+
+
+def write_report(
+    table: dict, out, metrics: Metrics | None = None, meta: dict | None = None
+) -> None:
+    """
+    Write the report table to one or more outputs, CSV without going through
+    pandas. Each output is written to a temporary file by its own thread and
+    all are renamed into place once every writer succeeded, so an error leaves
+    no partial or mixed outputs. With the board meta spreadsheet outputs get a
+    summary sheet.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    outs = outputs(out)
+    report_df = None
+    summary = None
+    if any(Path(fname).suffix.lower() != ".csv" for fname in outs):
+        with metrics.stage("dataframe") as stage:
+            from .pad_table import PadTable
+
+            report_df = PadTable.from_columns(table).to_dataframe()
+            stage["count"] = len(report_df)
+    if meta is not None and any(_excel(fname) for fname in outs):
+        summary = coverage.summary(table, meta["net pads"])
+
+    def write(fname, temporary) -> float:
+        start = time.perf_counter()
+        # Each output of several is a stage inside the outer "write"
+        parent = "write" if len(outs) > 1 else None
+        name = f"write {Path(fname).name}" if parent else "write"
+        with metrics.stage(name, parent) as stage:
+            if Path(fname).suffix.lower() == ".csv":
+                kicad_testpoints.write_csv_table(table, temporary)
+            else:
+                from . import file_io
+
+                if _excel(fname) and summary is not None:
+                    file_io.write(report_df, temporary.as_posix(), summary=summary)
+                else:
+                    file_io.write(report_df, temporary.as_posix())
+            stage["count"] = len(table["net"])
+        return time.perf_counter() - start
+
+    temporaries = [_temporary(fname) for fname in outs]
+    try:
+        if len(outs) == 1:
+            write(outs[0], temporaries[0])
+        else:
+            with metrics.stage("write") as stage, ThreadPoolExecutor(len(outs)) as pool:
+                futures = [
+                    pool.submit(write, fname, temporary)
+                    for fname, temporary in zip(outs, temporaries, strict=True)
+                ]
+                for fname, future in zip(outs, futures, strict=True):
+                    _log.info("Wrote %s in %.1f ms", fname, future.result() * 1e3)
+                stage["count"] = len(outs)
+        for fname, temporary in zip(outs, temporaries, strict=True):
+            temporary.replace(fname)
+    finally:
+        for temporary in temporaries:
+            temporary.unlink(missing_ok=True)
+
+
+def summarize(
+    table: dict, meta: dict, coverage_out=None, metrics: Metrics | None = None
+) -> dict:
+    """
+    Log and return the coverage for each run, writing the full coverage tables
+    to coverage_out if set.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    if coverage_out:
+        with metrics.stage("coverage") as stage:
+            from . import file_io
+            from .pad_table import PadTable
+
+            result = coverage.analyze(
+                PadTable.from_columns(table).to_dataframe(),
+                meta["net pads"],
+                meta["net classes"],
+            )
+            coverage.log_summary(result)
+            file_io.write_sheets(result.sheets(), coverage_out)
+            stage["count"] = len(result.nets)
+        _log.info("Coverage saved to: %s", coverage_out)
+        covered, testable = result.covered, result.testable
+    else:
+        with metrics.stage("coverage") as stage:
+            covered, testable, excluded = coverage.count(table["net"], meta["net pads"])
+            stage["count"] = testable
+        coverage.log_counts(covered, testable, excluded)
+    return {"pads": len(table["net"]), "covered nets": covered, "nets": testable}
+
+
+def _saved(pcb, out, summary: dict) -> dict:
+    """
+    Log the outputs and return the run summary.
+    """
+    out = ", ".join(str(fname) for fname in outputs(out))
+    _log.info("Saved to: %s", out)
+    return {"pcb": str(pcb), "out": out, **summary}
+
+
+def by_fab_setting(
+    pcb, out, options: RunOptions | None = None, metrics: Metrics | None = None
+) -> dict:
+    """
+    Write the report for all pads with the test point fabrication property.
+    out is a path or a list of paths, see write_report.
+    """
+    options = options if options is not None else RunOptions()
+    table, meta = extract(
+        pcb,
+        lambda index: select_by_fab_setting(index, options.pad_filter),
+        _selection("by-fab-setting", options.pad_filter),
+        options,
+        metrics,
+    )
+    summary = summarize(table, meta, options.coverage_out, metrics)
+    write_report(table, out, metrics, meta)
+    return _saved(pcb, out, summary)
+
+
+def extract_points(
+    pcb, pairs, options: RunOptions | None = None, metrics: Metrics | None = None
+) -> tuple[dict, dict]:
+    """
+    extract for the (ref des, pad) pairs of a points spreadsheet, in their order.
+    """
+    options = options if options is not None else RunOptions()
+    return extract(
+        pcb,
+        lambda index: kicad_testpoints.get_pads(pairs, index, options.pad_filter),
+        _selection("points:" + json.dumps(pairs), options.pad_filter),
+        options,
+        metrics,
+    )
+
+
+def from_spreadsheet(
+    pcb, points, out, options: RunOptions | None = None, metrics: Metrics | None = None
+) -> dict:
+    """
+    Write the report for the pads listed in the points spreadsheet.
+    out is a path or a list of paths, see write_report.
+    """
+    options = options if options is not None else RunOptions()
+    metrics = metrics if metrics is not None else Metrics()
+    with metrics.stage("read points") as stage:
+        from . import file_io
+
+        pairs = file_io.points_pairs(file_io.read_points(points))
+        stage["count"] = len(pairs)
+    table, meta = extract_points(pcb, pairs, options, metrics)
+    summary = summarize(table, meta, options.coverage_out, metrics)
+    write_report(table, out, metrics, meta)
+    return _saved(pcb, out, summary)
+
+
+def group_boards(points_df, root) -> dict[str, tuple[Path, list]]:
+    """
+    Board name to its path and (ref des, pad) pairs, in order of first
+    appearance. Relative paths are taken from root and names pointing at the
+    same file share one entry so each board is loaded once.
+    """
+    from . import file_io
+
+    boards = {}
+    names = {}
+    for board, group in points_df.groupby("board", sort=False):
+        path = (Path(root) / board).resolve()
+        name = names.setdefault(path, board)
+        pairs = file_io.points_pairs(group)
+        if name in boards:
+            boards[name][1].extend(pairs)
+        else:
+            boards[name] = (path, pairs)
+    return boards
+
+
+def _extract_board(pcb, pairs, options: RunOptions):
+    """
+    extract_points for one board of a multi board points spreadsheet. It can run
+    in a worker process so it returns the stages of its own Metrics.
+    """
+    metrics = Metrics()
+    table, meta = extract_points(pcb, pairs, options, metrics)
+    return table, meta, metrics.stages
+
+
+def from_boards_spreadsheet(
+    points, out, options: RunOptions | None = None, metrics: Metrics | None = None
+) -> dict:
+    """
+    Write one report for a points spreadsheet with a board (or pcb) column.
+    The rows are grouped so each board is loaded and indexed once, the boards
+    are extracted in a process pool and the report gets a board column with
+    the boards in order of first appearance. Coverage is logged for each board
+    and coverage_out gets the coverage tables of every board with a board
+    column and a boards sheet. A single worker, or a run with a cProfile
+    output, runs in this process.
+    """
+    options = options if options is not None else RunOptions()
+    metrics = metrics if metrics is not None else Metrics()
+    coverage_out = options.coverage_out
+    with metrics.stage("read points") as stage:
+        from . import file_io
+
+        points_df = file_io.read_points(points, board=True)
+        boards = group_boards(points_df, Path(points).absolute().parent)
+        stage["count"] = len(points_df)
+    if not boards:
+        msg = f"No points in {points}"
+        raise UserWarning(msg)
+    jobs = [(path, pairs, options) for path, pairs in boards.values()]
+    with metrics.stage("extract boards") as stage:
+        if options.workers == 1 or len(jobs) <= 1 or metrics.profile_out:
+            # cProfile only sees this process
+            with metrics.profile():
+                results = [_extract_board(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=options.workers) as executor:
+                results = list(executor.map(_extract_board, *zip(*jobs, strict=True)))
+        stage["count"] = len(results)
+    for name, (_, _, stages) in zip(boards, results, strict=True):
+        metrics.stages.extend(
+            dataclasses.replace(
+                board_stage,
+                name=f"{name}: {board_stage.name}",
+                parent=f"{name}: {board_stage.parent}"
+                if board_stage.parent
+                else "extract boards",
+            )
+            for board_stage in stages
+        )
+
+    table = {"board": []}
+    boards_summary = []
+    sheets = {}
+    with metrics.stage("coverage") as stage:
+        for name, (board_table, meta, _) in zip(boards, results, strict=True):
+            table["board"].extend([name] * len(board_table["net"]))
+            for key, values in board_table.items():
+                table.setdefault(key, []).extend(values)
+            covered, testable, excluded = coverage.count(
+                board_table["net"], meta["net pads"]
+            )
+            _log.info(
+                "%s: %d / %d testable nets (%d excluded)",
+                name,
+                covered,
+                testable,
+                excluded,
+            )
+            boards_summary.append(
+                {
+                    "board": name,
+                    "pads": len(board_table["net"]),
+                    "covered nets": covered,
+                    "nets": testable,
+                }
+            )
+            if coverage_out:
+                from .pad_table import PadTable
+
+                result = coverage.analyze(
+                    PadTable.from_columns(board_table).to_dataframe(),
+                    meta["net pads"],
+                    meta["net classes"],
+                )
+                for sheet, df in result.sheets().items():
+                    df.insert(0, "board", name)
+                    sheets.setdefault(sheet, []).append(df)
+        stage["count"] = len(boards_summary)
+    if coverage_out:
+        import pandas as pd
+
+        file_io.write_sheets(
+            {
+                "boards": pd.DataFrame(boards_summary),
+                **{
+                    sheet: pd.concat(dfs, ignore_index=True)
+                    for sheet, dfs in sheets.items()
+                },
+            },
+            coverage_out,
+        )
+        _log.info("Coverage saved to: %s", coverage_out)
+
+    write_report(table, out, metrics)
+    return _saved(
+        ", ".join(str(path) for path, _ in boards.values()),
+        out,
+        {
+            "pads": len(table["board"]),
+            "covered nets": sum(line["covered nets"] for line in boards_summary),
+            "nets": sum(line["nets"] for line in boards_summary),
+            "boards": boards_summary,
+        },
+    )
+
+
+def from_ipc356(
+    netlist,
+    out,
+    points=None,
+    coverage_out=None,
+    metrics: Metrics | None = None,
+    **kwargs,
+) -> dict:
+    """
+    Write the report from an IPC-D-356 netlist instead of a board, for all pads
+    or the pads listed in the points spreadsheet. kwargs (transform from
+    ipc356.make_transform, include_vias) are passed to ipc356.read.
+    """
+    from . import ipc356
+
+    metrics = metrics if metrics is not None else Metrics()
+    pairs = None
+    if points is not None:
+        with metrics.stage("read points") as stage:
+            from . import file_io
+
+            pairs = file_io.points_pairs(file_io.read_points(points))
+            stage["count"] = len(pairs)
+    with metrics.stage("read netlist") as stage:
+        table, meta = ipc356.read(netlist, points=pairs, **kwargs)
+        stage["count"] = len(table["net"])
+    summary = summarize(table, meta, coverage_out, metrics)
+    write_report(table, out, metrics, meta)
+    return _saved(netlist, out, summary)
@@ -0,0 +1,180 @@
+"""
+probe_spacing.py: Vectorized probe spacing queries on a uniform grid.
+
+Probes are binned into square cells the size of the search radius so only
+neighbouring cells are compared. All work is done on numpy arrays so checking
+the pitch of a whole fixture does not loop over probes in Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .transform import frame_unit
+from .transform import mirrored_frame
+from .transform import report_frames
+from .transform import units
+
+# Half of the 3x3 neighbourhood, every cell pair is visited once
+_offsets = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+# Fewer points than this have no pairs
+_min_points = 2
+
+
+def _cell_pairs(x: np.ndarray, y: np.ndarray, cell_size: float):
+    """
+    Generate every candidate index pair (i < j for the same cell) from points in
+    the same or an adjacent grid cell.
+    """
+    kx = np.floor((x - x.min()) / cell_size).astype(np.int64)
+    ky = np.floor((y - y.min()) / cell_size).astype(np.int64)
+    width = ky.max() + 3
+    keys = kx * width + ky
+    order = np.argsort(keys, kind="stable")
+    cells, starts, counts = np.unique(
+        keys[order], return_index=True, return_counts=True
+    )
+
+    for dx, dy in _offsets:
+        target = cells + dx * width + dy
+        pos = np.minimum(np.searchsorted(cells, target), len(cells) - 1)
+        found = cells[pos] == target
+        a_cells = np.nonzero(found)[0]
+        b_cells = pos[found]
+        count_a = counts[a_cells]
+        count_b = counts[b_cells]
+        n_pairs = count_a * count_b
+        total = n_pairs.sum()
+        if total == 0:
+            continue
+        pair_cell = np.repeat(np.arange(len(a_cells)), n_pairs)
+        offset = np.arange(total) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+        ia = starts[a_cells][pair_cell] + offset // count_b[pair_cell]
+        ib = starts[b_cells][pair_cell] + offset % count_b[pair_cell]
+        if dx == 0 and dy == 0:
+            keep = ia < ib
+            ia, ib = ia[keep], ib[keep]
+        yield order[ia], order[ib]
+
+
+def pairs_within(x, y, radius: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs of points closer than or equal to radius.
+    Returns index arrays i, j and their distance, each pair listed once.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(x) < _min_points or radius <= 0:
+        return empty
+    found_i, found_j, found_d = [], [], []
+    for i, j in _cell_pairs(x, y, radius):
+        distance = np.hypot(x[i] - x[j], y[i] - y[j])
+        keep = distance <= radius
+        found_i.append(i[keep])
+        found_j.append(j[keep])
+        found_d.append(distance[keep])
+    if not found_i:
+        return empty
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def nearest_neighbours(x, y) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Index and distance of the nearest other point for every point. Points without
+    a neighbour get index -1 and an infinite distance.
+    A grid pass at twice the mean spacing finds most neighbours, the few isolated
+    points left are compared against all points in chunks.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    index = np.full(n, -1, dtype=np.int64)
+    distance = np.full(n, np.inf)
+    if n < _min_points:
+        return index, distance
+
+    radius = 2 * max(np.ptp(x), np.ptp(y)) / np.sqrt(n)
+    i, j, d = pairs_within(x, y, radius)
+    a = np.concatenate((i, j))
+    b = np.concatenate((j, i))
+    d = np.concatenate((d, d))
+    order = np.lexsort((d, a))
+    a, b, d = a[order], b[order], d[order]
+    first = np.unique(a, return_index=True)[1]
+    index[a[first]] = b[first]
+    distance[a[first]] = d[first]
+
+    pending = np.nonzero(index < 0)[0]
+    for chunk in np.array_split(pending, len(pending) * n // 1_000_000 + 1):
+        if len(chunk) == 0:
+            continue
+        rows = np.arange(len(chunk))
+        d = np.hypot(x[chunk, None] - x[None, :], y[chunk, None] - y[None, :])
+        d[rows, chunk] = np.inf
+        nearest = d.argmin(axis=1)
+        index[chunk] = nearest
+        distance[chunk] = d[rows, nearest]
+    return index, distance
+
+
+def pitch_violations(
+    report_df: pd.DataFrame, pitch: float, *, per_side: bool = True
+) -> pd.DataFrame:
+    """
+    Pairs of probes closer than pitch. With per_side only probes on the same
+    side of the board are compared, as they are probed from the same fixture plate.
+    pitch and the distances are in mm, a report in other units is scaled as
+    named in its frame column. Origin and rotation do not change the spacing,
+    mirroring only changes it between the sides.
+    """
+    if not per_side and any(
+        mirrored_frame in frame for frame in report_frames(report_df)
+    ):
+        msg = "Probes on both sides can not be compared in a report with the bottom side mirrored"
+        raise UserWarning(msg)
+    scale = units[frame_unit(report_df, "check-spacing")]
+    limit = pitch * scale
+    columns = ["source ref des", "source pad", "side"]
+    groups = report_df.groupby("side", sort=False) if per_side else [(None, report_df)]
+    frames = []
+    for _, group in groups:
+        i, j, d = pairs_within(group["x"].to_numpy(), group["y"].to_numpy(), limit)
+        keep = d < limit
+        a = group.iloc[i[keep]][columns].reset_index(drop=True)
+        b = group.iloc[j[keep]][columns].reset_index(drop=True)
+        frame = a.add_suffix(" a").join(b.add_suffix(" b"))
+        frame["distance"] = d[keep] / scale
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(
+            columns=[f"{c} a" for c in columns]
+            + [f"{c} b" for c in columns]
+            + ["distance"]
+        )
+    return pd.concat(frames, ignore_index=True).sort_values(
+        "distance", ignore_index=True
+    )
+
+
+def add_nearest_probe(
+    report_df: pd.DataFrame, *, per_side: bool = True
+) -> pd.DataFrame:
+    """
+    Add the nearest probe and its distance to each line of the report.
+    """
+    df = report_df.copy()
+    df["nearest probe"] = ""
+    df["nearest distance"] = np.inf
+    groups = df.groupby("side", sort=False) if per_side else [(None, df)]
+    for _, group in groups:
+        index, distance = nearest_neighbours(
+            group["x"].to_numpy(), group["y"].to_numpy()
+        )
+        found = index >= 0
+        names = (
+            group["source ref des"].astype(str) + ":" + group["source pad"].astype(str)
+        ).to_numpy()
+        nearest = np.where(found, names[np.maximum(index, 0)], "")
+        df.loc[group.index, "nearest probe"] = nearest
+        df.loc[group.index, "nearest distance"] = distance
+    return df
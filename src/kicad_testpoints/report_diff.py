@@ -0,0 +1,143 @@
+"""
+report_diff.py: Changes in the test points between two board revisions.
+
+Both reports are joined on (source ref des, source pad) with a hash join.
+Footprints with repeated pad numbers are matched in order of appearance. Each
+matched probe is checked for movement beyond a tolerance, a changed net and a
+changed side. Unmatched probes are added or removed. All checks run on whole
+columns.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import pipeline
+from .transform import frame_unit
+from .transform import require_same_frame
+from .transform import units
+
+_log = logging.getLogger("kicad_testpoints")
+
+keys = ("source ref des", "source pad")
+changes = ("added", "removed", "moved", "renetted", "side changed")
+_compared = ("net", "side", "x", "y")
+default_tolerance = 0.01
+
+
+def load(fname, options: pipeline.RunOptions | None = None) -> pd.DataFrame:
+    """
+    Read a report spreadsheet, or build the by-fab-setting report of a .kicad_pcb
+    file with options.
+    """
+    if Path(fname).suffix.lower() == ".kicad_pcb":
+        table, _ = pipeline.extract(
+            fname, pipeline.select_by_fab_setting, "by-fab-setting", options
+        )
+        return pd.DataFrame(table)
+    from . import file_io
+
+    return file_io.read_file_to_df(Path(fname).as_posix())
+
+
+def _prepare(report_df: pd.DataFrame) -> pd.DataFrame:
+    missing = [
+        column for column in (*keys, *_compared) if column not in report_df.columns
+    ]
+    if missing:
+        msg = f"Missing columns in report: {', '.join(missing)}"
+        raise UserWarning(msg)
+    df = pd.DataFrame(
+        {
+            "source ref des": report_df["source ref des"].astype(str).str.strip(),
+            "source pad": report_df["source pad"].astype(str).str.strip(),
+            "net": report_df["net"].fillna("").astype(str),
+            "side": report_df["side"].fillna("").astype(str),
+            "x": pd.to_numeric(report_df["x"], errors="coerce"),
+            "y": pd.to_numeric(report_df["y"], errors="coerce"),
+        }
+    )
+    df["occurrence"] = df.groupby(list(keys), sort=False).cumcount()
+    return df
+
+
+def diff(
+    old_df: pd.DataFrame,
+    new_df: pd.DataFrame,
+    tolerance: float = default_tolerance,
+    *,
+    unchanged: bool = False,
+) -> pd.DataFrame:
+    """
+    One row per changed probe with its old and new net, side and position, the
+    distance moved and a change column listing what changed.
+    Set unchanged to keep the probes that did not change. tolerance and the
+    distance are in mm, both reports must be in the same frame and other units
+    are scaled as named in their frame column.
+    """
+    require_same_frame(old_df, new_df, "diff")
+    scale = units[frame_unit(old_df, "diff")]
+    joined = _prepare(old_df).merge(
+        _prepare(new_df),
+        how="outer",
+        on=[*keys, "occurrence"],
+        suffixes=(" old", " new"),
+        indicator=True,
+        sort=False,
+    )
+    old = joined["_merge"].to_numpy() != "right_only"
+    new = joined["_merge"].to_numpy() != "left_only"
+    both = old & new
+    distance = np.hypot(
+        joined["x new"].to_numpy() - joined["x old"].to_numpy(),
+        joined["y new"].to_numpy() - joined["y old"].to_numpy(),
+    )
+    flags = {
+        "added": ~old,
+        "removed": ~new,
+        "moved": both & (distance > tolerance * scale),
+        "renetted": both
+        & (joined["net old"].to_numpy() != joined["net new"].to_numpy()),
+        "side changed": both
+        & (joined["side old"].to_numpy() != joined["side new"].to_numpy()),
+    }
+    change = pd.Series("", index=joined.index)
+    for name in changes:
+        change = change.where(~flags[name], change + "," + name)
+
+    result = pd.DataFrame(
+        {
+            "source ref des": joined["source ref des"],
+            "source pad": joined["source pad"],
+            "change": change.str.lstrip(","),
+            "net old": joined["net old"],
+            "net new": joined["net new"],
+            "side old": joined["side old"],
+            "side new": joined["side new"],
+            "x old": joined["x old"],
+            "y old": joined["y old"],
+            "x new": joined["x new"],
+            "y new": joined["y new"],
+            "distance": np.round(np.where(both, distance / scale, np.nan), 4),
+        }
+    )
+    if not unchanged:
+        result = result[result["change"] != ""]
+    return result.sort_values(list(keys), kind="stable").reset_index(drop=True)
+
+
+def counts(diff_df: pd.DataFrame) -> dict[str, int]:
+    """
+    Number of probes with each kind of change.
+    """
+    listed = diff_df["change"].str.split(",").explode()
+    return {name: int((listed == name).sum()) for name in changes}
+
+
+def log_summary(diff_df: pd.DataFrame) -> None:
+    summary = ", ".join(f"{count} {name}" for name, count in counts(diff_df).items())
+    _log.info("Changes: %s", summary)
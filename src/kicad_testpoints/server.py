@@ -0,0 +1,384 @@
+"""
+server.py: Long running report server that keeps boards loaded.
+
+Boards are loaded once and kept with their BoardIndex in a least recently used
+store. A request stats the board and the .kicad_pro next to it, which holds the
+net class assignments: unchanged sizes and mtimes are a hit, otherwise the
+contents are hashed and the board is only reloaded if a hash changed.
+Requests are JSON posted to /by-fab-setting or /from-spreadsheet over TCP or a
+Unix socket and the report comes back as JSON, CSV or xlsx. Board work is
+serialized as pcbnew is not thread safe, encoding the response is not.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import json
+import logging
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from . import coverage
+from . import kicad_testpoints
+from . import pipeline
+from .board_index import BoardIndex
+from .cache import hash_file
+
+_log = logging.getLogger("kicad_testpoints")
+
+default_host = "127.0.0.1"
+default_port = 8765
+default_max_boards = 8
+modes = ("by-fab-setting", "from-spreadsheet")
+formats = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@dataclass
+class _Entry:
+    index: BoardIndex
+    # (mtime_ns, size) and hash of the board and project, None if missing
+    stats: tuple
+    digest: tuple
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _digest(path: Path) -> str | None:
+    return hash_file(path) if path.exists() else None
+
+
+class BoardStore:
+    """
+    Least recently used store of loaded and indexed boards keyed by their path.
+    """
+
+    def __init__(self, max_boards: int = default_max_boards, backend: str = "auto"):
+        self.max_boards = max_boards
+        self.backend = backend
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, pcb) -> BoardIndex:
+        """
+        Index of the board, loading it if it is new or the contents of the board
+        or its project changed.
+        """
+        path = Path(pcb).resolve()
+        if not path.exists():
+            msg = f"Board {path} not found"
+            raise UserWarning(msg)
+        files = (path, path.with_suffix(".kicad_pro"))
+        stats = tuple(_stat(fname) for fname in files)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry.stats != stats:
+                digest = tuple(_digest(fname) for fname in files)
+                if digest == entry.digest:
+                    entry.stats = stats
+                else:
+                    _log.info("%s changed, reloading", path)
+                    entry = None
+            if entry is not None:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry.index
+
+            self.misses += 1
+            digest = tuple(_digest(fname) for fname in files)
+            board = kicad_testpoints.load_board(path.as_posix(), self.backend)
+            self.entries[path] = _Entry(BoardIndex(board), stats, digest)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_boards:
+                evicted, _ = self.entries.popitem(last=False)
+                _log.debug("Evicted %s", evicted)
+            return self.entries[path].index
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "boards": [str(path) for path in self.entries],
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _points(value) -> list[tuple[str, str]]:
+    """
+    Points from a list of [ref des, pad] pairs or the path of a points spreadsheet.
+    """
+    if isinstance(value, str):
+        from . import file_io
+
+        return file_io.points_pairs(file_io.read_points(value))
+    msg = "points must be a points spreadsheet path or a list of [ref des, pad] pairs"
+    if not isinstance(value, list) or not all(
+        isinstance(pair, list | tuple) for pair in value
+    ):
+        raise UserWarning(msg)
+    try:
+        return [(str(ref_des), str(pad)) for ref_des, pad in value]
+    except ValueError as e:
+        raise UserWarning(msg) from e
+
+
+def report(store: BoardStore, mode: str, params: dict) -> tuple[dict, dict, dict]:
+    """
+    Report table, board meta and summary for a request.
+    """
+    if mode not in modes:
+        msg = f"Unknown request {mode}, choose from {modes}"
+        raise UserWarning(msg)
+    if "pcb" not in params:
+        msg = "Missing pcb"
+        raise UserWarning(msg)
+    if mode == "by-fab-setting":
+        select = pipeline.select_by_fab_setting
+    else:
+        pairs = _points(params.get("points"))
+
+        def select(index):
+            return kicad_testpoints.get_pads(pairs, index)
+
+    settings = kicad_testpoints.Settings()
+    settings.use_aux_origin = bool(params.get("drill_center", False))
+    with store.lock:
+        index = store.get(params["pcb"])
+        table, meta = pipeline.build(index, select, settings)
+    covered, testable, _ = coverage.count(table["net"], meta["net pads"])
+    summary = {
+        "pcb": str(params["pcb"]),
+        "pads": len(table["net"]),
+        "covered nets": covered,
+        "nets": testable,
+    }
+    return table, meta, summary
+
+
+def encode(table: dict, meta: dict, summary: dict, fmt: str) -> bytes:
+    """
+    Response body in one of the formats. xlsx is written like a report file,
+    with the coverage summary sheet.
+    """
+    if fmt == "json":
+        return json.dumps({"summary": summary, "report": table}).encode()
+    if fmt == "csv":
+        text = io.StringIO(newline="")
+        kicad_testpoints.write_csv_rows(table, text)
+        return text.getvalue().encode()
+    if fmt == "xlsx":
+        from . import file_io
+        from .pad_table import PadTable
+
+        buffer = io.BytesIO()
+        file_io.write_xlsx(
+            PadTable.from_columns(table).to_dataframe(),
+            buffer,
+            summary=coverage.summary(table, meta["net pads"]),
+        )
+        return buffer.getvalue()
+    msg = f"Unknown format {fmt}, choose from {tuple(formats)}"
+    raise UserWarning(msg)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "kicad_testpoints"
+
+    def _send(
+        self, status: int, body: bytes, content_type: str = formats["json"]
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}).encode())
+
+    def do_GET(self):  # noqa: N802
+        if self.path.rstrip("/") in ("", "/status"):
+            self._send(200, json.dumps(self.server.store.status()).encode())
+            return
+        self._error(404, f"Unknown path {self.path}")
+
+    def _params(self) -> dict:
+        """
+        Request JSON object, raises UserWarning if it is not one or has an unknown format.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        params = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(params, dict):
+            msg = "Request body must be a JSON object"
+            raise UserWarning(msg)
+        fmt = params.get("format", "json")
+        if fmt not in formats:
+            msg = f"Unknown format {fmt}, choose from {tuple(formats)}"
+            raise UserWarning(msg)
+        return params
+
+    def do_POST(self):  # noqa: N802
+        mode = self.path.strip("/")
+        if mode not in modes:
+            self._error(404, f"Unknown path {self.path}")
+            return
+        try:
+            params = self._params()
+            fmt = params.get("format", "json")
+            table, meta, summary = report(self.server.store, mode, params)
+            body = encode(table, meta, summary, fmt)
+        except (UserWarning, ValueError, OSError) as e:
+            self._error(400, str(e))
+            return
+        _log.info("%s %s: %d pads", mode, params["pcb"], summary["pads"])
+        self._send(200, body, formats[fmt])
+
+    def log_message(self, format, *args):  # noqa: A002
+        _log.debug(format, *args)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("unix", 0)
+
+
+def make_server(
+    store: BoardStore,
+    host: str = default_host,
+    port: int = default_port,
+    socket_path=None,
+):
+    """
+    HTTP server on host and port, or on a Unix socket if socket_path is set.
+    """
+    if socket_path is not None:
+        path = Path(socket_path)
+        if path.is_socket():
+            path.unlink()
+        server = _UnixServer(path.as_posix(), _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.store = store
+    return server
+
+
+def serve(
+    host: str = default_host,
+    port: int = default_port,
+    socket_path=None,
+    max_boards: int = default_max_boards,
+    backend: str = "auto",
+) -> None:
+    store = BoardStore(max_boards, backend)
+    with make_server(store, host, port, socket_path) as server:
+        where = (
+            socket_path
+            if socket_path is not None
+            else "http://{}:{}".format(*server.server_address[:2])
+        )
+        _log.info("Serving on %s", where)
+        with suppress(KeyboardInterrupt):
+            server.serve_forever()
+    if socket_path is not None:
+        Path(socket_path).unlink(missing_ok=True)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(str(self.socket_path))
+
+
+class Client:
+    """
+    Client for the report server, over TCP or a Unix socket if socket_path is set.
+    """
+
+    def __init__(
+        self,
+        host: str = default_host,
+        port: int = default_port,
+        socket_path=None,
+        timeout: float | None = 300,
+    ):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.socket_path is not None:
+            return _UnixConnection(self.socket_path, self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body=None) -> bytes:
+        connection = self._connection()
+        try:
+            headers = {"Content-Type": formats["json"]} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.status != HTTPStatus.OK:
+            msg = json.loads(data).get("error", data.decode())
+            raise UserWarning(msg)
+        return data
+
+    def status(self) -> dict:
+        return json.loads(self._request("GET", "/status"))
+
+    def request(self, mode: str, pcb, points=None, **params) -> bytes:
+        """
+        Raw response body of a report request, raises UserWarning on an error.
+        params are the other request fields, drill_center and format (json, csv
+        or xlsx). Paths are sent absolute as the server may run in another directory.
+        """
+        params = {"pcb": str(Path(pcb).absolute()), **params}
+        if points is not None:
+            params["points"] = (
+                str(Path(points).absolute())
+                if isinstance(points, str | Path)
+                else points
+            )
+        return self._request("POST", f"/{mode}", json.dumps(params).encode())
+
+    def report(
+        self, mode: str, pcb, points=None, *, drill_center: bool = False
+    ) -> dict:
+        """
+        Summary and report table of a request.
+        """
+        return json.loads(self.request(mode, pcb, points, drill_center=drill_center))
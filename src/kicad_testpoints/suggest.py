@@ -0,0 +1,193 @@
+"""
+suggest.py: Pick one probe-able pad for every testable net.
+
+Surface pads can only be probed from their own side, through hole pads from
+either. The side that reaches the most nets is preferred and the other side is
+only used for nets that can not be reached from it. Nets with the fewest
+candidates are placed first, each taking the candidate furthest from the probes
+already placed on the same side. A local improvement pass then moves probes
+that ended up closer than the pitch to a better candidate on their net.
+Distances are looked up in a uniform grid so each query only visits the
+neighbouring cells.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from pathlib import Path
+
+from . import coverage
+from . import pipeline
+
+_log = logging.getLogger("kicad_testpoints")
+
+default_pitch = 2.54
+sides = ("auto", "TOP", "BOTTOM")
+# Candidates further than this many pitches from every probe score the same
+spread = 2.0
+default_passes = 4
+
+
+class _Grid:
+    """
+    Points in square cells of the search radius, queried for the distance to
+    the nearest point within the radius.
+    """
+
+    def __init__(self, radius: float):
+        self.radius = radius
+        self.cells = defaultdict(dict)
+
+    def _key(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.radius), math.floor(y / self.radius)
+
+    def add(self, i: int, x: float, y: float) -> None:
+        self.cells[self._key(x, y)][i] = (x, y)
+
+    def remove(self, i: int, x: float, y: float) -> None:
+        self.cells[self._key(x, y)].pop(i, None)
+
+    def nearest(self, x: float, y: float) -> float:
+        """
+        Distance to the nearest point, the radius if there is none closer.
+        """
+        kx, ky = self._key(x, y)
+        best = self.radius
+        for cx in (kx - 1, kx, kx + 1):
+            for cy in (ky - 1, ky, ky + 1):
+                cell = self.cells.get((cx, cy))
+                if not cell:
+                    continue
+                for px, py in cell.values():
+                    distance = math.hypot(px - x, py - y)
+                    if distance < best:
+                        best = distance
+        return best
+
+
+def _candidates(table: dict, net_pads: dict[str, int], side: str):
+    """
+    Candidate rows and probe side per testable net, and the side used.
+    """
+    thru = [pad_type == "THRU" for pad_type in table["pad type"]]
+    by_net = defaultdict(list)
+    for i, net in enumerate(table["net"]):
+        if not coverage.exclusion(net, net_pads.get(net, 0)):
+            by_net[net].append(i)
+
+    def reachable(rows, plate):
+        return [i for i in rows if thru[i] or table["side"][i] == plate]
+
+    if side == "auto":
+        top = sum(bool(reachable(rows, "TOP")) for rows in by_net.values())
+        bottom = sum(bool(reachable(rows, "BOTTOM")) for rows in by_net.values())
+        side = "BOTTOM" if bottom > top else "TOP"
+    other = "BOTTOM" if side == "TOP" else "TOP"
+
+    candidates = {}
+    for net, rows in by_net.items():
+        preferred = reachable(rows, side)
+        candidates[net] = (
+            (preferred, side) if preferred else (reachable(rows, other), other)
+        )
+    return candidates, side
+
+
+def suggest(
+    table: dict,
+    net_pads: dict[str, int],
+    pitch: float = default_pitch,
+    side: str = "auto",
+    passes: int = default_passes,
+) -> dict[str, list]:
+    """
+    Choose one pad per testable net from a report table of candidate pads.
+    net_pads is the pad count of every board net, used to skip untestable nets.
+    Returns a report table of the chosen pads with the probe side and the
+    distance to the nearest other probe on that side.
+    """
+    if side not in sides:
+        msg = f"Unknown side {side}, choose from {sides}"
+        raise UserWarning(msg)
+    candidates, side = _candidates(table, net_pads, side)
+    x, y = table["x"], table["y"]
+    radius = spread * pitch
+    grids = {"TOP": _Grid(radius), "BOTTOM": _Grid(radius)}
+
+    def best(net):
+        rows, plate = candidates[net]
+        grid = grids[plate]
+        # Ties go to the first candidate so the result is repeatable
+        return max(rows, key=lambda i: (grid.nearest(x[i], y[i]), -i))
+
+    chosen = {}
+    order = sorted(candidates, key=lambda net: (len(candidates[net][0]), net))
+    for net in order:
+        i = best(net)
+        chosen[net] = i
+        grids[candidates[net][1]].add(i, x[i], y[i])
+
+    # Move crowded probes while that increases their spacing
+    for _ in range(passes):
+        moved = 0
+        for net in order:
+            i = chosen[net]
+            grid = grids[candidates[net][1]]
+            grid.remove(i, x[i], y[i])
+            current = grid.nearest(x[i], y[i])
+            if current >= pitch:
+                grid.add(i, x[i], y[i])
+                continue
+            j = best(net)
+            if grid.nearest(x[j], y[j]) > current:
+                chosen[net] = i = j
+                moved += 1
+            grid.add(i, x[i], y[i])
+        _log.debug("Local improvement moved %d probes", moved)
+        if moved == 0:
+            break
+
+    rows = [chosen[net] for net in sorted(chosen)]
+    result = {key: [values[i] for i in rows] for key, values in table.items()}
+    result["probe side"] = [candidates[net][1] for net in sorted(chosen)]
+    spacing = []
+    for net, i in zip(sorted(chosen), rows, strict=True):
+        grid = grids[candidates[net][1]]
+        grid.remove(i, x[i], y[i])
+        spacing.append(round(grid.nearest(x[i], y[i]), 4))
+        grid.add(i, x[i], y[i])
+    result["nearest probe distance"] = spacing
+    crowded = sum(distance < pitch for distance in spacing)
+    _log.info(
+        "Suggested %d probes, %d on %s, %d closer than %.2f mm to another probe",
+        len(rows),
+        sum(plate == side for plate in result["probe side"]),
+        side,
+        crowded,
+        pitch,
+    )
+    return result
+
+
+def suggest_points(
+    pcb, out, options: pipeline.RunOptions | None = None, metrics=None, **kwargs
+) -> dict:
+    """
+    Write a points spreadsheet with the suggested pads, it can be passed
+    straight to from-spreadsheet. options sets how the board is read and
+    kwargs (pitch, side) are passed to suggest.
+    """
+    table, meta = pipeline.extract(
+        pcb, lambda index: index.pads, "all-pads", options, metrics
+    )
+    result = suggest(table, meta["net pads"], **kwargs)
+    pipeline.write_report(result, out, metrics)
+    covered, testable, _ = coverage.count(result["net"], meta["net pads"])
+    _log.info("Covers %d / %d testable nets. Saved to: %s", covered, testable, out)
+    return {
+        "pcb": str(pcb),
+        "out": str(Path(out)),
+        "pads": len(result["net"]),
+        "covered nets": covered,
+        "nets": testable,
+    }
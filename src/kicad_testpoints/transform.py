@@ -0,0 +1,168 @@
+"""
+transform.py: Board to report coordinate transform applied to whole columns.
+
+KiCad positions are in mm from the page origin with y down. The report moves
+them to the chosen origin with y up, rotates the whole board frame, mirrors the
+bottom side probes so they read as seen from below, converts the units and
+rounds once. The default mm transform only needs subtraction and rounding so it
+stays on the standard library, the others run in numpy.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+origins = ("page", "aux", "grid", "custom")
+units = {"mm": 1.0, "inch": 1 / 25.4, "mils": 1000 / 25.4}
+# Decimal places kept for each unit, about 0.1 um or better
+decimals = {"mm": 4, "inch": 6, "mils": 2}
+# Report column naming a frame other than mm from the page or aux origin
+frame_column = "frame"
+mirrored_frame = "bottom mirrored"
+
+
+@dataclass(frozen=True)
+class Transform:
+    """
+    origin is in KiCad mm, rotation in degrees counter clockwise.
+    """
+
+    origin: tuple[float, float] = (0.0, 0.0)
+    unit: str = "mm"
+    rotation: float = 0.0
+    mirror_bottom: bool = False
+
+    def __post_init__(self):
+        if self.unit not in units:
+            msg = f"Unknown unit {self.unit}, choose from {tuple(units)}"
+            raise UserWarning(msg)
+
+    @property
+    def simple(self) -> bool:
+        """
+        Only an origin shift, no rotation, mirroring or scaling.
+        """
+        return self.unit == "mm" and self.rotation % 360 == 0 and not self.mirror_bottom
+
+    def _rotation(self) -> tuple[float, float]:
+        angle = math.radians(self.rotation)
+        # Keep right angles exact
+        return round(math.cos(angle), 15), round(math.sin(angle), 15)
+
+    def frame(self) -> str:
+        """
+        Units, rotation and mirroring of the report frame, empty for mm
+        without rotation or mirroring.
+        """
+        parts = []
+        if self.unit != "mm":
+            parts.append(self.unit)
+        if self.rotation % 360:
+            parts.append(f"rotated {self.rotation:g}")
+        if self.mirror_bottom:
+            parts.append(mirrored_frame)
+        return ", ".join(parts)
+
+    def apply_point(
+        self, x: float, y: float, *, bottom: bool = False
+    ) -> tuple[float, float]:
+        """
+        One KiCad position in mm to report coordinates.
+        """
+        dx, dy = x - self.origin[0], self.origin[1] - y
+        if not self.simple:
+            cos, sin = self._rotation()
+            dx, dy = dx * cos - dy * sin, dx * sin + dy * cos
+            if bottom and self.mirror_bottom:
+                dx = -dx
+            scale = units[self.unit]
+            dx, dy = dx * scale, dy * scale
+        places = decimals[self.unit]
+        return round(dx, places) + 0.0, round(dy, places) + 0.0
+
+    def apply(self, x, y, bottom=None) -> tuple[list[float], list[float]]:
+        """
+        Columns of KiCad positions in mm to report coordinates. bottom marks
+        the probes on the bottom side.
+        """
+        places = decimals[self.unit]
+        ox, oy = self.origin
+        if self.simple:
+            return (
+                [round(value - ox, places) + 0.0 for value in x],
+                [round(oy - value, places) + 0.0 for value in y],
+            )
+        import numpy as np
+
+        dx = np.asarray(x, dtype=float) - ox
+        dy = oy - np.asarray(y, dtype=float)
+        cos, sin = self._rotation()
+        dx, dy = dx * cos - dy * sin, dx * sin + dy * cos
+        if self.mirror_bottom and bottom is not None:
+            dx = np.where(np.asarray(bottom, dtype=bool), -dx, dx)
+        scale = units[self.unit]
+        # Round like apply_point so single pads and columns agree exactly,
+        # adding 0.0 turns -0.0 into 0.0
+        return (
+            [round(value, places) + 0.0 for value in (dx * scale).tolist()],
+            [round(value, places) + 0.0 for value in (dy * scale).tolist()],
+        )
+
+
+def report_frames(report) -> set[str]:
+    """
+    Frame labels of the report, a DataFrame or report table, with "" for rows
+    in the default frame.
+    """
+    if frame_column not in report:
+        return {""}
+    frames = {value if isinstance(value, str) else "" for value in report[frame_column]}
+    return frames or {""}
+
+
+def _describe(frames) -> str:
+    return "; ".join(sorted(frame or "the default frame" for frame in frames))
+
+
+def require_default_frame(report, command: str) -> None:
+    """
+    Raise UserWarning if the report, a DataFrame or report table, was built in
+    a frame other than mm from the page or aux origin. Commands that compare
+    report positions with the board read them that way.
+    """
+    frames = report_frames(report) - {""}
+    if frames:
+        msg = (
+            f"{command} needs a report in mm from the page or aux origin without rotation"
+            f" or mirroring, this report is in {_describe(frames)}"
+        )
+        raise UserWarning(msg)
+
+
+def require_same_frame(old, new, command: str) -> None:
+    """
+    Raise UserWarning unless both reports are in one and the same frame.
+    """
+    old_frames, new_frames = report_frames(old), report_frames(new)
+    if old_frames != new_frames or len(old_frames) > 1:
+        msg = (
+            f"{command} needs both reports in the same frame, the old report is in"
+            f" {_describe(old_frames)} and the new one in {_describe(new_frames)}"
+        )
+        raise UserWarning(msg)
+
+
+def frame_unit(report, command: str) -> str:
+    """
+    Unit of the report positions read from its frame column, mm if it has none.
+    Raises UserWarning if the rows are in different units.
+    """
+    found = {
+        next((part for part in frame.split(", ") if part in units), "mm")
+        for frame in report_frames(report)
+    }
+    if len(found) > 1:
+        msg = f"{command} needs a report in one unit, this report mixes {', '.join(sorted(found))}"
+        raise UserWarning(msg)
+    return found.pop()
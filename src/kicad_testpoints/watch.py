@@ -0,0 +1,238 @@
+"""
+watch.py: Regenerate the report when the board or points file is saved.
+
+The board is split into footprint blocks on each change and only blocks whose
+text changed are parsed again. Report rows are kept per footprint block so an
+edit to one footprint only rebuilds the rows for that footprint. Changes to the
+board level data used by the report (layers, origins, nets, net classes)
+rebuild everything.
+"""
+
+import dataclasses
+import hashlib
+import logging
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from . import file_io
+from . import kicad_pcb_parser
+from . import kicad_testpoints
+from . import pipeline
+from .board_index import BoardIndex
+
+_log = logging.getLogger("kicad_testpoints")
+
+default_interval = 0.2
+default_debounce = 0.5
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode(), usedforsecurity=False).hexdigest()
+
+
+def _file_digest(fname: Path) -> str:
+    return hashlib.sha1(fname.read_bytes(), usedforsecurity=False).hexdigest()
+
+
+class IncrementalReport:
+    """
+    In-memory report that is patched from the changed footprints of the board.
+    Pass points to select pads like from-spreadsheet, otherwise the pads with
+    the test point fabrication property are used.
+    """
+
+    def __init__(self, pcb, *, drill_center: bool = False, points=None, settings=None):
+        self.pcb = Path(pcb)
+        self.points = Path(points) if points else None
+        self.settings = (
+            dataclasses.replace(settings)
+            if settings is not None
+            else kicad_testpoints.Settings()
+        )
+        self.settings.use_aux_origin = self.settings.use_aux_origin or drill_center
+        self.board = None
+        self._header = None
+        self._points_hash = None
+        self._pairs = None
+        self._wanted = {}
+        self._footprints = {}
+        self._rows = {}
+        self.parsed = 0
+
+    def _read_points(self) -> bool:
+        """
+        Re-read the points file, returns True if the selection changed.
+        """
+        if self.points is None:
+            return False
+        points_hash = _file_digest(self.points)
+        if points_hash == self._points_hash:
+            return False
+        self._pairs = file_io.points_pairs(file_io.read_points(self.points.as_posix()))
+        self._points_hash = points_hash
+        return True
+
+    def _select(self, fp) -> list:
+        if self._pairs is None:
+            return [
+                pad
+                for pad in fp.Pads()
+                if pad.GetProperty() == kicad_pcb_parser.PAD_PROP_TESTPOINT
+            ]
+        wanted = self._wanted.get(fp.GetReferenceAsString(), ())
+        first = {}
+        for pad in fp.Pads():
+            first.setdefault(str(pad.GetNumber()), pad)
+        return [first[number] for number in wanted if number in first]
+
+    def update(self) -> pd.DataFrame:
+        """
+        Re-read the changed parts of the board and return the patched report.
+        """
+        text = self.pcb.read_text(encoding="utf-8")
+        header, blocks = kicad_pcb_parser.split_footprints(text)
+        project = self.pcb.with_suffix(".kicad_pro")
+        header_key = _digest(header) + (
+            _file_digest(project) if project.exists() else ""
+        )
+        if header_key != self._header:
+            self.board = kicad_pcb_parser.Board(self.pcb.absolute().as_posix())
+            for entry in kicad_pcb_parser.iter_sexpr(header.splitlines()):
+                self.board.add(entry)
+            if project.exists():
+                self.board.load_project(project)
+            self._header = header_key
+            self._footprints = {}
+            self._rows = {}
+        if self._read_points():
+            self._rows = {}
+            self._wanted = {}
+            for ref_des, pad in self._pairs:
+                self._wanted.setdefault(ref_des, []).append(pad)
+
+        footprints = {}
+        rows = {}
+        self.parsed = 0
+        for block in blocks:
+            key = _digest(block)
+            fp = self._footprints.get(key)
+            if fp is None:
+                fp = kicad_pcb_parser.parse_footprint(self.board, block)
+                self.parsed += 1
+            footprints[key] = fp
+            table = self._rows.get(key)
+            if table is None:
+                table = kicad_testpoints.build_test_point_table(
+                    self.board, self.settings, self._select(fp)
+                )
+            rows[key] = table
+        self._footprints = footprints
+        self._rows = rows
+        self.board.replace_footprints(footprints.values())
+        return pd.DataFrame(self._table(rows))
+
+    def _table(self, rows: dict) -> dict:
+        columns = {key: [] for key in kicad_testpoints._fields}
+        for table in rows.values():
+            for key, values in table.items():
+                columns.setdefault(key, []).extend(values)
+        if self._pairs is None:
+            return columns
+
+        # Order as in the points file, raising the same errors as get_pads
+        position = {}
+        for i, line in enumerate(
+            zip(columns["source ref des"], columns["source pad"], strict=True)
+        ):
+            position.setdefault(line, i)
+        order = []
+        for pair in self._pairs:
+            if pair not in position:
+                BoardIndex(self.board).find_pad(*pair)
+            order.append(position[pair])
+        return {key: [values[i] for i in order] for key, values in columns.items()}
+
+
+def _file_stamp(path: Path) -> tuple | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _stamp(paths: list[Path]) -> tuple:
+    return tuple(_file_stamp(path) for path in paths)
+
+
+def watch(
+    paths: list,
+    on_change,
+    interval: float = default_interval,
+    debounce: float = default_debounce,
+    cycles: int | None = None,
+) -> None:
+    """
+    Call on_change once and then after every change to paths. Rapid saves are
+    merged by waiting until the files are unchanged for the debounce time.
+    pipeline.report_errors from on_change are logged and watching continues.
+    Stops after cycles changes if given, otherwise runs until interrupted.
+    """
+    paths = [Path(path) for path in paths]
+
+    def run():
+        start = time.perf_counter()
+        try:
+            on_change()
+        except (
+            pipeline.report_errors
+        ) as e:  # A save caught mid-write should not end the watch
+            _log.error("Update failed: %s", e)
+            return
+        _log.info("Cycle took %.1f ms", (time.perf_counter() - start) * 1e3)
+
+    last = _stamp(paths)
+    run()
+    done = 0
+    while cycles is None or done < cycles:
+        time.sleep(interval)
+        stamp = _stamp(paths)
+        if stamp == last:
+            continue
+        while True:
+            time.sleep(debounce)
+            settled = _stamp(paths)
+            if settled == stamp:
+                break
+            stamp = settled
+        last = stamp
+        run()
+        done += 1
+
+
+def watch_report(
+    report: IncrementalReport,
+    out,
+    interval: float = default_interval,
+    debounce: float = default_debounce,
+) -> None:
+    """
+    Rewrite out whenever the board or points file of the report changes.
+    """
+
+    def on_change():
+        report_df = report.update()
+        file_io.write(report_df, out)
+        _log.info(
+            "Re-read %d / %d footprints, %d pads. Saved to: %s",
+            report.parsed,
+            len(report.board.GetFootprints()),
+            len(report_df),
+            out,
+        )
+
+    paths = [report.pcb] + ([report.points] if report.points else [])
+    _log.info("Watching %s", ", ".join(str(path) for path in paths))
+    watch(paths, on_change, interval=interval, debounce=debounce)
@@ -0,0 +1,78 @@
+"""Tests for `batch`."""
+
+import json
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from kicad_testpoints import batch
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        (self.root / "points.csv").write_text(
+            "source ref des,source pad\nTP1,1\nTP2,1\n"
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_csv_manifest(self):
+        manifest = self.root / "manifest.csv"
+        manifest.write_text(
+            "pcb,mode,points,out,drill-center\n"
+            f"{data_dir / 'demo_2_pads.kicad_pcb'},from-spreadsheet,points.csv,a.csv,yes\n"
+            f"{data_dir / 'demo_2_pads.kicad_pcb'},,,b.csv,\n"
+        )
+        entries = batch.read_manifest(manifest)
+        assert entries[0]["points"] == (self.root / "points.csv").as_posix()
+        assert entries[0]["drill-center"]
+        assert entries[1]["mode"] == "by-fab-setting"
+        assert not entries[1]["drill-center"]
+
+    def test_invalid_manifest(self):
+        manifest = self.root / "manifest.json"
+        manifest.write_text(
+            json.dumps(
+                [{"pcb": "a.kicad_pcb", "mode": "from-spreadsheet", "out": "a.csv"}]
+            )
+        )
+        with pytest.raises(UserWarning, match="points is required"):
+            batch.read_manifest(manifest)
+
+    def test_failure_does_not_stop_others(self):
+        manifest = self.root / "manifest.json"
+        boards = [
+            {
+                "pcb": (data_dir / "demo_2_pads_aux_origin.kicad_pcb").as_posix(),
+                "mode": "from-spreadsheet",
+                "points": "points.csv",
+                "out": "good.csv",
+                "drill_center": True,
+                "backend": "native",
+            },
+            {"pcb": "missing.kicad_pcb", "out": "missing.csv", "backend": "native"},
+            {
+                "pcb": (data_dir / "demo_2_pads.kicad_pcb").as_posix(),
+                "out": "no_pads.csv",
+                "backend": "native",
+            },
+        ]
+        manifest.write_text(json.dumps({"boards": boards}))
+        results = batch.run_batch(
+            batch.read_manifest(manifest), workers=2, use_cache=False
+        )
+        assert [result["ok"] for result in results] == [True, False, False]
+        assert "No pads with fabrication setting" in results[2]["error"]
+        report = pd.read_csv(self.root / "good.csv")
+        assert report["x"].tolist() == [-42.65, -20.15]
+
+
+if __name__ == "__main__":
+    unittest.main()
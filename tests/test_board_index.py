@@ -0,0 +1,50 @@
+"""Tests for `board_index`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import pytest
+from kicad_testpoints import kicad_pcb_parser
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints.board_index import BoardIndex
+
+from .test_kicad_pcb_parser import rotated_board
+
+
+class TestBoardIndex(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = pathlib.Path(directory) / "board.kicad_pcb"
+            fname.write_text(rotated_board)
+            self.board = kicad_pcb_parser.load_board(fname)
+        self.index = BoardIndex(self.board)
+
+    def test_lookups(self):
+        pads = self.board.GetPads()
+        assert len(self.index) == len(pads)
+        pad = self.index.find_pad("J1", "A1")
+        assert pad.GetParentFootprint().GetReference() == "J1"
+        assert self.index.find_pad("R1", 2).GetNetname() == "/VCC (3V3)"
+        assert self.index.pads_on_net("GND") == [pads[0], pads[2]]
+        assert set(self.index.pads_in_net_class("Default")) == set(pads)
+        assert self.index.net_names == {"", "GND", "/VCC (3V3)"}
+
+    def test_missing_pads(self):
+        with pytest.raises(UserWarning):
+            self.index.find_pad("U1", 1)
+        with pytest.raises(UserWarning, match="Pad 9 not found in module R1"):
+            self.index.find_pad("R1", 9)
+
+    def test_matches_board_queries(self):
+        assert kicad_testpoints.get_pads_by_property(
+            self.index
+        ) == kicad_testpoints.get_pads_by_property(self.board)
+        pairs = (("R1", "1"), ("J1", "3"))
+        assert kicad_testpoints.get_pads(
+            pairs, self.index
+        ) == kicad_testpoints.get_pads(pairs, self.board)
+
+
+if __name__ == "__main__":
+    unittest.main()
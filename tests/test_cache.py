@@ -0,0 +1,109 @@
+"""Tests for `cache`."""
+
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints import pipeline
+from kicad_testpoints.cache import ReportCache
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.cache = ReportCache(self.root / "cache")
+        self.pcb = self.root / "board.kicad_pcb"
+        shutil.copy(data_dir / "demo_2_pads_aux_origin.kicad_pcb", self.pcb)
+        self.points = self.root / "points.csv"
+        self.points.write_text("source ref des,source pad\nTP1,1\nTP2,1\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        table = {
+            "source ref des": ["TP1", "TP2"],
+            "net": ["", "GND"],
+            "x": [1.5, -2.25],
+        }
+        self.cache.put("abc", table, {"nets": ["", "GND"]})
+        assert self.cache.get("abc") == (table, {"nets": ["", "GND"]})
+        assert self.cache.get("missing") is None
+
+    def test_truncated_entry_is_a_miss(self):
+        self.cache.put("abc", {"x": list(range(1000))}, {})
+        path = self.cache.path("abc")
+        path.write_bytes(path.read_bytes()[:100])
+        assert self.cache.get("abc") is None
+        assert not path.exists()
+
+    def test_key_changes(self):
+        settings = kicad_testpoints.Settings()
+        key = self.cache.key(self.pcb, settings, "by-fab-setting")
+        assert key == self.cache.key(self.pcb, settings, "by-fab-setting")
+        assert key != self.cache.key(self.pcb, settings, "points:[]")
+        assert key != self.cache.key(
+            self.pcb, kicad_testpoints.Settings(use_aux_origin=True), "by-fab-setting"
+        )
+        with self.pcb.open("a") as f:
+            f.write("\n")
+        assert key != self.cache.key(self.pcb, settings, "by-fab-setting")
+
+    def test_key_reads_project(self):
+        settings = kicad_testpoints.Settings()
+        key = self.cache.key(self.pcb, settings, "by-fab-setting")
+        project = self.pcb.with_suffix(".kicad_pro")
+        project.write_text('{"net_settings": {"netclass_assignments": {}}}')
+        changed = self.cache.key(self.pcb, settings, "by-fab-setting")
+        assert key != changed
+        project.write_text(
+            '{"net_settings": {"netclass_assignments": {"/GND": "Power"}}}'
+        )
+        assert changed != self.cache.key(self.pcb, settings, "by-fab-setting")
+
+    def test_key_resolves_auto_backend(self):
+        settings = kicad_testpoints.Settings()
+        resolved = kicad_testpoints.resolve_backend("auto")
+        assert resolved in ("pcbnew", "native")
+        assert self.cache.key(
+            self.pcb, settings, "by-fab-setting", "auto"
+        ) == self.cache.key(self.pcb, settings, "by-fab-setting", resolved)
+
+    def test_eviction(self):
+        table = {"x": list(range(1000))}
+        self.cache.put("a", table, {})
+        os.utime(self.cache.path("a"), (1000, 1000))
+        size = self.cache.size()
+        self.cache.max_bytes = int(size * 2.5)
+        self.cache.put("b", table, {})
+        os.utime(self.cache.path("b"), (2000, 2000))
+        # Reading an entry marks it as recently used
+        self.cache.get("a")
+        self.cache.put("c", table, {})
+        kept = {path.stem for path in self.cache.entries()}
+        assert kept == {"a", "c"}
+        assert self.cache.clear() == len(kept)
+
+    def test_warm_run_skips_load(self):
+        out = self.root / "out.csv"
+        options = pipeline.RunOptions(drill_center=True, cache=self.cache)
+        cold = pipeline.from_spreadsheet(self.pcb, self.points, out, options)
+        expected = pd.read_csv(out)
+        with mock.patch.object(
+            kicad_testpoints, "load_board", side_effect=AssertionError
+        ):
+            warm = pipeline.from_spreadsheet(self.pcb, self.points, out, options)
+        assert cold == warm
+        pd.testing.assert_frame_equal(pd.read_csv(out), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Tests for `clearance` and `packed_rtree`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+from kicad_testpoints import clearance
+from kicad_testpoints.packed_rtree import PackedRTree
+
+board = """(kicad_pcb (version 20240108) (generator "pcbnew")
+  (setup (aux_axis_origin 100 100))
+  (gr_rect (start 100 40) (end 160 100) (layer "Edge.Cuts"))
+  (footprint "Lib:U" (layer "F.Cu") (at 130 70 90)
+    (property "Reference" "U1" (at 0 0 0) (layer "F.SilkS"))
+    (fp_rect (start -4 -2) (end 4 2) (layer "F.CrtYd"))
+    (pad "1" smd rect (at -3 0) (size 1 1) (layers "F.Cu" "F.Mask"))
+  )
+  (footprint "Lib:R" (layer "B.Cu") (at 140 70)
+    (property "Reference" "R1" (at 0 0 0) (layer "B.SilkS"))
+    (fp_line (start -2 -1) (end 2 -1) (layer "B.CrtYd"))
+    (fp_line (start 2 1) (end -2 1) (layer "B.CrtYd"))
+  )
+  (footprint "MountingHole:MountingHole_3.2mm" (layer "F.Cu") (at 110 50)
+    (property "Reference" "H1" (at 0 0 0) (layer "F.SilkS"))
+    (pad "" np_thru_hole circle (at 0 0) (size 3.2 3.2) (drill 3.2) (layers "*.Cu" "*.Mask"))
+  )
+)
+"""
+
+
+class TestPackedRTree(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        low = rng.uniform(0, 100, (500, 2))
+        boxes = np.column_stack((low, low + rng.uniform(0, 5, (500, 2))))
+        tree = PackedRTree(boxes, node_size=4)
+        x = rng.uniform(0, 100, 50)
+        y = rng.uniform(0, 100, 50)
+        query, item = tree.query_radius(x, y, 3.0)
+        expected = {
+            (q, i)
+            for q in range(50)
+            for i in range(500)
+            if boxes[i, 0] <= x[q] + 3
+            and boxes[i, 2] >= x[q] - 3
+            and boxes[i, 1] <= y[q] + 3
+            and boxes[i, 3] >= y[q] - 3
+        }
+        assert set(zip(query.tolist(), item.tolist(), strict=True)) == expected
+
+    def test_empty(self):
+        query, item = PackedRTree([]).query_radius([1.0], [1.0], 1.0)
+        assert (len(query), len(item)) == (0, 0)
+
+
+class TestClearance(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        pcb = pathlib.Path(self.directory.name) / "board.kicad_pcb"
+        pcb.write_text(board)
+        self.geometry = clearance.read_geometry(pcb)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def report(self, lines):
+        keys = (
+            "source ref des",
+            "source pad",
+            "x",
+            "y",
+            "side",
+            "footprint side",
+            "pad type",
+        )
+        return pd.DataFrame(lines, columns=keys)
+
+    def test_geometry(self):
+        assert (len(self.geometry.edges), self.geometry.aux_origin) == (
+            4,
+            (100.0, 100.0),
+        )
+        # Rotated by 90 degrees the courtyard is 4 wide and 8 tall
+        np.testing.assert_allclose(self.geometry.courtyards[0], (128, 66, 132, 74))
+        assert list(self.geometry.courtyard_side) == ["TOP", "BOTTOM"]
+        np.testing.assert_allclose(self.geometry.holes, [(110, 50, 1.6)])
+
+    def test_check(self):
+        report = self.report(
+            [
+                # Board coordinates with y up, the aux origin is the bottom left corner
+                ("TP1", "1", 1.0, 30.0, "TOP", "TOP", "SMT"),
+                ("TP2", "1", 27.5, 30.0, "TOP", "TOP", "SMT"),
+                ("U1", "1", 30.0, 33.0, "TOP", "TOP", "SMT"),
+                ("TP3", "1", 40.0, 31.5, "TOP", "BOTTOM", "SMT"),
+                ("TP4", "1", 40.0, 31.5, "TOP", "TOP", "SMT"),
+                ("TP5", "1", 12.0, 50.0, "TOP", "TOP", "SMT"),
+                ("TP6", "1", 30.0, 20.0, "TOP", "TOP", "SMT"),
+            ]
+        )
+        checked = clearance.check(
+            report, self.geometry, clearance.make_rules(), drill_center=True
+        )
+        violation = dict(
+            zip(checked["source ref des"], checked["clearance violation"], strict=True)
+        )
+        assert violation == {
+            "TP1": "edge",
+            "TP2": "courtyard",
+            "U1": "",
+            "TP3": "courtyard",
+            "TP4": "",
+            "TP5": "hole",
+            "TP6": "",
+        }
+        by_ref = checked.set_index("source ref des")
+        assert by_ref.loc["TP1", "edge distance"] == pytest.approx(1.0)
+        assert by_ref.loc["TP2", "courtyard distance"] == pytest.approx(0.5)
+        assert by_ref.loc["TP3", "courtyard ref des"] == "R1"
+        assert by_ref.loc["TP5", "hole distance"] == pytest.approx(0.4)
+        assert np.isnan(by_ref.loc["TP6", "edge distance"])
+
+    def test_rules_per_side(self):
+        rules = clearance.make_rules(edge="TOP=0.5,BOTTOM=2")
+        assert (rules["TOP"].edge, rules["BOTTOM"].edge) == (0.5, 2.0)
+        assert rules["TOP"].hole == clearance.Rules().hole
+        report = self.report(
+            [
+                ("TP1", "1", 1.0, 30.0, "TOP", "TOP", "SMT"),
+                ("TP2", "1", 1.0, 30.0, "TOP", "BOTTOM", "SMT"),
+                ("TP3", "1", 1.0, 30.0, "TOP", "BOTTOM", "THRU"),
+            ]
+        )
+        checked = clearance.check(report, self.geometry, rules, drill_center=True)
+        assert list(checked["clearance violation"]) == ["", "edge", ""]
+        with pytest.raises(UserWarning):
+            clearance.parse_rule("LEFT=1", 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
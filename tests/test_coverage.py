@@ -0,0 +1,77 @@
+"""Tests for `coverage`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from kicad_testpoints import coverage
+from kicad_testpoints import pipeline
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.net_pads = {
+            "": 3,
+            "GND": 5,
+            "VCC": 2,
+            "unconnected-(U1-Pad3)": 1,
+            "SIG": 2,
+            "ONE": 1,
+            "BOT": 2,
+        }
+        self.net_classes = {"GND": "Power", "VCC": "Power"}
+        self.report_df = pd.DataFrame(
+            {
+                "net": ["GND", "GND", "VCC", "BOT"],
+                "side": ["TOP", "BOTTOM", "BOTTOM", "BOTTOM"],
+                "pad type": ["SMT", "THRU", "THRU", "SMT"],
+            }
+        )
+
+    def test_analyze(self):
+        result = coverage.analyze(self.report_df, self.net_pads, self.net_classes)
+        assert (result.covered, result.testable) == (3, 4)
+        assert result.uncovered == ["SIG"]
+
+        nets = result.nets.set_index("net")
+        assert nets.loc["", "excluded"] == "no net"
+        assert nets.loc["ONE", "excluded"] == "single pad"
+        assert nets.loc["unconnected-(U1-Pad3)", "excluded"] == "no connect"
+        assert nets.index[nets["only thru"]].tolist() == ["VCC"]
+        assert sorted(nets.index[nets["only bottom"]]) == ["BOT", "VCC"]
+
+        by_class = result.by_net_class.set_index("net class")
+        assert by_class.loc["Power", ["covered", "nets"]].tolist() == [2, 2]
+        assert by_class.loc["Default", ["covered", "nets"]].tolist() == [1, 2]
+        assert by_class.loc["Default", "coverage"] == pytest.approx(0.5)
+        by_side = result.by_side.set_index("side")
+        assert by_side.loc[["TOP", "BOTTOM"], "covered"].tolist() == [1, 3]
+
+    def test_pipeline_writes_coverage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = pathlib.Path(directory)
+            points = root / "points.csv"
+            points.write_text("source ref des,source pad\nTP1,1\n")
+            summary = pipeline.from_spreadsheet(
+                data_dir / "demo_2_pads.kicad_pcb",
+                points,
+                root / "out.csv",
+                pipeline.RunOptions(coverage_out=root / "coverage.csv"),
+            )
+            assert summary["nets"] == 0
+            written = sorted(path.name for path in root.glob("coverage-*.csv"))
+            assert written == [
+                "coverage-net-classes.csv",
+                "coverage-nets.csv",
+                "coverage-sides.csv",
+            ]
+            nets = pd.read_csv(root / "coverage-nets.csv", keep_default_na=False)
+            assert nets["excluded"].tolist() == ["no net"]
+
+
+if __name__ == "__main__":
+    unittest.main()
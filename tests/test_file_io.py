@@ -1,8 +1,28 @@
 """Tests for `kicad_parts_placer` package."""
 
+import importlib.util
+import pathlib
+import tempfile
 import unittest
+
+import pandas as pd
+import pytest
 from kicad_testpoints import file_io
-import tempfile
+
+has_pyarrow = importlib.util.find_spec("pyarrow") is not None
+has_ods = importlib.util.find_spec("pyexcel_ods3") is not None
+
+report_df = pd.DataFrame(
+    {
+        "source ref des": ["TP1", "TP2", "TP3"],
+        "source pad": ["1", "1", "A2"],
+        "net": ["GND", "GND", "/VCC"],
+        "net class": ["Default", "Default", "Power"],
+        "side": ["TOP", "BOTTOM", "TOP"],
+        "x": [1.5, 2.0, -3.25],
+        "y": [0.0, 4.5, 1.0],
+    }
+)
 
 class TestFileIO(unittest.TestCase):
     def test_read_csv_to_df_comma(self):
@@ -55,6 +75,85 @@ class TestFileIO(unittest.TestCase):
             assert df.columns[0] == "hello"
             assert df.columns[1] == "world"
 
+    def test_read_points_only_needed_columns(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = f"{directory}/points.csv"
+            pathlib.Path(fname).write_text("# probes\nnote;source ref des;source pad\nx;TP1;1\ny;TP2; A1 \nz;TP3;01\n")
+
+            df = file_io.read_points(fname, chunksize=2)
+            assert list(df.columns) == ["source ref des", "source pad"]
+            assert file_io.points_pairs(df) == [("TP1", "1"), ("TP2", "A1"), ("TP3", "01")]
+
+    def test_read_points_reports_all_malformed_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = f"{directory}/points.csv"
+            pathlib.Path(fname).write_text("source ref des,source pad\nTP1,1\n,2\nTP3,\nTP4,4\n,\n")
+
+            with pytest.raises(UserWarning) as context:
+                file_io.read_points(fname, chunksize=2)
+            assert "3 rows" in str(context.value)
+            assert str(context.value).endswith(": 2, 3, 5")
+
+    def test_read_points_missing_column(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = f"{directory}/points.csv"
+            pathlib.Path(fname).write_text("source ref des,pad\nTP1,1\n")
+
+            with pytest.raises(UserWarning):
+                file_io.read_points(fname)
+
+    @unittest.skipIf(not has_pyarrow, "pyarrow not installed")
+    def test_columnar_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for ext in ("parquet", "feather", "arrow"):
+                fname = f"{directory}/report.{ext}"
+                file_io.write(report_df, fname)
+                df = file_io.read_file_to_df(fname)
+                assert str(df["net"].dtype) == "category"
+                assert str(df["side"].dtype) == "category"
+                pd.testing.assert_frame_equal(
+                    df.astype({"net": str, "net class": str, "side": str}),
+                    report_df,
+                    check_dtype=False,
+                )
+
+            table = file_io.read_arrow_table(f"{directory}/report.arrow", columns=["net"])
+            assert table.column("net").to_pylist() == ["GND", "GND", "/VCC"]
+
+    @unittest.skipIf(not has_ods, "pyexcel-ods3 not installed")
+    def test_ods_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = f"{directory}/report.ods"
+            file_io.write(report_df, fname)
+            df = file_io.read_file_to_df(fname)
+            assert list(df.columns) == ["", *report_df.columns]
+            assert df["net"].tolist() == report_df["net"].tolist()
+            assert df["x"].tolist() == report_df["x"].tolist()
+            assert file_io.points_pairs(file_io.read_points(fname)) == [
+                ("TP1", "1"),
+                ("TP2", "1"),
+                ("TP3", "A2"),
+            ]
+
+    def test_xlsx_streaming_layout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = f"{directory}/report.xlsx"
+            summary = pd.DataFrame({"item": ["probes"], "value": [3]})
+            file_io.write(report_df.astype({"net": "category"}), fname, summary=summary)
+            df = pd.read_excel(fname, index_col=0)
+            pd.testing.assert_frame_equal(df.reset_index(drop=True), report_df)
+            assert pd.read_excel(fname, sheet_name="summary").to_dict("list") == {
+                "item": ["probes"],
+                "value": [3],
+            }
+
+            import openpyxl
+
+            sheet = openpyxl.load_workbook(fname)["Sheet1"]
+            assert sheet.freeze_panes == "B2"
+            assert sheet["B1"].font.bold
+            assert sheet.column_dimensions["B"].width == len("source ref des") + 2
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,106 @@
+"""Tests for `ipc356`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from kicad_testpoints import cli
+from kicad_testpoints import ipc356
+from kicad_testpoints.kicad_testpoints import _fields
+
+
+def feature(net, pad, access, position, drill=""):
+    """
+    Fixed column IPC-D-356 feature record, through hole if it has a drill.
+    """
+    code = "317" if drill else "327"
+    ref_des, pin = pad
+    x, y = position
+    drill = f"D{drill:04d}P" if drill else ""
+    return (
+        f"{code}{net:<14}   {ref_des:<6}-{pin:<4} {drill:<6}A{access:02d}"
+        f"X{x:+07d}Y{y:+07d}X0100Y0100R000 S0"
+    )
+
+
+netlist = "\n".join(
+    [
+        "C  IPC-D-356 test netlist",
+        "P  JOB   demo",
+        "P  UNITS CUST 1",
+        "P  NNAME1     /a/very/long/net/name",
+        feature("GND", ("TP1", "1"), 1, (12700, -50800)),
+        feature("NNAME1", ("TP2", "1"), 2, (1000, 2000)),
+        feature("GND", ("J1", "2"), 0, (5000, -5000), drill=40),
+        feature("NNAME1", ("VIA", ""), 0, (3000, 3000), drill=12),
+        feature("N/C", ("R1", "1"), 1, (0, 0)),
+        "367                 H1    -    D0320U A00X+001000Y+001000",
+        "999",
+        feature("GND", ("TP9", "1"), 1, (0, 0)),
+    ]
+)
+
+
+class TestIpc356(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.netlist = self.root / "board.d356"
+        self.netlist.write_text(netlist + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read(self):
+        table, meta = ipc356.read(self.netlist)
+        assert list(table) == list(_fields)
+        assert table["source ref des"] == ["TP1", "TP2", "J1", "R1"]
+        assert table["net"] == ["GND", "/a/very/long/net/name", "GND", ""]
+        assert table["side"] == ["TOP", "BOTTOM", "TOP", "TOP"]
+        assert table["pad type"] == ["SMT", "SMT", "THRU", "SMT"]
+        assert table["x"][:2] == [12.7, 1.0]
+        assert table["y"][:2] == [-50.8, 2.0]
+        assert meta["net pads"] == {"GND": 2, "/a/very/long/net/name": 1, "": 1}
+
+    def test_inch_units_and_transform(self):
+        self.netlist.write_text(netlist.replace("CUST 1", "CUST 0"))
+        transform = ipc356.make_transform(origin=(2.54, 0.0), unit="inch")
+        table, _ = ipc356.read(self.netlist, transform, include_vias=True)
+        assert "VIA" in table["source ref des"]
+        # 12700 x 0.0001 inch from a 0.1 inch origin
+        assert (table["x"][0], table["y"][0]) == (1.17, -5.08)
+        assert set(table["frame"]) == {"origin 2.54,0, inch"}
+
+    def test_points(self):
+        table, _ = ipc356.read(self.netlist, points=[("J1", "2"), ("TP1", "1")])
+        assert table["source ref des"] == ["J1", "TP1"]
+        with pytest.raises(UserWarning):
+            ipc356.read(self.netlist, points=[("TP7", "1")])
+
+    def test_cli(self):
+        out = self.root / "report.csv"
+        result = CliRunner().invoke(
+            cli.gr1, ["from-ipc356", "--netlist", str(self.netlist), "--out", str(out)]
+        )
+        assert result.exit_code == 0, result.output
+        report_df = pd.read_csv(out, index_col=0)
+        assert list(report_df["source ref des"]) == ["TP1", "TP2", "J1", "R1"]
+
+    def test_large_netlist(self):
+        count, nets = 100_000, 5000
+        lines = ["P  UNITS CUST 1"]
+        lines.extend(
+            feature(f"N{i % nets}", (f"TP{i % 10000}", str(i // 10000)), 1, (i, -i))
+            for i in range(count)
+        )
+        self.netlist.write_text("\n".join(lines) + "\n999\n")
+        table, meta = ipc356.read(self.netlist)
+        assert (len(table["net"]), len(meta["net pads"])) == (count, nets)
+        assert table["x"][-1:] == [99.999]
+
+
+if __name__ == "__main__":
+    unittest.main()
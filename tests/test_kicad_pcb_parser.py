@@ -0,0 +1,157 @@
+"""Tests for the native `kicad_pcb_parser` backend."""
+
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from kicad_testpoints import kicad_pcb_parser
+from kicad_testpoints import kicad_testpoints
+
+try:
+    import pcbnew
+except ImportError:
+    pcbnew = None
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+rotated_board = """(kicad_pcb (version 20240108) (generator "pcbnew")
+  (layers (0 "F.Cu" signal) (31 "B.Cu" signal) (44 "Edge.Cuts" user))
+  (setup (aux_axis_origin 10 20) (pcbplotparams (layerselection 0x1)))
+  (net 0 "")
+  (net 1 "GND")
+  (net 2 "/VCC (3V3)")
+  (gr_line (start 0 0) (end 10 0) (layer "Edge.Cuts"))
+  (footprint "Lib:R" (layer "F.Cu") (at 100 50 90)
+    (property "Reference" "R1" (at 0 0 0) (layer "F.SilkS"))
+    (fp_line (start -1 -1) (end 1 1) (layer "F.CrtYd"))
+    (pad "1" smd rect (at -1 0 90) (size 1 1) (layers "F.Cu" "F.Mask")
+      (net 1 "GND") (property pad_prop_testpoint))
+    (pad "2" smd rect (at 1 0 90) (size 1 1) (layers "F.Cu" "F.Mask")
+      (net 2 "/VCC (3V3)"))
+  )
+  (footprint "Lib:J" (layer "B.Cu") (at 120 60)
+    (property "Reference" "J1" (at 0 0 0) (layer "B.SilkS"))
+    (pad "A1" thru_hole circle (at 2.54 0) (size 1.7 1.7) (drill 1)
+      (layers "*.Cu" "*.Mask") (net 1 "GND") (property pad_prop_testpoint))
+    (pad "3" smd rect (at 0 1.5) (size 1 1) (layers "B.Cu" "B.Mask"))
+  )
+)
+"""
+
+
+class TestKicadPcbParser(unittest.TestCase):
+    def setUp(self):
+        self.settings = kicad_testpoints.Settings()
+
+    def load_text(self, text):
+        with tempfile.TemporaryDirectory() as directory:
+            fname = pathlib.Path(directory) / "board.kicad_pcb"
+            fname.write_text(text)
+            return kicad_pcb_parser.load_board(fname)
+
+    def test_get_pad_position_file_origin(self):
+        board = kicad_pcb_parser.load_board(data_dir / "demo_2_pads.kicad_pcb")
+        pads = kicad_testpoints.get_pads((("TP1", 1), ("TP2", 1)), board)
+        positions = [
+            kicad_testpoints.get_pad_position(pad, self.settings) for pad in pads
+        ]
+        expectations = ((113.25, -75.5), (135.75, -104.1))
+        for position, expected in zip(positions, expectations, strict=False):
+            assert position[0] == pytest.approx(expected[0])
+            assert position[1] == pytest.approx(expected[1])
+
+    def test_get_pad_position_aux_origin(self):
+        self.settings.use_aux_origin = True
+        board = kicad_pcb_parser.load_board(data_dir / "demo_2_pads-out.kicad_pcb")
+        pads = kicad_testpoints.get_pads((("TP1", 1), ("TP2", 1)), board)
+        positions = [
+            kicad_testpoints.get_pad_position(pad, self.settings) for pad in pads
+        ]
+        expectations = ((13.25, 24.5), (35.75, -4.1))
+        for position, expected in zip(positions, expectations, strict=False):
+            assert position[0] == pytest.approx(expected[0])
+            assert position[1] == pytest.approx(expected[1])
+
+    def test_rotated_and_flipped_footprints(self):
+        board = self.load_text(rotated_board)
+        report = kicad_testpoints.build_test_point_report(
+            board, self.settings, board.GetPads()
+        )
+        assert isinstance(report, list)
+        by_pad = {(line["source ref des"], line["source pad"]): line for line in report}
+        assert len(by_pad) == len(board.GetPads())
+        assert by_pad[("R1", "1")]["x"] == pytest.approx(100)
+        assert by_pad[("R1", "1")]["y"] == pytest.approx(-51)
+        assert by_pad[("R1", "2")]["y"] == pytest.approx(-49)
+        assert by_pad[("R1", "2")]["net"] == "/VCC (3V3)"
+        assert by_pad[("J1", "A1")]["pad type"] == "THRU"
+        assert by_pad[("J1", "A1")]["footprint side"] == "BOTTOM"
+        assert by_pad[("J1", "A1")]["side"] == "BOTTOM"
+        assert by_pad[("J1", "3")]["net"] == ""
+        assert by_pad[("J1", "3")]["side"] == "BOTTOM"
+        assert by_pad[("R1", "1")]["net class"] == "Default"
+
+    def test_pads_by_property(self):
+        board = self.load_text(rotated_board)
+        pads = kicad_testpoints.get_pads_by_property(board)
+        names = [(p.GetParentFootprint().GetReference(), p.GetNumber()) for p in pads]
+        assert names == [("R1", "1"), ("J1", "A1")]
+        assert set(board.GetNetsByName()) == {"", "GND", "/VCC (3V3)"}
+        assert board.GetDesignSettings().GetAuxOrigin() == (10e6, 20e6)
+
+    def test_table_matches_field_getters(self):
+        board = self.load_text(rotated_board)
+        self.settings.use_aux_origin = True
+        pads = board.GetPads()
+        table = kicad_testpoints.build_test_point_table(board, self.settings, pads)
+        expected = {
+            key: [getter(p, settings=self.settings) for p in pads]
+            for key, getter in kicad_testpoints._fields.items()
+        }
+        assert table == expected
+
+    def test_csv_matches_pandas(self):
+        board = self.load_text(rotated_board)
+        table = kicad_testpoints.build_test_point_table(
+            board, self.settings, board.GetPads()
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            fname = pathlib.Path(directory) / "report.csv"
+            kicad_testpoints.write_csv_table(table, fname)
+            expected = pathlib.Path(directory) / "expected.csv"
+            pd.DataFrame(table).to_csv(expected)
+            assert fname.read_bytes() == expected.read_bytes()
+
+    def test_cli_import_is_light(self):
+        code = "import sys, kicad_testpoints.cli; print('pandas' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],  # noqa: S603
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "False"
+
+    @unittest.skipIf(pcbnew is None, "pcbnew not installed")
+    def test_parity_with_pcbnew(self):
+        for fname in sorted(data_dir.glob("*.kicad_pcb")):
+            for use_aux_origin in (False, True):
+                settings = kicad_testpoints.Settings(use_aux_origin=use_aux_origin)
+                reports = []
+                for backend in ("pcbnew", "native"):
+                    board = kicad_testpoints.load_board(fname, backend)
+                    reports.append(
+                        kicad_testpoints.build_test_point_report(
+                            board, settings, list(board.GetPads())
+                        )
+                    )
+                with self.subTest(fname=fname.name, use_aux_origin=use_aux_origin):
+                    assert reports[0] == reports[1]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for `metrics`."""
+
+import json
+import pathlib
+import pstats
+import tempfile
+import unittest
+
+import pytest
+from kicad_testpoints import pipeline
+from kicad_testpoints.metrics import Metrics
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.points = self.root / "points.csv"
+        self.points.write_text("source ref des,source pad\nTP1,1\nTP2,1\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pipeline_stages(self):
+        finished = []
+        metrics = Metrics(
+            profile_out=self.root / "extract.prof", on_stage=finished.append
+        )
+        pipeline.from_spreadsheet(
+            data_dir / "demo_2_pads.kicad_pcb",
+            self.points,
+            self.root / "report.csv",
+            pipeline.RunOptions(backend="native"),
+            metrics,
+        )
+        names = [stage.name for stage in metrics.stages]
+        assert names == [
+            "read points",
+            "load board",
+            "index",
+            "select pads",
+            "build table",
+            "coverage",
+            "write",
+        ]
+        assert finished == metrics.stages
+        counts = {stage.name: stage.count for stage in metrics.stages}
+        assert (counts["read points"], counts["build table"]) == (2, 2)
+        assert all(stage.seconds >= 0 for stage in metrics.stages)
+
+        stats = pstats.Stats(str(self.root / "extract.prof"))
+        assert any(name == "load_board" for _, _, name in stats.stats)
+
+        metrics.write_json(self.root / "metrics.json")
+        data = json.loads((self.root / "metrics.json").read_text())
+        assert [stage["name"] for stage in data["stages"]] == names
+        assert data["seconds"] == pytest.approx(metrics.seconds)
+
+    def test_nested_stages_not_counted_twice(self):
+        metrics = Metrics()
+        pipeline.from_spreadsheet(
+            data_dir / "demo_2_pads.kicad_pcb",
+            self.points,
+            [self.root / "first.csv", self.root / "second.csv"],
+            pipeline.RunOptions(backend="native"),
+            metrics,
+        )
+        nested = [stage for stage in metrics.stages if stage.parent is not None]
+        assert [stage.parent for stage in nested] == ["write", "write"]
+        top = [stage for stage in metrics.stages if stage.parent is None]
+        assert metrics.seconds == pytest.approx(sum(stage.seconds for stage in top))
+        assert metrics.as_dict()["stages"][-1]["parent"] is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for `pad_filter`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import pytest
+from kicad_testpoints import kicad_pcb_parser
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints import pipeline
+from kicad_testpoints.board_index import BoardIndex
+from kicad_testpoints.pad_filter import PadFilter
+
+from .test_kicad_pcb_parser import rotated_board
+
+
+def names(pads):
+    return [(p.GetParentFootprint().GetReference(), p.GetNumber()) for p in pads]
+
+
+class TestPadFilter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pcb = pathlib.Path(self.directory.name) / "board.kicad_pcb"
+        self.pcb.write_text(rotated_board)
+        self.index = BoardIndex(kicad_pcb_parser.load_board(self.pcb))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_filters(self):
+        pads = self.index.pads
+
+        def kept(**kwargs):
+            return names(PadFilter(**kwargs).apply(pads, self.index))
+
+        assert kept() == names(pads)
+        assert kept(pad_type="THRU") == [("J1", "A1")]
+        assert kept(side="BOTTOM") == [("J1", "A1"), ("J1", "3")]
+        assert kept(net_regex="^GND$") == [("R1", "1"), ("J1", "A1")]
+        assert kept(net_regex="VCC") == [("R1", "2")]
+        assert kept(ref_des_globs=("R*",), pad_type="SMT") == [("R1", "1"), ("R1", "2")]
+        j1_pads = [("J1", "A1"), ("J1", "3")]
+        assert kept(net_classes=("Default",), ref_des_globs=("J?",)) == j1_pads
+        assert kept(net_classes=("!Default",)) == []
+
+    def test_get_pads(self):
+        pad_filter = PadFilter(ref_des_globs=("J*",))
+        pads = kicad_testpoints.get_pads_by_property(self.index, pad_filter)
+        assert names(pads) == [("J1", "A1")]
+        pads = kicad_testpoints.get_pads(
+            (("R1", 1), ("J1", "3")), self.index, pad_filter
+        )
+        assert names(pads) == [("J1", "3")]
+
+    def test_invalid(self):
+        with pytest.raises(UserWarning):
+            PadFilter(net_regex="(")
+        with pytest.raises(UserWarning):
+            PadFilter(side="LEFT")
+
+    def test_pipeline(self):
+        out = pathlib.Path(self.directory.name) / "report.csv"
+        summary = pipeline.by_fab_setting(
+            self.pcb,
+            out,
+            pipeline.RunOptions(backend="native", pad_filter=PadFilter(side="TOP")),
+        )
+        assert summary["pads"] == 1
+        with pytest.raises(UserWarning):
+            pipeline.by_fab_setting(
+                self.pcb,
+                out,
+                pipeline.RunOptions(
+                    backend="native", pad_filter=PadFilter(net_regex="VCC")
+                ),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Tests for `pad_table`."""
+
+import unittest
+
+import pandas as pd
+import pytest
+from kicad_testpoints.pad_table import PadTable
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+table = {
+    "source ref des": ["TP1", "TP2", "J1"],
+    "source pad": ["1", "1", "A1"],
+    "net": ["GND", "VCC", "GND"],
+    "net class": ["Default", "Power", "Default"],
+    "side": ["TOP", "TOP", "BOTTOM"],
+    "x": [1.0, 2.5, -3.25],
+    "y": [0.0, -1.0, 4.0],
+    "pad type": ["SMT", "SMT", "THRU"],
+    "footprint side": ["TOP", "TOP", "BOTTOM"],
+}
+
+
+class TestPadTable(unittest.TestCase):
+    def setUp(self):
+        self.pads = PadTable.from_columns(table)
+
+    def test_round_trip(self):
+        assert len(self.pads) == len(table["net"])
+        assert self.pads.to_columns() == table
+        assert list(self.pads.categories["net"]) == ["GND", "VCC"]
+        assert self.pads.columns["net"].tolist() == [0, 1, 0]
+
+    def test_dataframe(self):
+        df = self.pads.to_dataframe()
+        assert list(df.columns) == list(table)
+        assert isinstance(df["net"].dtype, pd.CategoricalDtype)
+        assert df.astype(object).to_dict("list") == table
+
+    def test_rows_view(self):
+        rows = self.pads.rows()
+        expected = [
+            dict(zip(table, line, strict=True))
+            for line in zip(*table.values(), strict=True)
+        ]
+        assert rows == expected
+        assert rows[-1]["source pad"] == "A1"
+        assert isinstance(rows[0]["x"], float)
+        assert rows[1:] == expected[1:]
+        with pytest.raises(TypeError):
+            hash(rows)
+
+    @unittest.skipIf(pa is None, "pyarrow not installed")
+    def test_arrow(self):
+        arrow = self.pads.to_arrow()
+        assert arrow.column_names == list(table)
+        assert arrow.column("net").to_pylist() == table["net"]
+        assert pa.types.is_dictionary(arrow.schema.field("net").type)
+
+
+if __name__ == "__main__":
+    unittest.main()
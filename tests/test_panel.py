@@ -0,0 +1,107 @@
+"""Tests for `panel`."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+from kicad_testpoints import panel
+from kicad_testpoints.pad_table import PadTable
+
+table = {
+    "source ref des": ["TP1", "J1"],
+    "source pad": ["1", "A1"],
+    "net": ["GND", "VCC"],
+    "side": ["TOP", "BOTTOM"],
+    "x": [1.0, 9.0],
+    "y": [2.0, 3.0],
+    "footprint side": ["TOP", "BOTTOM"],
+}
+
+
+class TestPanel(unittest.TestCase):
+    def test_step_and_repeat(self):
+        spec = panel.PanelSpec(rows=2, columns=3, pitch=(20.0, 10.0), rails=(5.0, 4.0))
+        result = panel.panelize(pd.DataFrame(table), spec)
+        assert len(result) == len(spec.instances()) * len(table["net"])
+        assert result["probe id"].is_unique
+        last = result[result["panel instance"] == len(spec.instances())]
+        assert (last["panel row"].tolist(), last["panel column"].tolist()) == (
+            [2, 2],
+            [3, 3],
+        )
+        assert list(last["probe id"]) == ["P6:TP1:1", "P6:J1:A1"]
+        np.testing.assert_allclose(last["x"], [1 + 5 + 40, 9 + 5 + 40])
+        np.testing.assert_allclose(last["y"], [2 + 4 + 10, 3 + 4 + 10])
+
+    def test_rotation_and_mirror(self):
+        spec = panel.PanelSpec(
+            rows=1,
+            columns=2,
+            pitch=(20.0, 0.0),
+            center=(5.0, 2.5),
+            rotations={(1, 1): 180},
+            mirrored={(1, 2)},
+        )
+        result = panel.panelize(PadTable.from_columns(table).rows(), spec)
+        first, second = (
+            result[result["panel instance"] == number] for number in (1, 2)
+        )
+        # 180 degrees about the center
+        np.testing.assert_allclose(first["x"], [9.0, 1.0])
+        np.testing.assert_allclose(first["y"], [3.0, 2.0])
+        # Mirrored about x = 5 and flipped
+        np.testing.assert_allclose(second["x"], [9.0 + 20, 1.0 + 20])
+        np.testing.assert_allclose(second["y"], [2.0, 3.0])
+        assert list(second["side"]) == ["BOTTOM", "TOP"]
+        assert list(first["side"]) == ["TOP", "BOTTOM"]
+
+    def test_spec_errors(self):
+        with pytest.raises(UserWarning):
+            panel.PanelSpec(rows=2, columns=2, rotations={(3, 1): 90})
+        with pytest.raises(UserWarning):
+            panel.parse_rotation("1,1")
+        assert panel.parse_rotation("2,3=90") == ((2, 3), 90.0)
+        assert panel.parse_pair("3") == (3.0, 3.0)
+        with pytest.raises(UserWarning, match="Expected x,y"):
+            panel.parse_pair("1,2,3")
+
+    def test_report_frame(self):
+        spec = panel.PanelSpec(rows=1, columns=2, pitch=(20.0, 10.0))
+        with pytest.raises(UserWarning, match="panelize"):
+            panel.panelize(pd.DataFrame(table).assign(frame="mils"), spec)
+
+    def test_large_panel(self):
+        # The timing is in benchmarks/bench_report.py
+        n = 5000
+        rng = np.random.default_rng(0)
+        report = pd.DataFrame(
+            {
+                "source ref des": [f"TP{i}" for i in range(n)],
+                "source pad": "1",
+                "side": "TOP",
+                "x": rng.uniform(0, 50, n),
+                "y": rng.uniform(0, 50, n),
+            }
+        )
+        spec = panel.PanelSpec(
+            rows=4, columns=4, pitch=(60.0, 60.0), rotations={(2, 2): 90}
+        )
+        result = panel.panelize(report, spec)
+        assert len(result) == len(spec.instances()) * n
+        assert result["probe id"].is_unique
+        # Each instance is the report under its own transform, in report order
+        for (row, column), matrix in zip(
+            spec.instances(), spec.transforms(), strict=True
+        ):
+            instance = result[
+                (result["panel row"] == row) & (result["panel column"] == column)
+            ]
+            expected = report[["x", "y"]].to_numpy() @ matrix[:, :2].T + matrix[:, 2]
+            np.testing.assert_array_equal(
+                instance[["x", "y"]].to_numpy(), np.round(expected, 4)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Tests for `pipeline`."""
+
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from kicad_testpoints import cli
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints import pipeline
+from kicad_testpoints import probe_spacing
+from kicad_testpoints.metrics import Metrics
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestWriteReport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.points = self.root / "points.csv"
+        self.points.write_text("source ref des,source pad\nTP1,1\nTP2,1\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_several_outputs(self):
+        outs = [self.root / "report.csv", self.root / "report.xlsx"]
+        metrics = Metrics()
+        summary = pipeline.from_spreadsheet(
+            data_dir / "demo_2_pads.kicad_pcb",
+            self.points,
+            outs,
+            pipeline.RunOptions(backend="native"),
+            metrics,
+        )
+        assert summary["out"] == ", ".join(str(out) for out in outs)
+        csv_df = pd.read_csv(outs[0], index_col=0)
+        xlsx_df = pd.read_excel(outs[1], index_col=0)
+        assert list(csv_df["source ref des"]) == ["TP1", "TP2"]
+        assert list(xlsx_df["source ref des"]) == ["TP1", "TP2"]
+        summary_df = pd.read_excel(outs[1], sheet_name="summary", index_col=0)
+        assert summary_df.loc["probes", "value"] == len(csv_df)
+        names = [stage.name for stage in metrics.stages]
+        assert "write report.xlsx" in names
+        assert names[-1] == "write"
+        assert sorted(path.name for path in self.root.iterdir()) == [
+            "points.csv",
+            "report.csv",
+            "report.xlsx",
+        ]
+
+    def test_failed_writer_leaves_no_outputs(self):
+        table = {"source ref des": ["TP1"], "net": ["GND"]}
+        existing = self.root / "report.csv"
+        existing.write_text("old")
+        outs = [existing, self.root / "report.xlsx", self.root / "report.unknown"]
+        with pytest.raises(AssertionError):
+            pipeline.write_report(table, outs)
+        assert existing.read_text() == "old"
+        assert sorted(path.name for path in self.root.iterdir()) == [
+            "points.csv",
+            "report.csv",
+        ]
+
+    def test_csv_run_does_not_import_pandas(self):
+        pcb = self.root / "board.kicad_pcb"
+        text = (data_dir / "demo_2_pads.kicad_pcb").read_text()
+        pcb.write_text(
+            text.replace(
+                '(layers "F.Cu" "F.Mask")',
+                '(layers "F.Cu" "F.Mask") (property pad_prop_testpoint)',
+            )
+        )
+        out = self.root / "report.csv"
+        args = [
+            "by-fab-setting",
+            "--pcb",
+            str(pcb),
+            "--out",
+            str(out),
+            "--backend",
+            "native",
+            "--no-cache",
+        ]
+        code = (
+            "import sys\n"
+            "from kicad_testpoints import cli\n"
+            "try:\n"
+            f"    cli.gr1.main({args!r}, standalone_mode=False)\n"
+            "finally:\n"
+            "    print('pandas' in sys.modules, 'numpy' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],  # noqa: S603
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.split()[-2:] == ["False", "False"]
+        assert out.exists()
+
+    def test_report_frame(self):
+        out = self.root / "report.csv"
+        options = pipeline.RunOptions(
+            backend="native",
+            settings=kicad_testpoints.Settings(units="inch", rotation=90),
+        )
+        pipeline.from_spreadsheet(
+            data_dir / "demo_2_pads.kicad_pcb", self.points, out, options
+        )
+        report_df = pd.read_csv(out, index_col=0)
+        assert list(report_df["frame"]) == ["inch, rotated 90"] * len(report_df)
+        pipeline.from_spreadsheet(data_dir / "demo_2_pads.kicad_pcb", self.points, out)
+        mm_df = pd.read_csv(out, index_col=0)
+        assert "frame" not in mm_df
+        # The pitch and distances stay in mm whatever the report units
+        pitch = 1000.0
+        expected = probe_spacing.pitch_violations(mm_df, pitch, per_side=False)
+        violations = probe_spacing.pitch_violations(report_df, pitch, per_side=False)
+        assert len(violations) == len(expected) == 1
+        assert violations["distance"].tolist() == pytest.approx(
+            expected["distance"].tolist(), abs=1e-3
+        )
+
+    def test_origin_options(self):
+        out = self.root / "report.csv"
+        args = ["from-spreadsheet", "--pcb", str(data_dir / "demo_2_pads.kicad_pcb")]
+        args += ["--points", str(self.points), "--out", str(out), "--backend", "native"]
+        for extra in (
+            ["--custom-origin", "1,2"],
+            ["--drill-center", "--origin", "grid"],
+        ):
+            result = CliRunner().invoke(cli.gr1, args + extra)
+            assert result.exit_code == 1, result.output
+            assert not out.exists()
+        with pytest.raises(UserWarning, match="conflicts"):
+            pipeline.RunOptions(
+                drill_center=True, settings=kicad_testpoints.Settings(origin="custom")
+            )
+
+
+class TestBoardsSpreadsheet(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        for name in ("demo_2_pads.kicad_pcb", "demo_2_pads_aux_origin.kicad_pcb"):
+            (self.root / name).write_bytes((data_dir / name).read_bytes())
+        self.points = self.root / "points.csv"
+        self.points.write_text(
+            "pcb,source ref des,source pad\n"
+            "demo_2_pads_aux_origin.kicad_pcb,TP1,1\n"
+            "demo_2_pads.kicad_pcb,TP1,1\n"
+            "./demo_2_pads_aux_origin.kicad_pcb,TP2,1\n"
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_combined_report(self):
+        out = self.root / "report.csv"
+        coverage_out = self.root / "coverage.xlsx"
+        for workers in (1, 2):
+            metrics = Metrics()
+            summary = pipeline.from_boards_spreadsheet(
+                self.points,
+                out,
+                pipeline.RunOptions(
+                    backend="native", coverage_out=coverage_out, workers=workers
+                ),
+                metrics,
+            )
+            report_df = pd.read_csv(out, index_col=0, keep_default_na=False)
+            rows = list(
+                zip(report_df["board"], report_df["source ref des"], strict=True)
+            )
+            assert rows == [
+                ("demo_2_pads_aux_origin.kicad_pcb", "TP1"),
+                ("demo_2_pads_aux_origin.kicad_pcb", "TP2"),
+                ("demo_2_pads.kicad_pcb", "TP1"),
+            ]
+            names = [stage.name for stage in metrics.stages]
+            loads = [name for name in names if name.endswith(": load board")]
+            assert loads == [
+                f"{board}: load board" for board in dict.fromkeys(report_df["board"])
+            ]
+            assert [line["pads"] for line in summary["boards"]] == [2, 1]
+            sheets = pd.read_excel(coverage_out, sheet_name=None)
+            assert list(sheets["boards"]["pads"]) == [2, 1]
+            assert set(sheets["nets"]["board"]) == set(report_df["board"])
+
+    def test_missing_board(self):
+        self.points.write_text("source ref des,source pad\nTP1,1\n")
+        with pytest.raises(UserWarning):
+            pipeline.from_boards_spreadsheet(self.points, self.root / "report.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
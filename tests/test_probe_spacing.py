@@ -0,0 +1,97 @@
+"""Tests for `probe_spacing`."""
+
+import itertools
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from kicad_testpoints import cli
+from kicad_testpoints import probe_spacing
+
+
+class TestProbeSpacing(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(0, 50, 400)
+        self.y = rng.uniform(0, 30, 400)
+
+    def test_pairs_within_matches_brute_force(self):
+        radius = 2.5
+        i, j, d = probe_spacing.pairs_within(self.x, self.y, radius)
+        found = {(min(a, b), max(a, b)) for a, b in zip(i, j, strict=False)}
+        assert len(found) == len(i)
+        expected = {
+            (a, b)
+            for a, b in itertools.combinations(range(len(self.x)), 2)
+            if np.hypot(self.x[a] - self.x[b], self.y[a] - self.y[b]) <= radius
+        }
+        assert found == expected
+        np.testing.assert_allclose(
+            d, np.hypot(self.x[i] - self.x[j], self.y[i] - self.y[j])
+        )
+
+    def test_nearest_neighbours_matches_brute_force(self):
+        # Add an isolated point outside the grid search radius
+        x = np.append(self.x, 500)
+        y = np.append(self.y, 500)
+        index, distance = probe_spacing.nearest_neighbours(x, y)
+        all_distances = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        np.fill_diagonal(all_distances, np.inf)
+        np.testing.assert_allclose(distance, all_distances.min(axis=1))
+        np.testing.assert_allclose(all_distances[np.arange(len(x)), index], distance)
+
+    def test_pitch_violations_per_side(self):
+        report_df = pd.DataFrame(
+            {
+                "source ref des": ["TP1", "TP2", "TP3", "TP4"],
+                "source pad": ["1", "1", "1", "1"],
+                "side": ["TOP", "TOP", "BOTTOM", "TOP"],
+                "x": [0.0, 1.0, 0.5, 10.0],
+                "y": [0.0, 0.0, 0.0, 0.0],
+            }
+        )
+        violations = probe_spacing.pitch_violations(report_df, 1.27)
+        assert len(violations) == 1
+        assert {
+            violations["source ref des a"][0],
+            violations["source ref des b"][0],
+        } == {"TP1", "TP2"}
+        violations = probe_spacing.pitch_violations(report_df, 1.27, per_side=False)
+        assert violations["distance"].tolist() == pytest.approx([0.5, 0.5, 1.0])
+
+        nearest = probe_spacing.add_nearest_probe(report_df)
+        assert nearest["nearest probe"].tolist() == ["TP2:1", "TP1:1", "", "TP2:1"]
+
+    def test_cli_framed_report(self):
+        report_df = pd.DataFrame(
+            {
+                "source ref des": ["TP1", "TP2", "TP3"],
+                "source pad": ["1", "1", "1"],
+                "side": ["TOP", "TOP", "BOTTOM"],
+                # 1 mm and 2 mm from TP1 in mils
+                "x": [0.0, 1000 / 25.4, 2000 / 25.4],
+                "y": [0.0, 0.0, 0.0],
+                "frame": ["grid origin, mils, bottom mirrored"] * 3,
+            }
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            report = pathlib.Path(directory) / "report.csv"
+            out = pathlib.Path(directory) / "violations.csv"
+            report_df.to_csv(report)
+            args = ["check-spacing", "--report", str(report), "--pitch", "1.27"]
+            result = CliRunner().invoke(cli.gr1, [*args, "--out", str(out)])
+            assert result.exit_code == 1, result.output
+            violations = pd.read_csv(out, index_col=0)
+            assert violations["distance"].tolist() == pytest.approx([1.0])
+            # Mirroring moves the bottom probes relative to the top ones
+            result = CliRunner().invoke(cli.gr1, [*args, "--all-sides"])
+            assert result.exit_code == 1
+            assert isinstance(result.exception, SystemExit)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Tests for `report_diff`."""
+
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from kicad_testpoints import cli
+from kicad_testpoints import report_diff
+
+columns = ("source ref des", "source pad", "net", "side", "x", "y")
+
+
+def make_report(lines):
+    return pd.DataFrame(lines, columns=columns)
+
+
+class TestReportDiff(unittest.TestCase):
+    def setUp(self):
+        self.old = make_report(
+            [
+                ("TP1", "1", "GND", "TOP", 0.0, 0.0),
+                ("TP2", "1", "SIG", "TOP", 5.0, 0.0),
+                ("TP3", "1", "VCC", "TOP", 10.0, 0.0),
+                ("U1", "EP", "GND", "TOP", 20.0, 0.0),
+                ("U1", "EP", "GND", "TOP", 21.0, 0.0),
+                ("TP4", "1", "A", "TOP", 30.0, 0.0),
+            ]
+        )
+        self.new = make_report(
+            [
+                ("TP1", 1, "GND", "TOP", 0.005, 0.0),
+                ("TP2", 1, "SIG", "TOP", 6.0, 0.0),
+                ("TP3", 1, "VDD", "BOTTOM", 10.0, 0.0),
+                ("U1", "EP", "GND", "TOP", 20.0, 0.0),
+                ("U1", "EP", "GND", "TOP", 21.0, 0.0),
+                ("TP5", 1, "B", "TOP", 40.0, 0.0),
+            ]
+        )
+
+    def test_classify(self):
+        result = report_diff.diff(self.old, self.new)
+        change = dict(zip(result["source ref des"], result["change"], strict=True))
+        assert change == {
+            "TP2": "moved",
+            "TP3": "renetted,side changed",
+            "TP4": "removed",
+            "TP5": "added",
+        }
+        assert result.set_index("source ref des").loc[
+            "TP2", "distance"
+        ] == pytest.approx(1.0)
+        assert report_diff.counts(result) == {
+            "added": 1,
+            "removed": 1,
+            "moved": 1,
+            "renetted": 1,
+            "side changed": 1,
+        }
+        everything = report_diff.diff(self.old, self.new, unchanged=True)
+        assert (len(everything), len(report_diff.diff(self.old, self.old))) == (7, 0)
+
+    def test_missing_columns(self):
+        with pytest.raises(UserWarning):
+            report_diff.diff(self.old.drop(columns="net"), self.new)
+
+    def test_report_frame(self):
+        with pytest.raises(UserWarning, match="rotated 90"):
+            report_diff.diff(self.old, self.new.assign(frame="rotated 90"))
+
+        def in_inch(report_df):
+            return report_df.assign(
+                x=report_df["x"] / 25.4, y=report_df["y"] / 25.4, frame="inch"
+            )
+
+        expected = report_diff.diff(self.old, self.new)
+        result = report_diff.diff(in_inch(self.old), in_inch(self.new))
+        assert result["change"].tolist() == expected["change"].tolist()
+        assert result["distance"].tolist() == pytest.approx(
+            expected["distance"].tolist(), nan_ok=True
+        )
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = pathlib.Path(directory)
+            self.old.to_csv(root / "old.csv", index=False)
+            self.new.to_csv(root / "new.csv", index=False)
+            result = CliRunner().invoke(
+                cli.gr1,
+                [
+                    "diff",
+                    str(root / "old.csv"),
+                    str(root / "new.csv"),
+                    "--out",
+                    str(root / "diff.csv"),
+                ],
+            )
+            assert result.exit_code == 0, result.output
+            written = pd.read_csv(root / "diff.csv")
+            assert sorted(written["source ref des"]) == ["TP2", "TP3", "TP4", "TP5"]
+
+
+if __name__ == "__main__":
+    unittest.main()
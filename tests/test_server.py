@@ -0,0 +1,114 @@
+"""Tests for `server`."""
+
+import http.client
+import io
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import unittest
+from http import HTTPStatus
+
+import pandas as pd
+import pytest
+from kicad_testpoints import server
+
+data_dir = pathlib.Path(__file__).parent / "data"
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.pcb = self.root / "board.kicad_pcb"
+        shutil.copy(data_dir / "demo_2_pads.kicad_pcb", self.pcb)
+        self.store = server.BoardStore(max_boards=2, backend="native")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start(self, **kwargs):
+        httpd = server.make_server(self.store, port=0, **kwargs)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return httpd
+
+    def test_store_reloads_changed_board(self):
+        index = self.store.get(self.pcb)
+        assert self.store.get(self.pcb) is index
+        # Touching the file keeps the board as the contents are unchanged
+        os.utime(self.pcb, ns=(0, 0))
+        assert self.store.get(self.pcb) is index
+        self.pcb.write_text(self.pcb.read_text() + "\n")
+        assert self.store.get(self.pcb) is not index
+        assert (self.store.hits, self.store.misses) == (2, 2)
+        # The project holds the net class assignments
+        index = self.store.get(self.pcb)
+        project = self.pcb.with_suffix(".kicad_pro")
+        project.write_text('{"net_settings": {"netclass_assignments": {}}}')
+        assert self.store.get(self.pcb) is not index
+        index = self.store.get(self.pcb)
+        os.utime(project, ns=(0, 0))
+        assert self.store.get(self.pcb) is index
+        assert (self.store.hits, self.store.misses) == (5, 3)
+
+        other = self.root / "other.kicad_pcb"
+        third = self.root / "third.kicad_pcb"
+        shutil.copy(self.pcb, other)
+        shutil.copy(self.pcb, third)
+        self.store.get(other)
+        self.store.get(third)
+        assert list(self.store.entries) == [other.resolve(), third.resolve()]
+
+    def test_tcp(self):
+        httpd = self.start()
+        client = server.Client(port=httpd.server_address[1])
+        result = client.report(
+            "from-spreadsheet", self.pcb, points=[["TP1", "1"], ["TP2", 1]]
+        )
+        assert result["report"]["source ref des"] == ["TP1", "TP2"]
+        assert result["summary"]["pads"] == len(result["report"]["net"])
+
+        body = client.request(
+            "from-spreadsheet", self.pcb, [["TP1", "1"]], format="csv"
+        )
+        assert len(pd.read_csv(io.BytesIO(body), index_col=0)) == 1
+        body = client.request(
+            "from-spreadsheet", self.pcb, [["TP1", "1"]], format="xlsx"
+        )
+        sheets = pd.read_excel(io.BytesIO(body), sheet_name=None, index_col=0)
+        assert list(sheets) == ["Sheet1", "summary"]
+        assert len(sheets["Sheet1"]) == 1
+        assert client.status()["misses"] == 1
+
+        with pytest.raises(UserWarning):
+            client.report("from-spreadsheet", self.pcb, points=[["TP9", "1"]])
+        with pytest.raises(UserWarning):
+            client.report("by-fab-setting", self.root / "missing.kicad_pcb")
+
+    def test_params_must_be_an_object(self):
+        httpd = self.start()
+        connection = http.client.HTTPConnection(*httpd.server_address[:2])
+        self.addCleanup(connection.close)
+        connection.request("POST", "/by-fab-setting", body=b'["board.kicad_pcb"]')
+        response = connection.getresponse()
+        assert response.status == HTTPStatus.BAD_REQUEST
+        assert "JSON object" in json.loads(response.read())["error"]
+
+    @unittest.skipUnless(hasattr(server.socket, "AF_UNIX"), "needs Unix sockets")
+    def test_unix_socket(self):
+        socket_path = self.root / "server.sock"
+        self.start(socket_path=socket_path)
+        points = self.root / "points.csv"
+        points.write_text("source ref des,source pad\nTP1,1\n")
+        client = server.Client(socket_path=socket_path)
+        result = client.report("from-spreadsheet", self.pcb, points=points)
+        assert result["summary"]["pads"] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Tests for `suggest`."""
+
+import pathlib
+import tempfile
+import unittest
+
+from kicad_testpoints import file_io
+from kicad_testpoints import pipeline
+from kicad_testpoints import suggest
+
+board = """(kicad_pcb (version 20240108) (generator "pcbnew")
+  (layers (0 "F.Cu" signal) (31 "B.Cu" signal))
+  (net 0 "")
+  (net 1 "GND")
+  (net 2 "SIG")
+  (footprint "Lib:R" (layer "F.Cu") (at 100 50)
+    (property "Reference" "R1" (at 0 0 0) (layer "F.SilkS"))
+    (pad "1" smd rect (at -1 0) (size 1 1) (layers "F.Cu" "F.Mask") (net 1 "GND"))
+    (pad "2" smd rect (at 1 0) (size 1 1) (layers "F.Cu" "F.Mask") (net 2 "SIG"))
+  )
+  (footprint "Lib:J" (layer "F.Cu") (at 120 50)
+    (property "Reference" "J1" (at 0 0 0) (layer "F.SilkS"))
+    (pad "1" thru_hole circle (at 0 0) (size 1.7 1.7) (drill 1)
+      (layers "*.Cu" "*.Mask") (net 1 "GND"))
+    (pad "2" thru_hole circle (at 2.54 0) (size 1.7 1.7) (drill 1)
+      (layers "*.Cu" "*.Mask") (net 2 "SIG"))
+  )
+)
+"""
+
+
+def make_table(lines):
+    keys = ("source ref des", "source pad", "net", "side", "x", "y", "pad type")
+    return {key: [line[i] for line in lines] for i, key in enumerate(keys)}
+
+
+class TestSuggest(unittest.TestCase):
+    def setUp(self):
+        self.table = make_table(
+            [
+                ("U1", "1", "A", "TOP", 1.0, 0.0, "SMT"),
+                ("U1", "2", "A", "TOP", 10.0, 0.0, "SMT"),
+                ("U2", "1", "B", "TOP", 0.0, 0.0, "SMT"),
+                ("U2", "2", "B", "BOTTOM", 50.0, 50.0, "SMT"),
+                ("U3", "1", "C", "BOTTOM", 20.0, 0.0, "SMT"),
+                ("U3", "2", "C", "BOTTOM", 30.0, 0.0, "SMT"),
+                ("J1", "1", "E", "BOTTOM", 40.0, 0.0, "THRU"),
+                ("J1", "2", "E", "BOTTOM", 45.0, 0.0, "SMT"),
+                ("U4", "1", "D", "TOP", 60.0, 0.0, "SMT"),
+                ("U4", "2", "", "TOP", 70.0, 0.0, "SMT"),
+            ]
+        )
+        self.net_pads = {"A": 2, "B": 2, "C": 2, "D": 1, "E": 2, "": 1}
+
+    def chosen(self, result):
+        return dict(
+            zip(
+                result["net"],
+                zip(
+                    result["source ref des"],
+                    result["source pad"],
+                    result["probe side"],
+                    strict=True,
+                ),
+                strict=True,
+            )
+        )
+
+    def test_one_pad_per_net_spread_out(self):
+        result = suggest.suggest(self.table, self.net_pads, pitch=2.54)
+        chosen = self.chosen(result)
+        assert sorted(chosen) == ["A", "B", "C", "E"]
+        # B only has one top pad at 0,0 so A takes its far pad
+        assert chosen["B"] == ("U2", "1", "TOP")
+        assert chosen["A"] == ("U1", "2", "TOP")
+        # C can only be reached from the bottom, the through hole pad from the top
+        assert chosen["C"][2] == "BOTTOM"
+        assert chosen["E"] == ("J1", "1", "TOP")
+
+    def test_prefer_bottom(self):
+        chosen = self.chosen(suggest.suggest(self.table, self.net_pads, side="BOTTOM"))
+        assert chosen["B"] == ("U2", "2", "BOTTOM")
+        assert chosen["A"][2] == "TOP"
+
+    def test_points_work_with_from_spreadsheet(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = pathlib.Path(directory)
+            pcb = root / "board.kicad_pcb"
+            pcb.write_text(board)
+            points = root / "points.csv"
+            summary = suggest.suggest_points(
+                pcb, points, options=pipeline.RunOptions(backend="native")
+            )
+            assert (summary["covered nets"], summary["nets"]) == (2, 2)
+
+            pipeline.from_spreadsheet(
+                pcb, points, root / "report.csv", pipeline.RunOptions(backend="native")
+            )
+            report = file_io.read_file_to_df((root / "report.csv").as_posix())
+            assert sorted(report["net"]) == ["GND", "SIG"]
+
+
+if __name__ == "__main__":
+    unittest.main()
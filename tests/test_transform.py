@@ -0,0 +1,128 @@
+"""Tests for `transform`."""
+
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+from kicad_testpoints import kicad_pcb_parser
+from kicad_testpoints import kicad_testpoints
+from kicad_testpoints.board_index import BoardIndex
+from kicad_testpoints.transform import Transform
+from kicad_testpoints.transform import require_default_frame
+
+from .test_kicad_pcb_parser import rotated_board
+
+xs = [10.0, 25.4, 0.123456, 30.0]
+ys = [20.0, 0.0, 7.654321, 5.0]
+bottom = [False, True, False, True]
+
+
+class TestTransform(unittest.TestCase):
+    def test_origin_shift(self):
+        transform = Transform(origin=(10.0, 20.0))
+        assert transform.simple
+        assert transform.apply_point(12.5, 15.0) == (2.5, 5.0)
+        assert transform.apply_point(10.0, 20.0) == (0.0, 0.0)
+
+    def test_units(self):
+        assert Transform(unit="inch").apply_point(25.4, -50.8) == (1.0, 2.0)
+        assert Transform(unit="mils").apply_point(2.54, 0.0) == (100.0, 0.0)
+        with pytest.raises(UserWarning):
+            Transform(unit="furlong")
+
+    def test_rotation_and_mirror(self):
+        transform = Transform(rotation=90)
+        # (1, 2) in y up coordinates rotated counter clockwise
+        assert transform.apply_point(1.0, -2.0) == (-2.0, 1.0)
+        mirrored = Transform(mirror_bottom=True)
+        assert mirrored.apply_point(1.0, -2.0, bottom=True) == (-1.0, 2.0)
+        assert mirrored.apply_point(1.0, -2.0, bottom=False) == (1.0, 2.0)
+
+    def test_frame(self):
+        assert Transform(origin=(1.0, 2.0)).frame() == ""
+        frame = Transform(unit="mils", rotation=-90, mirror_bottom=True).frame()
+        assert frame == "mils, rotated -90, bottom mirrored"
+
+    def test_columns_match_points(self):
+        for transform in (
+            Transform(origin=(1.0, 2.0)),
+            Transform(origin=(1.0, 2.0), unit="mils", rotation=30, mirror_bottom=True),
+            Transform(unit="inch", rotation=-90),
+        ):
+            x, y = transform.apply(xs, ys, bottom)
+            points = [
+                transform.apply_point(x, y, bottom=b)
+                for x, y, b in zip(xs, ys, bottom, strict=True)
+            ]
+            assert list(zip(x, y, strict=True)) == points
+
+
+class TestBoardOrigins(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pcb = pathlib.Path(self.directory.name) / "board.kicad_pcb"
+        text = rotated_board.replace(
+            "(aux_axis_origin 10 20)", "(aux_axis_origin 10 20) (grid_origin 5 5)"
+        )
+        self.pcb.write_text(text)
+        self.board = kicad_pcb_parser.load_board(self.pcb)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_origins(self):
+        for origin, expected in (("page", (0, 0)), ("aux", (10, 20)), ("grid", (5, 5))):
+            settings = kicad_testpoints.Settings(origin=origin)
+            assert tuple(kicad_testpoints.get_origin(self.board, settings)) == expected
+        settings = kicad_testpoints.Settings(origin="custom", custom_origin=(1.5, 2.5))
+        assert kicad_testpoints.get_origin(self.board, settings) == (1.5, 2.5)
+        with pytest.raises(UserWarning):
+            kicad_testpoints.get_origin(
+                self.board, kicad_testpoints.Settings(origin="center")
+            )
+
+    def test_table_matches_pad_position(self):
+        settings = kicad_testpoints.Settings(
+            origin="grid", units="mils", rotation=90, mirror_bottom=True
+        )
+        index = BoardIndex(self.board)
+        pads = kicad_testpoints.get_pads_by_property(index)
+        table = kicad_testpoints.build_test_point_table(self.board, settings, pads)
+        assert "BOTTOM" in table["side"]
+        for i, p in enumerate(pads):
+            position = kicad_testpoints.get_pad_position(p, settings)
+            assert [table["x"][i], table["y"][i]] == position
+        frame = "grid origin, mils, rotated 90, bottom mirrored"
+        assert table["frame"] == [frame] * len(pads)
+
+    def test_default_frame_has_no_column(self):
+        pads = kicad_testpoints.get_pads_by_property(BoardIndex(self.board))
+        for settings in (
+            kicad_testpoints.Settings(),
+            kicad_testpoints.Settings(origin="aux"),
+            kicad_testpoints.Settings(use_aux_origin=True),
+        ):
+            table = kicad_testpoints.build_test_point_table(self.board, settings, pads)
+            assert "frame" not in table
+            require_default_frame(table, "check")
+        table["frame"] = ["inch"] * len(pads)
+        with pytest.raises(UserWarning, match="inch"):
+            require_default_frame(table, "check")
+
+    def test_missing_origin_leaves_settings(self):
+        # pcbnew returns None for an origin that is not set
+        board = mock.Mock()
+        board.GetDesignSettings.return_value.GetGridOrigin.return_value = None
+        settings = kicad_testpoints.Settings(origin="grid")
+        assert kicad_testpoints.get_origin(board, settings) == (0, 0)
+        assert settings == kicad_testpoints.Settings(origin="grid")
+        assert "frame" not in kicad_testpoints.build_test_point_table(
+            board, settings, []
+        )
+
+    def test_drill_center_conflicts_with_origin(self):
+        settings = kicad_testpoints.Settings(use_aux_origin=True, origin="grid")
+        with pytest.raises(UserWarning, match="conflicts"):
+            kicad_testpoints.get_origin(self.board, settings)
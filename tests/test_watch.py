@@ -0,0 +1,101 @@
+"""Tests for `watch`."""
+
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+
+import click
+import pytest
+from click.testing import CliRunner
+from kicad_testpoints import cli
+from kicad_testpoints import watch
+
+from .test_kicad_pcb_parser import rotated_board
+
+
+class TestIncrementalReport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        self.pcb = self.root / "board.kicad_pcb"
+        self.pcb.write_text(rotated_board)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_changed_footprints_are_parsed(self):
+        report = watch.IncrementalReport(self.pcb)
+        report_df = report.update()
+        assert report.parsed == len(report.board.GetFootprints())
+        assert report_df["source ref des"].tolist() == ["R1", "J1"]
+
+        self.pcb.write_text(rotated_board.replace("(at 100 50 90)", "(at 101 50 90)"))
+        report_df = report.update()
+        assert report.parsed == 1
+        assert report_df["x"][0] == pytest.approx(101)
+
+        # Unrelated board items do not trigger a full rebuild
+        self.pcb.write_text(
+            rotated_board.replace("(at 100 50 90)", "(at 101 50 90)").replace(
+                "(end 10 0)", "(end 20 0)"
+            )
+        )
+        report.update()
+        assert report.parsed == 0
+
+    def test_origin_change_rebuilds(self):
+        report = watch.IncrementalReport(self.pcb, drill_center=True)
+        assert report.update()["x"][0] == pytest.approx(90)
+        self.pcb.write_text(
+            rotated_board.replace("(aux_axis_origin 10 20)", "(aux_axis_origin 0 0)")
+        )
+        report_df = report.update()
+        assert report.parsed == len(report.board.GetFootprints())
+        assert report_df["x"][0] == pytest.approx(100)
+
+    def test_points_order_and_changes(self):
+        points = self.root / "points.csv"
+        points.write_text("source ref des,source pad\nJ1,3\nR1,2\n")
+        report = watch.IncrementalReport(self.pcb, points=points)
+        report_df = report.update()
+        assert report_df["source pad"].tolist() == ["3", "2"]
+        points.write_text("source ref des,source pad\nR1,1\n")
+        report_df = report.update()
+        assert report.parsed == 0
+        assert report_df["source pad"].tolist() == ["1"]
+        points.write_text("source ref des,source pad\nR1,7\n")
+        with pytest.raises(UserWarning, match="Pad 7 not found"):
+            report.update()
+
+    def test_watch_debounces_saves(self):
+        calls = []
+        thread = threading.Thread(
+            target=watch.watch,
+            args=([self.pcb], lambda: calls.append(time.perf_counter())),
+            kwargs={"interval": 0.01, "debounce": 0.2, "cycles": 1},
+        )
+        thread.start()
+        time.sleep(0.1)
+        for i in range(3):
+            self.pcb.write_text(rotated_board + "\n" * (i + 1))
+            time.sleep(0.02)
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        # One call on start and one for the three merged saves
+        _, *changes = calls
+        assert len(changes) == 1
+
+    def test_cli_rejects_ignored_options(self):
+        out = self.root / "report.csv"
+        args = ["by-fab-setting", "--pcb", str(self.pcb), "--out", str(out), "--watch"]
+        for extra in (["--profile"], ["--coverage", str(self.root / "coverage.xlsx")]):
+            result = CliRunner().invoke(cli.gr1, args + extra)
+            assert result.exit_code == click.UsageError.exit_code, result.output
+            assert f"--watch can not be used with {extra[0]}" in result.output
+            assert not out.exists()
+
+
+if __name__ == "__main__":
+    unittest.main()